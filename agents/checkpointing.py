@@ -0,0 +1,140 @@
+import os
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Iterable, Optional
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 체크포인트 설정 (configure_checkpointing 또는 CHECKPOINT_DB 환경 변수로 변경, 빈 값이면 사용 안 함)
+_checkpoint_config = {
+    "path": os.getenv("CHECKPOINT_DB", os.path.join(".cache", "checkpoints.sqlite")),
+}
+_savers: Dict[str, "ThreadedSqliteSaver"] = {}
+_savers_lock = threading.Lock()
+
+class ThreadedSqliteSaver(SqliteSaver):
+    """
+    SQLite 체크포인트 저장소.
+
+    SqliteSaver는 비동기 메서드를 지원하지 않으므로, 비동기 그래프(ainvoke)에서는 동기 메서드를
+    스레드에서 실행합니다. 하나의 연결을 내부 잠금으로 보호하므로 여러 스레드/이벤트 루프에서 공유할 수 있습니다.
+    """
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+def configure_checkpointing(path: Optional[str] = None, enabled: Optional[bool] = None):
+    """
+    체크포인트 설정을 변경합니다.
+
+    Args:
+        path: SQLite 체크포인트 파일 경로
+        enabled: False면 체크포인트를 사용하지 않음
+    """
+    if path is not None:
+        _checkpoint_config["path"] = path
+    if enabled is False:
+        _checkpoint_config["path"] = ""
+
+def get_checkpoint_path() -> Optional[str]:
+    """현재 체크포인트 파일 경로 (사용하지 않으면 None)"""
+    return _checkpoint_config["path"] or None
+
+def get_checkpointer(path: Optional[str] = None) -> Optional[ThreadedSqliteSaver]:
+    """경로별로 하나의 체크포인트 저장소를 만들어 재사용합니다. (사용하지 않으면 None)"""
+    path = path or get_checkpoint_path()
+    if not path:
+        return None
+    with _savers_lock:
+        saver = _savers.get(path)
+        if saver is None:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            saver = ThreadedSqliteSaver(sqlite3.connect(path, check_same_thread=False))
+            saver.setup()
+            _savers[path] = saver
+            logger.info(f"체크포인트 저장소 준비 완료: {path}")
+        return saver
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+def run_config(run_id: str) -> Dict[str, Any]:
+    """실행 ID를 스레드 ID로 쓰는 그래프 실행 설정"""
+    return {"configurable": {"thread_id": run_id}}
+
+def _failed_node(values: Dict[str, Any], node_names: Iterable[str]) -> Optional[str]:
+    # 노드는 예외를 상태("<노드>_error")로 기록하므로 상태 값으로 실패한 노드를 찾음
+    status = values.get("status") or ""
+    if status.endswith("_error") and status[:-len("_error")] in node_names:
+        return status[:-len("_error")]
+    # 병렬 분석 노드의 오류 상태는 같은 단계의 다른 노드나 다음 노드가 덮어쓰므로
+    # market_analysis에 남긴 "<노드>_error" 항목으로 찾음
+    market_analysis = values.get("market_analysis") or {}
+    if market_analysis.get("analysis_failed"):
+        for name in node_names:
+            if market_analysis.get(f"{name}_error"):
+                return name
+    return None
+
+def _pdf_missing(values: Dict[str, Any]) -> bool:
+    # 렌더링 도중 프로세스가 끝났거나 렌더링에 실패해 PDF가 없는 경우
+    report_data = values.get("report_data") or {}
+    if report_data.get("pdf_status") not in ("rendering", "failed"):
+        return False
+    return not os.path.exists(report_data.get("pdf_path") or "")
+
+def find_resume_config(workflow, run_id: str, node_names: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """
+    실행을 다시 시작할 체크포인트 설정을 찾습니다.
+
+    - 실행 중 중단된 경우 (남은 노드가 있음): 마지막 체크포인트에서 남은 노드만 실행
+    - 노드가 오류 상태로 끝난 경우: 그 노드가 실행되기 직전 체크포인트로 돌아가 그 노드부터 다시 실행
+    - PDF가 만들어지지 않은 경우: pdf_generation 직전 체크포인트부터 다시 실행
+
+    Returns:
+        invoke(None, config)에 넘길 설정 (이미 정상 완료된 실행이면 None)
+
+    Raises:
+        ValueError: 해당 실행 ID의 체크포인트가 없을 때
+    """
+    node_names = set(node_names)
+    snapshot = workflow.get_state(run_config(run_id))
+    if not snapshot.values:
+        raise ValueError(f"실행 ID '{run_id}'의 체크포인트가 없습니다.")
+    if snapshot.next:
+        return snapshot.config
+
+    # 마지막 체크포인트에서 부모 방향으로 거슬러 올라가며 실패한 노드를 찾음 (이전 재시도 분기는 제외됨)
+    pdf_missing = _pdf_missing(snapshot.values)
+    current = snapshot
+    while current is not None and current.parent_config is not None:
+        parent = workflow.get_state(current.parent_config)
+        failed = _failed_node(current.values, node_names)
+        if failed is not None and failed in parent.next:
+            logger.info(f"실행 '{run_id}': 실패한 노드 '{failed}'부터 다시 실행합니다.")
+            return parent.config
+        if pdf_missing and "pdf_generation" in parent.next:
+            logger.info(f"실행 '{run_id}': PDF 보고서가 없어 pdf_generation부터 다시 실행합니다.")
+            return parent.config
+        current = parent
+    return None
@@ -0,0 +1,208 @@
+import os
+import asyncio
+import logging
+import weakref
+import threading
+import importlib.util
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# HTTP 연결 설정 (configure_clients 또는 HTTP_POOL_SIZE/HTTP_KEEPALIVE_EXPIRY/HTTP2 환경 변수로 변경)
+# - pool_size: 제공자별 최대 연결 수 (유휴 keep-alive 연결도 같은 수까지 유지)
+# - keepalive_expiry: 유휴 연결을 닫기까지의 시간 (초)
+# - http2: h2 패키지가 설치되어 있으면 HTTP/2 사용 (연결 하나로 여러 요청을 동시에 보냄)
+_client_config = {
+    "pool_size": int(os.getenv("HTTP_POOL_SIZE", "32")),
+    "keepalive_expiry": float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+    "http2": os.getenv("HTTP2", "1") != "0",
+}
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.RLock()
+
+def configure_clients(pool_size: Optional[int] = None, keepalive_expiry: Optional[float] = None,
+                      http2: Optional[bool] = None):
+    """
+    공유 HTTP 클라이언트 설정을 변경합니다. (이미 만든 클라이언트에는 적용되지 않으므로 초기화 전에 호출)
+
+    Args:
+        pool_size: 제공자별 최대 연결 수
+        keepalive_expiry: 유휴 연결 유지 시간 (초)
+        http2: False면 HTTP/1.1만 사용
+    """
+    if pool_size is not None:
+        _client_config["pool_size"] = max(1, pool_size)
+    if keepalive_expiry is not None:
+        _client_config["keepalive_expiry"] = keepalive_expiry
+    if http2 is not None:
+        _client_config["http2"] = http2
+
+def http2_enabled() -> bool:
+    """HTTP/2를 쓸지 여부 (설정이 켜져 있고 h2 패키지가 있을 때)"""
+    return _client_config["http2"] and importlib.util.find_spec("h2") is not None
+
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=_client_config["pool_size"],
+        max_keepalive_connections=_client_config["pool_size"],
+        keepalive_expiry=_client_config["keepalive_expiry"],
+    )
+
+class LoopLocalClient:
+    """
+    비동기 클라이언트를 이벤트 루프마다 하나씩 만들어, 속성 접근을 현재 루프의 클라이언트로 넘기는 대리 객체.
+
+    비동기 연결 풀은 연결을 만든 이벤트 루프에 묶이므로, 루프가 바뀌면(asyncio.run을 여러 번 호출 등)
+    새 풀을 만듭니다. 같은 루프 안에서는 모든 노드가 하나의 풀을 공유합니다.
+
+    factory는 (클라이언트, 연결 풀을 닫는 코루틴 함수)를 반환합니다. 루프가 끝나기 전에
+    aclose_loop_clients()를 호출해 그 루프의 연결 풀을 닫아야 연결이 남지 않습니다.
+    """
+
+    def __init__(self, factory: Callable[[], Tuple[Any, Callable[[], Awaitable[Any]]]]):
+        self._factory = factory
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[Any, Callable]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._default = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            if loop is None:
+                if self._default is None:
+                    self._default = self._factory()
+                return self._default[0]
+            entry = self._clients.get(loop)
+            if entry is None:
+                entry = self._clients[loop] = self._factory()
+            return entry[0]
+
+    async def aclose(self):
+        """현재 이벤트 루프의 클라이언트와 연결 풀을 닫습니다. (다음 접근 시 새로 만듦)"""
+        with self._lock:
+            entry = self._clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[1]()
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+def _shared(name: str, factory: Callable[[], Any]):
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = factory()
+        return client
+
+async def aclose_loop_clients():
+    """
+    현재 이벤트 루프에서 만든 공유 비동기 클라이언트(AsyncOpenAI, AsyncTavily)의 연결 풀을 모두 닫습니다.
+
+    asyncio.run으로 실행하는 비동기 배치/단일 실행이 끝나기 전에 호출합니다.
+    """
+    with _clients_lock:
+        loop_clients = [client for client in _clients.values() if isinstance(client, LoopLocalClient)]
+    for client in loop_clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"비동기 HTTP 클라이언트를 닫는 중 오류 발생: {str(e)}")
+
+def _log_created(provider: str):
+    logger.info(f"{provider} HTTP 클라이언트 생성 (연결 풀 {_client_config['pool_size']}, "
+                f"{'HTTP/2' if http2_enabled() else 'HTTP/1.1'})")
+
+def get_openai_client(api_key: Optional[str] = None):
+    """
+    모든 노드가 공유하는 OpenAI 클라이언트를 반환합니다.
+
+    재시도는 agents.resilience가 담당하므로 SDK 자체 재시도는 끕니다.
+    """
+    def create():
+        from openai import OpenAI, DefaultHttpxClient
+
+        _log_created("OpenAI")
+        return OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            max_retries=0,
+            http_client=DefaultHttpxClient(limits=_limits(), http2=http2_enabled()),
+        )
+
+    return _shared("openai", create)
+
+def get_async_openai_client(api_key: Optional[str] = None):
+    """모든 노드가 공유하는 AsyncOpenAI 클라이언트 (이벤트 루프별 연결 풀)를 반환합니다."""
+    def create():
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        _log_created("AsyncOpenAI")
+        client = AsyncOpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(limits=_limits(), http2=http2_enabled()),
+        )
+        return client, client.close
+
+    return _shared("async_openai", lambda: LoopLocalClient(create))
+
+def get_tavily_client(api_key: Optional[str] = None):
+    """공유 Tavily 클라이언트 (keep-alive 연결 풀을 가진 requests 세션 사용)를 반환합니다."""
+    def create():
+        import requests
+        from requests.adapters import HTTPAdapter
+        from tavily import TavilyClient
+
+        session = requests.Session()
+        # Tavily는 호스트 하나만 사용하므로 호스트별 풀 하나에 pool_size개 연결
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_client_config["pool_size"])
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _log_created("Tavily")
+        return TavilyClient(api_key=api_key or os.getenv("TAVILY_API_KEY"), session=session)
+
+    return _shared("tavily", create)
+
+def get_async_tavily_client(api_key: Optional[str] = None):
+    """공유 AsyncTavilyClient (이벤트 루프별 httpx 연결 풀)를 반환합니다."""
+    def create():
+        import httpx
+        from tavily import AsyncTavilyClient
+
+        _log_created("AsyncTavily")
+        # 외부에서 넘긴 httpx 클라이언트는 AsyncTavilyClient.close()가 닫지 않으므로 직접 닫음
+        http_client = httpx.AsyncClient(limits=_limits(), http2=http2_enabled())
+        client = AsyncTavilyClient(api_key=api_key or os.getenv("TAVILY_API_KEY"), client=http_client)
+        return client, http_client.aclose
+
+    return _shared("async_tavily", lambda: LoopLocalClient(create))
+
+def get_pinecone_index(index_name: str, api_key: Optional[str] = None):
+    """
+    인덱스 이름별로 하나의 Pinecone 인덱스 클라이언트를 만들어 재사용합니다.
+
+    모든 인덱스가 하나의 Pinecone 클라이언트를 공유하며, 인덱스 연결 풀 크기는 pool_size를 따릅니다.
+    """
+    def create_client():
+        from pinecone import Pinecone
+
+        _log_created("Pinecone")
+        return Pinecone(api_key=api_key or os.getenv("PINECONE_API_KEY"))
+
+    def create_index():
+        pc = _shared("pinecone", create_client)
+        pool_size = _client_config["pool_size"]
+        try:
+            return pc.Index(index_name, pool_threads=pool_size, connection_pool_maxsize=pool_size)
+        except TypeError:
+            # connection_pool_maxsize를 지원하지 않는 이전 클라이언트 버전
+            return pc.Index(index_name, pool_threads=pool_size)
+
+    return _shared(f"pinecone:{index_name}", create_index)
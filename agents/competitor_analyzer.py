@@ -1,38 +1,51 @@
-from langchain.utils import TavilyClient
-from openai import OpenAI
-import os
 import json
 import re
-from state_definitions import InvestmentState  # 중앙 집중식 상태 정의에서 가져옴
+import asyncio
+import logging
+from typing import Dict, Any, List
+from agents.clients import get_async_openai_client, get_openai_client
+from agents.llm_client import json_completion, ajson_completion
+from agents.search_client import get_search_client
+from agents.prompt_budget import compact_documents, get_prompt_budget, usage_record, record_usage
+from state_definitions import InvestmentState, CompetitorAnalysisOutput  # 중앙 집중식 상태 정의에서 가져옴
 
-# API 키 설정
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# 로깅 설정
+logger = logging.getLogger(__name__)
 
-# 클라이언트 초기화
-tavily = TavilyClient(api_key=TAVILY_API_KEY)
-client = OpenAI(api_key=OPENAI_API_KEY)
+# OpenAI 클라이언트 (첫 호출 시 공유 레지스트리에서 가져옴, Tavily 검색은 캐시된 공유 클라이언트 사용)
+client = None
+async_client = None
+
+def _get_client():
+    global client
+    if client is None:
+        client = get_openai_client()
+    return client
+
+def _get_async_client():
+    global async_client
+    if async_client is None:
+        async_client = get_async_openai_client()
+    return async_client
 
 def extract_company_name(title: str) -> str:
     # 쉼표(,) 또는 첫 공백을 기준으로 회사명만 잘라냄
     return title.split(",")[0].split(" ")[0].strip()
 
-def competitor_analysis(state: InvestmentState) -> InvestmentState:
-    """
-    경쟁사 분석 에이전트 - 스타트업 도메인의 경쟁사를 분석하고 차별성 점수를 매깁니다.
-    """
+# 경쟁사 분석 모델 설정
+MODEL = "gpt-3.5-turbo-0125"  # 최신 모델 사용
+TEMPERATURE = 0.5
+
+def _build_search_query(state: InvestmentState):
+    """상태에서 도메인/스타트업 이름을 꺼내 Tavily 검색어를 만듭니다."""
     # 스타트업 정보 추출 (이전 에이전트에서 설정한 값)
     domain = state.get("startup_info", {}).get("domain", "헬스케어")
     startup_name = state.get("startup_info", {}).get("name", "")
-    
-    # 1. Tavily 검색
     query = f"{domain} 스타트업 경쟁사 분석 {startup_name} 차별성"
-    result = tavily.search(query=query, search_depth="advanced")
-    documents = result.get("results", [])[:3]  # 상위 3개 문서만 가져옴
-    
-    # 2. 문서 텍스트 정리
-    document_text = "\n\n".join([f"{doc['title']}\n{doc['content']}" for doc in documents])
-    
+    return domain, startup_name, query
+
+def _build_messages(domain: str, startup_name: str, document_text: str) -> List[Dict[str, str]]:
+    """정리된 검색 문서로 경쟁우위 점수 요청 프롬프트를 구성합니다."""
     # 3. GPT로 경쟁우위 점수 요청
     system_prompt = (
         "당신은 스타트업 투자 전문가입니다. 아래 경쟁사 정보들을 바탕으로 다음을 평가하세요:\n"
@@ -50,81 +63,145 @@ def competitor_analysis(state: InvestmentState) -> InvestmentState:
     )
     
     user_prompt = f"도메인: {domain}\n스타트업: {startup_name}\n\n경쟁사 관련 정보:\n{document_text}"
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+def _parse_output(raw_output: str) -> Dict[str, Any]:
+    """GPT 응답에서 JSON을 추출합니다. JSON 형식이 아니면 ValueError를 발생시킵니다."""
+    # JSON 형식 추출 (정규식 사용)
+    json_match = re.search(r"\{[\s\S]*\}", raw_output)
+    if json_match:
+        json_str = json_match.group(0)
+        return json.loads(json_str)
+    # JSON 형식이 아니면 점수를 지어내지 않고 분석 실패로 처리
+    raise ValueError("경쟁사 분석 응답에서 JSON을 찾을 수 없습니다: " + raw_output[:100])
+
+def _competitor_documents(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """검색 문서를 경쟁사 문서 객체 (제목은 회사명만)로 바꿉니다."""
+    return [
+        {"title": extract_company_name(doc.get("title", "")), "url": doc.get("url", ""), "content": doc.get("content", "")}
+        for doc in documents
+    ]
+
+def _node_update(state: InvestmentState, competitors: List[Dict[str, Any]], analysis: Dict[str, Any],
+                 status: str) -> Dict[str, Any]:
+    """
+    이 노드가 담당하는 키만 돌려줍니다.
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo-0125",  # 최신 모델 사용
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.5,
-        )
-        
-        # 4. GPT 응답 파싱
-        raw_output = response.choices[0].message.content
-        
-        # JSON 형식 추출 (정규식 사용)
-        json_match = re.search(r"\{[\s\S]*\}", raw_output)
-        if json_match:
-            json_str = json_match.group(0)
-            parsed = json.loads(json_str)
-        else:
-            # JSON 형식이 아닌 경우 기본값 설정
-            parsed = {
-                "competitive_score": 5.0,
-                "competitive_reasoning": "경쟁사 분석 결과를 파싱할 수 없습니다.",
-                "competitors": []
-            }
-            
-    except Exception as e:
-        print(f"경쟁사 분석 중 오류 발생: {str(e)}")
-        # 오류 발생 시 기본값 설정
-        parsed = {
-            "competitive_score": 5.0,
-            "competitive_reasoning": f"경쟁사 분석 중 오류 발생: {str(e)}",
-            "competitors": []
-        }
-    
+    시장 조사와 같은 단계에서 병렬로 실행되므로 상태 전체를 돌려주지 않습니다. market_analysis는 키 단위로 합쳐집니다.
+    """
+    return {
+        "competitors": competitors,
+        "market_analysis": analysis,
+        "token_usage": state.get("token_usage", {}),
+        "status": status,
+    }
+
+def _apply_result(state: InvestmentState, parsed: Dict[str, Any], documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """파싱된 평가 결과와 경쟁사 문서로 상태 업데이트를 만듭니다."""
     # 5. 경쟁사 문서 객체 생성
-    competitor_docs = []
-    for doc in documents:
-        competitor_docs.append({
-            "title": extract_company_name(doc.get("title", "")),
-            "url": doc.get("url", ""),
-            "content": doc.get("content", "")
-        })
-    
-    # 6. 경쟁사 분석 결과 저장
-    state["competitors"] = parsed.get("competitors", [])
+    competitor_docs = _competitor_documents(documents)
     
-    # 7. 시장 분석 정보 업데이트
-    if "market_analysis" not in state:
-        state["market_analysis"] = {}
-    
-    state["market_analysis"].update({
+    # 6. 시장 분석 정보
+    analysis = {
         "competitor_documents": competitor_docs,
-        "competitive_score": parsed.get("competitive_score", 5.0),
         "competitive_reasoning": parsed.get("competitive_reasoning", "")
-    })
+    }
+    # 응답에 점수가 없으면 지어내지 않음 (투자 판단이 누락된 항목으로 처리)
+    if parsed.get("competitive_score") is not None:
+        analysis["competitive_score"] = parsed["competitive_score"]
     
-    # 8. 상태 업데이트
-    state["status"] = "competitor_analysis_completed"
+    # 7. 경쟁사 분석 결과와 상태 업데이트
+    return _node_update(state, parsed.get("competitors", []), analysis, "competitor_analysis_completed")
+
+def _apply_failure(state: InvestmentState, error: Exception, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    재시도/서킷 브레이커/구조화 출력 복구가 모두 실패한 경우 - 기본 점수를 채우지 않고
+    실패 표시(analysis_failed)와 노드 오류 상태를 남깁니다.
+    """
+    logger.error(f"경쟁사 분석 중 오류 발생: {str(error)}")
+    analysis = {
+        "analysis_failed": True,
+        "competitor_analysis_error": str(error),
+        "competitor_documents": _competitor_documents(documents),
+    }
+    return _node_update(state, [], analysis, "competitor_analysis_error")
+
+def competitor_analysis(state: InvestmentState) -> Dict[str, Any]:
+    """
+    경쟁사 분석 에이전트 - 스타트업 도메인의 경쟁사를 분석하고 차별성 점수를 매깁니다.
     
-    return state
+    상태 전체가 아니라 이 노드가 담당하는 키(competitors, market_analysis, token_usage, status)만 반환합니다.
+    """
+    domain, startup_name, query = _build_search_query(state)
+    
+    # 1. Tavily 검색 및 2. 문서 텍스트 정리 (토큰 예산 안에서 쿼리와 관련된 문장만 남김)
+    try:
+        result = get_search_client().search(query=query, domain=domain, search_depth="advanced")
+        documents = result.get("results", [])[:3]  # 상위 3개 문서만 가져옴
+        document_text, compaction = compact_documents(documents, query, get_prompt_budget("competitor_analysis"), MODEL)
+    except Exception as e:
+        logger.error(f"경쟁사 정보 검색 중 오류 발생: {str(e)}")
+        document_text = f"경쟁사 정보를 가져오지 못했습니다. 오류: {str(e)}"
+        documents, compaction = [], None
+    messages = _build_messages(domain, startup_name, document_text)
+    record_usage(state, "competitor_analysis", usage_record(messages, MODEL, compaction))
+    
+    try:
+        # 4. GPT 호출 및 응답 파싱 (스키마 검증)
+        parsed = json_completion(
+            _get_client(),
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            response_model=CompetitorAnalysisOutput,
+            fallback_parser=_parse_output,
+            node="competitor_analysis",
+        )
+            
+    except Exception as e:
+        return _apply_failure(state, e, documents)
+    
+    return _apply_result(state, parsed, documents)
 
-# 랭그래프 노드 생성 함수 - 메인에서 임포트할 때 사용
-def create_competitor_analysis_agent():
-    from langgraph.graph import StateGraph
+async def competitor_analysis_async(state: InvestmentState) -> Dict[str, Any]:
+    """
+    competitor_analysis의 비동기 버전 - AsyncOpenAI와 비동기 Tavily 검색을 사용합니다.
+    """
+    domain, startup_name, query = _build_search_query(state)
     
-    graph = StateGraph(InvestmentState)
-    graph.add_node("competitor_analysis", competitor_analysis)
+    # 1. Tavily 검색 및 2. 문서 텍스트 정리 (문장 임베딩은 CPU 작업이므로 스레드에서 실행)
+    try:
+        result = await get_search_client().asearch(query=query, domain=domain, search_depth="advanced")
+        documents = result.get("results", [])[:3]  # 상위 3개 문서만 가져옴
+        document_text, compaction = await asyncio.to_thread(
+            compact_documents, documents, query, get_prompt_budget("competitor_analysis"), MODEL
+        )
+    except Exception as e:
+        logger.error(f"경쟁사 정보 검색 중 오류 발생: {str(e)}")
+        document_text = f"경쟁사 정보를 가져오지 못했습니다. 오류: {str(e)}"
+        documents, compaction = [], None
+    messages = _build_messages(domain, startup_name, document_text)
+    record_usage(state, "competitor_analysis", usage_record(messages, MODEL, compaction))
     
-    # 시작점과 종료점이 같은 단일 노드 그래프
-    graph.set_entry_point("competitor_analysis")
-    graph.set_finish_point("competitor_analysis")
+    try:
+        # 4. GPT 호출 및 응답 파싱 (스키마 검증)
+        parsed = await ajson_completion(
+            _get_async_client(),
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            response_model=CompetitorAnalysisOutput,
+            fallback_parser=_parse_output,
+            node="competitor_analysis",
+        )
+            
+    except Exception as e:
+        return _apply_failure(state, e, documents)
     
-    return graph.compile()
+    return _apply_result(state, parsed, documents)
 
 # 단독 실행 테스트용
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """
+    SQLite 기반의 영속 키-값 캐시입니다.
+
+    - 항목별 만료 시간(TTL)을 지원합니다.
+    - 항목 수 또는 전체 크기가 상한을 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다 (LRU).
+    - 하나의 연결을 락으로 보호하므로 여러 스레드에서 공유해도 안전합니다.
+    """
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = 10000, max_bytes: Optional[int] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """키에 해당하는 값을 반환합니다. 없거나 만료되었으면 None을 반환합니다."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+
+            self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            return bytes(value)
+
+    def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None):
+        """값을 저장합니다. ttl_seconds를 생략하면 캐시 기본 TTL을 사용합니다."""
+        now = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = now + ttl if ttl else None
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, expires_at, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), now, expires_at, now, len(value))
+            )
+            self._evict_locked(now)
+
+    def delete(self, key: str):
+        """키에 해당하는 항목을 삭제합니다."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        """모든 항목을 삭제합니다."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _evict_locked(self, now: float):
+        """만료된 항목을 지우고, 상한을 넘으면 LRU 순서로 제거합니다. (락을 잡은 상태에서 호출)"""
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+        if self.max_entries:
+            count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                logger.debug(f"캐시 항목 {overflow}개 제거 (LRU, 최대 {self.max_entries}개)")
+
+        if self.max_bytes:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                # 오래된 항목부터 누적 크기를 계산해 초과분만큼 제거
+                freed = 0
+                victims = []
+                for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY last_access ASC"):
+                    if total - freed <= self.max_bytes:
+                        break
+                    victims.append((key,))
+                    freed += size
+                self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+                logger.debug(f"캐시 항목 {len(victims)}개 제거 (LRU, 최대 {self.max_bytes} bytes)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,225 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Callable, Sequence, Tuple
+
+import numpy as np
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# extract_domain 프롬프트와 같은 도메인 목록
+DOMAINS = [
+    "헬스케어", "AI", "핀테크", "에듀테크", "푸드테크", "커머스", "교육", "모빌리티",
+    "에너지", "환경", "소프트웨어", "하드웨어", "소셜미디어", "엔터테인먼트", "부동산", "보안",
+]
+
+# 도메인별 기준 문장 (중심 벡터 계산용, 한국어/영어 혼합 데이터에 맞춰 둘 다 포함)
+DOMAIN_SEEDS: Dict[str, List[str]] = {
+    "헬스케어": [
+        "병원과 환자를 위한 의료 진단, 원격 진료, 디지털 치료제 서비스",
+        "신약 개발, 바이오, 의료기기, 건강 관리 플랫폼",
+        "healthcare, medical diagnosis, telemedicine, biotech and digital health",
+    ],
+    "AI": [
+        "인공지능, 머신러닝, 딥러닝 모델과 생성형 AI 솔루션",
+        "컴퓨터 비전, 자연어 처리, 대규모 언어 모델 기반 서비스",
+        "artificial intelligence, machine learning models and generative AI",
+    ],
+    "핀테크": [
+        "간편 결제, 송금, 대출, 보험, 자산 관리 등 금융 서비스",
+        "블록체인, 가상자산, 증권 투자 플랫폼과 금융 데이터",
+        "fintech, payments, lending, banking, insurance and investment platform",
+    ],
+    "에듀테크": [
+        "온라인 강의, 학습 관리 시스템, AI 튜터 등 교육 기술 플랫폼",
+        "학생 맞춤형 학습 앱과 디지털 교육 콘텐츠",
+        "edtech, online learning platform, e-learning and tutoring app",
+    ],
+    "푸드테크": [
+        "배달, 외식, 식품 제조, 대체육, 스마트팜 등 음식 관련 기술",
+        "밀키트, 식자재 유통, 레스토랑 주문 관리 서비스",
+        "foodtech, food delivery, alternative protein and smart farming",
+    ],
+    "커머스": [
+        "온라인 쇼핑몰, 이커머스, 오픈마켓, 라이브 커머스",
+        "상품 판매, 유통, 물류, 패션과 뷰티 쇼핑 플랫폼",
+        "e-commerce, online retail marketplace and shopping platform",
+    ],
+    "교육": [
+        "학교, 학원, 유아 교육과 입시, 어학, 직무 교육 서비스",
+        "교사와 학부모를 위한 교육 프로그램과 교재",
+        "education services, schools, academies and training programs",
+    ],
+    "모빌리티": [
+        "자율주행, 전기차, 차량 공유, 킥보드, 택시 호출 서비스",
+        "드론, 로봇 배송, 교통 및 이동 수단 플랫폼",
+        "mobility, autonomous driving, electric vehicles and ride sharing",
+    ],
+    "에너지": [
+        "태양광, 풍력, 수소, 배터리, 에너지 저장 장치",
+        "전력 관리, 충전 인프라, 신재생 에너지 발전",
+        "energy, renewable power, batteries, hydrogen and solar",
+    ],
+    "환경": [
+        "탄소 중립, 재활용, 폐기물 처리, 친환경 소재",
+        "대기 오염과 수질 관리, 기후 테크, ESG 솔루션",
+        "environment, climate tech, recycling, waste management and carbon reduction",
+    ],
+    "소프트웨어": [
+        "기업용 SaaS, 클라우드, 협업 도구, 업무 자동화 소프트웨어",
+        "데이터베이스, 개발자 도구, 앱 개발과 IT 솔루션",
+        "enterprise software, SaaS, cloud platform and developer tools",
+    ],
+    "하드웨어": [
+        "반도체, 센서, 로봇, 웨어러블 기기 등 하드웨어 제품",
+        "제조 장비, IoT 디바이스, 휴머노이드 로봇과 부품",
+        "hardware, semiconductors, robotics, devices and manufacturing",
+    ],
+    "소셜미디어": [
+        "SNS, 커뮤니티, 메신저, 크리에이터와 팔로워를 연결하는 플랫폼",
+        "사용자 생성 콘텐츠와 소셜 네트워크 서비스",
+        "social media, social network, community and messaging app",
+    ],
+    "엔터테인먼트": [
+        "게임, 음악, 영화, 웹툰, 웹소설, K-POP 콘텐츠",
+        "공연, 팬 플랫폼, 스트리밍과 미디어 콘텐츠 제작",
+        "entertainment, games, music, video streaming and media content",
+    ],
+    "부동산": [
+        "부동산 중개, 임대, 분양, 공유 오피스, 프롭테크",
+        "건설, 인테리어, 주거 공간과 건물 관리 서비스",
+        "real estate, proptech, property management and housing",
+    ],
+    "보안": [
+        "사이버 보안, 해킹 방어, 개인정보 보호, 인증 솔루션",
+        "보안 관제, 암호화, 물리 보안과 CCTV",
+        "cybersecurity, information security, authentication and privacy",
+    ],
+}
+
+# 분류 설정 (configure_domain_classifier 또는 환경 변수로 변경)
+_classifier_config = {
+    "threshold": float(os.getenv("DOMAIN_CONFIDENCE_THRESHOLD", "0.5")),  # 이 신뢰도 미만이면 LLM 사용
+    "temperature": float(os.getenv("DOMAIN_SOFTMAX_TEMPERATURE", "0.05")),  # 유사도 → 확률 변환 온도
+    "examples_path": os.getenv("DOMAIN_EXAMPLES_PATH"),                     # 추가 라벨 예시 JSONL (text, domain)
+}
+_stats_lock = threading.Lock()
+_stats = {"local": 0, "llm_fallback": 0}
+
+def configure_domain_classifier(threshold: Optional[float] = None, temperature: Optional[float] = None,
+                                examples_path: Optional[str] = None):
+    """도메인 분류 설정을 변경합니다. 생략한 항목은 기존 값을 유지합니다."""
+    for key, value in (("threshold", threshold), ("temperature", temperature), ("examples_path", examples_path)):
+        if value is not None:
+            _classifier_config[key] = value
+
+def get_confidence_threshold() -> float:
+    return _classifier_config["threshold"]
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def load_examples(path: str) -> List[Tuple[str, str]]:
+    """라벨 예시 JSONL({"text", "domain"})을 읽습니다. 목록에 없는 도메인은 건너뜁니다."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("domain") in DOMAINS and record.get("text"):
+                examples.append((str(record["text"]), record["domain"]))
+    return examples
+
+class DomainClassifier:
+    """
+    임베딩 기반 nearest-centroid 도메인 분류기.
+
+    도메인마다 기준 문장(과 선택적인 라벨 예시)의 정규화 임베딩 평균을 중심 벡터로 두고,
+    입력 임베딩과의 코사인 유사도를 softmax로 바꾼 값을 신뢰도로 사용합니다.
+    검색/업로드와 같은 SentenceTransformer 임베딩을 쓰므로 이미 계산된 벡터로도 분류할 수 있습니다.
+    """
+
+    def __init__(self, encode_many: Callable[[List[str]], np.ndarray],
+                 examples: Optional[Sequence[Tuple[str, str]]] = None):
+        """
+        Args:
+            encode_many: 텍스트 목록 → (N, d) 임베딩 행렬 함수 (EmbeddingService.encode_many 등)
+            examples: 기준 문장에 더할 (텍스트, 도메인) 라벨 예시
+        """
+        self.encode_many = encode_many
+        texts, labels = [], []
+        for domain in DOMAINS:
+            for seed in DOMAIN_SEEDS[domain]:
+                texts.append(seed)
+                labels.append(domain)
+        for text, domain in examples or []:
+            texts.append(text)
+            labels.append(domain)
+
+        vectors = _normalize(encode_many(texts))
+        label_array = np.asarray(labels)
+        self.centroids = _normalize(np.stack([vectors[label_array == domain].mean(axis=0) for domain in DOMAINS]))
+        logger.info(f"도메인 분류기 준비 완료: 도메인 {len(DOMAINS)}개, 기준 문장 {len(texts)}개")
+
+    def predict_vectors(self, vectors: np.ndarray) -> List[Tuple[str, float]]:
+        """임베딩 행렬 → (도메인, 신뢰도) 목록"""
+        similarities = _normalize(vectors).dot(self.centroids.T)
+        logits = similarities / _classifier_config["temperature"]
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        return [(DOMAINS[i], float(probabilities[row, i])) for row, i in enumerate(best)]
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """텍스트 목록 → (도메인, 신뢰도) 목록"""
+        if not texts:
+            return []
+        return self.predict_vectors(self.encode_many(list(texts)))
+
+    def classify(self, name: str, summary: str) -> Tuple[str, float]:
+        """스타트업 하나의 (도메인, 신뢰도)"""
+        return self.predict([f"{name}\n{summary}"])[0]
+
+def create_domain_classifier(encode_many: Callable[[List[str]], np.ndarray]) -> DomainClassifier:
+    """설정된 라벨 예시 파일이 있으면 함께 사용해 분류기를 만듭니다."""
+    path = _classifier_config["examples_path"]
+    examples = load_examples(path) if path and os.path.exists(path) else None
+    return DomainClassifier(encode_many, examples)
+
+def classify_by_name(classifier: DomainClassifier, names: Sequence[str], vectors: np.ndarray,
+                     threshold: Optional[float] = None) -> Dict[str, str]:
+    """
+    업로드 시 스타트업별 도메인을 정합니다.
+
+    같은 스타트업의 조각 임베딩 평균으로 한 번만 분류하고, 신뢰도가 기준 미만이면 결과에서 뺍니다.
+    (도메인이 없는 스타트업은 검색 시점에 LLM으로 보완)
+    """
+    threshold = get_confidence_threshold() if threshold is None else threshold
+    unique_names = list(dict.fromkeys(names))
+    name_array = np.asarray(names)
+    normalized = _normalize(vectors)
+    means = np.stack([normalized[name_array == name].mean(axis=0) for name in unique_names])
+    predictions = classifier.predict_vectors(means)
+    return {name: domain for name, (domain, confidence) in zip(unique_names, predictions) if confidence >= threshold}
+
+def record_outcome(outcome: str):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+def get_domain_stats() -> Dict[str, Any]:
+    """로컬 분류로 끝난 횟수와 LLM으로 넘긴 횟수를 반환합니다."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["local"] + stats["llm_fallback"]
+    stats["local_rate"] = round(stats["local"] / total, 3) if total else 0.0
+    return stats
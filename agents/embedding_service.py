@@ -0,0 +1,198 @@
+import os
+import time
+import asyncio
+import queue
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from agents.disk_cache import DiskCache
+from agents.tracing import span
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+class EmbeddingService:
+    """
+    SentenceTransformer 임베딩 서비스.
+
+    - 메모리 LRU 캐시와 디스크 캐시((모델 이름, 텍스트) 키)로 같은 텍스트를 다시 인코딩하지 않습니다.
+    - encode()로 들어온 단건 요청을 짧은 대기 시간 동안 모아 한 번의 배치 인코딩으로 처리합니다.
+    - encode_many()는 검색과 업로드(ingestion)에서 공통으로 사용하는 배치 API입니다.
+    """
+
+    def __init__(self, model, model_name: str, cache_path: Optional[str] = os.path.join(".cache", "embedding_cache.sqlite"),
+                 lru_size: int = 4096, flush_window_ms: float = 5.0, max_batch_size: int = 64,
+                 disk_max_entries: int = 200000):
+        """
+        Args:
+            model: SentenceTransformer 인스턴스 (encode 메서드를 가진 객체)
+            model_name: 캐시 키에 사용할 모델 이름
+            cache_path: 디스크 캐시 경로 (None이면 디스크 캐시 미사용)
+            lru_size: 메모리 LRU 캐시 항목 수
+            flush_window_ms: 단건 요청을 모으는 최대 대기 시간 (밀리초)
+            max_batch_size: 한 번에 모아 인코딩할 최대 요청 수
+            disk_max_entries: 디스크 캐시 최대 항목 수
+        """
+        self.model = model
+        self.model_name = model_name
+        self.lru_size = lru_size
+        self.flush_window = flush_window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.disk_cache = DiskCache(cache_path, max_entries=disk_max_entries) if cache_path else None
+
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._requests: "queue.Queue" = queue.Queue()
+        self._batcher: Optional[threading.Thread] = None
+
+        self._stats = {"lru_hits": 0, "disk_hits": 0, "encoded": 0, "model_calls": 0, "micro_batches": 0}
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def _lru_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+            return vector
+
+    def _lru_put(self, key: str, vector: np.ndarray):
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self._stats[name] += value
+
+    def encode_many(self, texts: Sequence[str], batch_size: int = 64, use_cache: bool = True) -> np.ndarray:
+        """
+        여러 텍스트를 인코딩해 (N, d) float32 행렬로 반환합니다.
+
+        캐시에 없는 텍스트만 중복 없이 모아 모델을 한 번 호출합니다.
+        """
+        texts = list(texts)
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        for i, text in enumerate(texts):
+            key = self._key(text)
+            if use_cache:
+                vector = self._lru_get(key)
+                if vector is not None:
+                    self._count("lru_hits")
+                    vectors[i] = vector
+                    continue
+
+                if self.disk_cache is not None:
+                    raw = self.disk_cache.get(key)
+                    if raw is not None:
+                        self._count("disk_hits")
+                        vector = np.frombuffer(raw, dtype=np.float32)
+                        self._lru_put(key, vector)
+                        vectors[i] = vector
+                        continue
+            missing.setdefault(text, []).append(i)
+
+        if missing:
+            unique_texts = list(missing)
+            with span("embedding.model", kind="embedding", texts=len(unique_texts),
+                      cache_hits=len(texts) - sum(len(indices) for indices in missing.values())):
+                encoded = np.asarray(self.model.encode(unique_texts, batch_size=batch_size), dtype=np.float32)
+            self._count("model_calls")
+            self._count("encoded", len(unique_texts))
+
+            for text, vector in zip(unique_texts, encoded):
+                vector = np.ascontiguousarray(vector)
+                key = self._key(text)
+                if use_cache:
+                    self._lru_put(key, vector)
+                    if self.disk_cache is not None:
+                        self.disk_cache.set(key, vector.tobytes())
+                for i in missing[text]:
+                    vectors[i] = vector
+
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(vectors)
+
+    def encode(self, text: str) -> np.ndarray:
+        """
+        텍스트 하나를 인코딩합니다.
+
+        캐시에 있으면 바로 반환하고, 없으면 다른 스레드의 요청과 함께 마이크로 배치로 인코딩합니다.
+        """
+        vector = self._lru_get(self._key(text))
+        if vector is not None:
+            self._count("lru_hits")
+            return vector
+
+        future: Future = Future()
+        self._ensure_batcher()
+        self._requests.put((text, future))
+        return future.result()
+
+    async def aencode(self, text: str) -> np.ndarray:
+        """encode()의 비동기 버전 - 스레드를 점유하지 않고 마이크로 배치 결과를 기다립니다."""
+        vector = self._lru_get(self._key(text))
+        if vector is not None:
+            self._count("lru_hits")
+            return vector
+
+        future: Future = Future()
+        self._ensure_batcher()
+        self._requests.put((text, future))
+        return await asyncio.wrap_future(future)
+
+    def _ensure_batcher(self):
+        with self._lock:
+            if self._batcher is None or not self._batcher.is_alive():
+                self._batcher = threading.Thread(target=self._run_batcher, name="embedding-batcher", daemon=True)
+                self._batcher.start()
+
+    def _run_batcher(self):
+        """단건 요청을 flush_window 동안 모아 encode_many 한 번으로 처리하는 백그라운드 루프"""
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.monotonic() + self.flush_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._count("micro_batches")
+            try:
+                vectors = self.encode_many([text for text, _ in batch])
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                logger.error(f"임베딩 마이크로 배치 처리 중 오류 발생: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 적중, 실제 인코딩 수, 모델 호출/마이크로 배치 횟수를 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["lru_size"] = len(self._lru)
+        return stats
+
+def as_embedding_service(model, model_name: str = "all-MiniLM-L6-v2", **kwargs) -> EmbeddingService:
+    """모델이 이미 EmbeddingService이면 그대로, 아니면 감싸서 반환합니다."""
+    if isinstance(model, EmbeddingService):
+        return model
+    return EmbeddingService(model, model_name, **kwargs)
@@ -1,77 +1,71 @@
 import os
 import json
 import re
-from typing import Dict, Any
-from openai import OpenAI
-from state_definitions import InvestmentState
+from typing import Dict, Any, List
+from agents.clients import get_async_openai_client, get_openai_client
+from agents.llm_client import json_completion, ajson_completion
+from agents.prompt_budget import usage_record, record_usage
+from agents.local_scorer import local_decision
+from state_definitions import InvestmentState, InvestmentDecisionOutput
 
-# OpenAI 클라이언트 초기화
+# OpenAI 클라이언트 (init_openai_client에서 공유 레지스트리의 클라이언트로 설정)
 client = None
+async_client = None
+
+# 투자 판단 모델 설정
+MODEL = "gpt-3.5-turbo-0125"
+TEMPERATURE = 0.3
 
 def init_openai_client(api_key: str = None):
-    """OpenAI 클라이언트 초기화"""
-    global client
+    """OpenAI 클라이언트 초기화 (다른 노드와 같은 동기/비동기 공유 클라이언트 사용)"""
+    global client, async_client
     api_key = api_key or os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OpenAI API 키가 설정되지 않았습니다")
-    client = OpenAI(api_key=api_key)
+    
+    client = get_openai_client(api_key)
+    async_client = get_async_openai_client(api_key)
     return client
 
-def investment_judgment(state: InvestmentState) -> InvestmentState:
-    """
-    투자 가능성 판단 에이전트 - 수집된 데이터를 바탕으로 투자 여부를 결정합니다.
-    """
-    global client
-    if client is None:
-        init_openai_client()
-    
-    # 예외 처리: 필요한 평가 정보 확인
+def _build_messages(state: InvestmentState) -> List[Dict[str, str]]:
+    """수집된 시장/경쟁사/스타트업 정보로 투자 판단 프롬프트를 구성합니다."""
     market_analysis = state.get("market_analysis", {})
     competitor_data = state.get("competitors", [])
     
-    if not market_analysis:
-        # 필요한 정보가 없는 경우 기본값 설정
-        state["investment_recommendation"] = {
-            "judgement": "불통과",
-            "reasoning": "투자 판단에 필요한 시장 분석 데이터가 부족합니다."
-        }
-        state["status"] = "investment_judgment_insufficient_data"
-        return state
+    # 시장 점수 데이터 준비 (분석에 실패해 없는 점수는 지어내지 않고 그대로 알림)
+    missing = "정보 없음 (분석 실패)"
+    market_scores = market_analysis.get("market_scores", {})
+    market_size_score = market_scores.get("market_size", {}).get("score", missing)
+    problem_fit_score = market_scores.get("problem_fit", {}).get("score", missing)
+    willingness_to_pay_score = market_scores.get("willingness_to_pay", {}).get("score", missing)
+    revenue_model_clarity_score = market_scores.get("revenue_model_clarity", {}).get("score", missing)
+    upside_potential_score = market_scores.get("upside_potential", {}).get("score", missing)
     
-    try:
-        # 시장 점수 데이터 준비
-        market_scores = market_analysis.get("market_scores", {})
-        market_size_score = market_scores.get("market_size", {}).get("score", 5)
-        problem_fit_score = market_scores.get("problem_fit", {}).get("score", 5)
-        willingness_to_pay_score = market_scores.get("willingness_to_pay", {}).get("score", 5)
-        revenue_model_clarity_score = market_scores.get("revenue_model_clarity", {}).get("score", 5)
-        upside_potential_score = market_scores.get("upside_potential", {}).get("score", 5)
-        
-        # 경쟁사 데이터 준비
-        competitive_score = market_analysis.get("competitive_score", 5)
-        competitive_reasoning = market_analysis.get("competitive_reasoning", "정보 없음")
-        
-        # 스타트업 정보
-        startup_info = state.get("startup_info", {})
-        startup_name = startup_info.get("name", "미확인 스타트업")
-        startup_domain = startup_info.get("domain", "기술")
-        startup_summary = startup_info.get("summary", "정보 없음")
-        
-        # 시스템 프롬프트
-        system_prompt = (
-            "당신은 스타트업 투자 심사역입니다.\n"
-            "아래 정보를 보고 '통과' 또는 '불통과' 중 하나로 투자 판단을 내려주세요.\n"
-            "그리고 그 이유도 간단히 설명해주세요.\n"
-            "출력은 반드시 다음 JSON 형식으로 해주세요:\n"
-            "{\n"
-            ' "judgement": "통과" 또는 "불통과",\n'
-            ' "reasoning": "이유",\n'
-            ' "score": 0부터 100까지의 투자 적합성 점수\n'
-            "}"
-        )
-        
-        # 사용자 프롬프트
-        user_prompt = f"""
+    # 경쟁사 데이터 준비
+    competitive_score = market_analysis.get("competitive_score", missing)
+    competitive_reasoning = market_analysis.get("competitive_reasoning", "정보 없음")
+    
+    # 스타트업 정보
+    startup_info = state.get("startup_info", {})
+    startup_name = startup_info.get("name", "미확인 스타트업")
+    startup_domain = startup_info.get("domain", "기술")
+    startup_summary = startup_info.get("summary", "정보 없음")
+    
+    # 시스템 프롬프트
+    system_prompt = (
+        "당신은 스타트업 투자 심사역입니다.\n"
+        "아래 정보를 보고 '통과' 또는 '불통과' 중 하나로 투자 판단을 내려주세요.\n"
+        "그리고 그 이유도 간단히 설명해주세요.\n"
+        "출력은 반드시 다음 JSON 형식으로 해주세요:\n"
+        "{\n"
+        ' "judgement": "통과" 또는 "불통과",\n'
+        ' "reasoning": "이유",\n'
+        ' "score": 0부터 100까지의 투자 적합성 점수\n'
+        "}"
+    )
+    
+    # 사용자 프롬프트
+    user_prompt = f"""
 스타트업: {startup_name}
 도메인: {startup_domain}
 설명: {startup_summary}
@@ -89,74 +83,148 @@ def investment_judgment(state: InvestmentState) -> InvestmentState:
 
 [경쟁사 정보]
 """
-        # 경쟁사 정보 추가
-        for i, competitor in enumerate(competitor_data[:3]):  # 상위 3개만
-            user_prompt += f"""
+    # 경쟁사 정보 추가
+    for i, competitor in enumerate(competitor_data[:3]):  # 상위 3개만
+        user_prompt += f"""
 경쟁사 {i+1}: {competitor.get('name', '미확인')}
 강점: {', '.join(competitor.get('strengths', ['정보 없음']))}
 약점: {', '.join(competitor.get('weaknesses', ['정보 없음']))}
 """
-        
-        # GPT 호출
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo-0125",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.3,
-        )
-        
-        # GPT 응답 파싱
-        raw_output = response.choices[0].message.content
-        
-        # JSON 파싱
-        json_match = re.search(r"\{[\s\S]*\}", raw_output)
-        if json_match:
-            json_str = json_match.group(0)
-            parsed = json.loads(json_str)
-        else:
-            # JSON 형식이 아닌 경우 기본값 설정
-            parsed = {
-                "judgement": "불통과",
-                "reasoning": "응답 형식 오류: " + raw_output[:100] + "...",
-                "score": 50
-            }
-        
-        # 판단 결과 저장
-        investment_recommendation = {
-            "judgement": parsed.get("judgement", "불통과"),
-            "reasoning": parsed.get("reasoning", "이유 없음"),
-            "score": parsed.get("score", 50)
+    
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+def _parse_recommendation(raw_output: str) -> Dict[str, Any]:
+    """GPT 응답을 파싱해 투자 판단 결과를 만듭니다."""
+    # JSON 파싱
+    json_match = re.search(r"\{[\s\S]*\}", raw_output)
+    if json_match:
+        json_str = json_match.group(0)
+        parsed = json.loads(json_str)
+    else:
+        # JSON 형식이 아닌 경우 기본값 설정
+        parsed = {
+            "judgement": "불통과",
+            "reasoning": "응답 형식 오류: " + raw_output[:100] + "...",
+            "score": 50
         }
-        
-        # 상태 업데이트
-        state["investment_recommendation"] = investment_recommendation
+    
+    # 판단 결과 저장
+    return {
+        "judgement": parsed.get("judgement", "불통과"),
+        "reasoning": parsed.get("reasoning", "이유 없음"),
+        "score": parsed.get("score", 50)
+    }
+
+def _set_insufficient_data(state: InvestmentState) -> InvestmentState:
+    # 필요한 정보가 없는 경우 기본값 설정
+    state["investment_recommendation"] = {
+        "judgement": "불통과",
+        "reasoning": "투자 판단에 필요한 시장 분석 데이터가 부족합니다."
+    }
+    state["status"] = "investment_judgment_insufficient_data"
+    return state
+
+def _set_error(state: InvestmentState, error: Exception) -> InvestmentState:
+    # 오류 처리
+    state["investment_recommendation"] = {
+        "judgement": "불통과",
+        "reasoning": f"평가 중 오류 발생: {str(error)}",
+        "score": 0
+    }
+    state["status"] = "investment_judgment_error"
+    return state
+
+def _apply_local_decision(state: InvestmentState, decision: Dict[str, Any]) -> InvestmentState:
+    # 로컬 점수 모델 판단으로 충분한 경우 (LLM 호출 없음)
+    state["investment_recommendation"] = decision["recommendation"]
+    state["status"] = "investment_judgment_completed"
+    return state
+
+def _mark_llm_decision(state: InvestmentState, decision: Dict[str, Any]):
+    # LLM 판단에 로컬 점수와 호출 사유를 함께 기록
+    recommendation = dict(state["investment_recommendation"])
+    recommendation.update(decision_source="llm", local_score=decision["local_score"], escalation_reason=decision["reason"])
+    state["investment_recommendation"] = recommendation
+
+def investment_judgment(state: InvestmentState) -> InvestmentState:
+    """
+    투자 가능성 판단 에이전트 - 수집된 데이터를 바탕으로 투자 여부를 결정합니다.
+    
+    로컬 점수 모델의 점수가 불확실 구간 밖이면 바로 판단하고, 경계 사례이거나 분석 실패로
+    점수가 빠졌거나(insufficient_data) 판단 근거가 필요할 때만 GPT를 호출합니다.
+    """
+    # 예외 처리: 필요한 평가 정보 확인
+    if not state.get("market_analysis", {}):
+        return _set_insufficient_data(state)
+    
+    decision = local_decision(state["market_analysis"])
+    if decision["fast_path"]:
+        return _apply_local_decision(state, decision)
+    
+    if client is None:
+        init_openai_client()
+    
+    messages = _build_messages(state)
+    record_usage(state, "investment_judgment", usage_record(messages, MODEL))
+    
+    try:
+        # GPT 호출 및 응답 파싱 (스키마 검증)
+        state["investment_recommendation"] = json_completion(
+            client,
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            response_model=InvestmentDecisionOutput,
+            fallback_parser=_parse_recommendation,
+            node="investment_judgment",
+        )
+        _mark_llm_decision(state, decision)
         state["status"] = "investment_judgment_completed"
         
     except Exception as e:
-        # 오류 처리
-        state["investment_recommendation"] = {
-            "judgement": "불통과",
-            "reasoning": f"평가 중 오류 발생: {str(e)}",
-            "score": 0
-        }
-        state["status"] = "investment_judgment_error"
+        _set_error(state, e)
     
     return state
 
-# 랭그래프 노드 생성 함수 - 메인에서 임포트할 때 사용
-def create_investment_judgment_agent():
-    from langgraph.graph import StateGraph
+async def investment_judgment_async(state: InvestmentState) -> InvestmentState:
+    """
+    investment_judgment의 비동기 버전 - AsyncOpenAI 클라이언트를 사용합니다.
+    """
+    # 예외 처리: 필요한 평가 정보 확인
+    if not state.get("market_analysis", {}):
+        return _set_insufficient_data(state)
     
-    graph = StateGraph(InvestmentState)
-    graph.add_node("investment_judgment", investment_judgment)
+    decision = local_decision(state["market_analysis"])
+    if decision["fast_path"]:
+        return _apply_local_decision(state, decision)
     
-    # 시작점과 종료점이 같은 단일 노드 그래프
-    graph.set_entry_point("investment_judgment")
-    graph.set_finish_point("investment_judgment")
+    if async_client is None:
+        init_openai_client()
     
-    return graph.compile()
+    messages = _build_messages(state)
+    record_usage(state, "investment_judgment", usage_record(messages, MODEL))
+    
+    try:
+        # GPT 호출 및 응답 파싱 (스키마 검증)
+        state["investment_recommendation"] = await ajson_completion(
+            async_client,
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            response_model=InvestmentDecisionOutput,
+            fallback_parser=_parse_recommendation,
+            node="investment_judgment",
+        )
+        _mark_llm_decision(state, decision)
+        state["status"] = "investment_judgment_completed"
+        
+    except Exception as e:
+        _set_error(state, e)
+    
+    return state
 
 # 단독 실행 테스트용
 if __name__ == "__main__":
@@ -0,0 +1,504 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Callable, Tuple, Type
+
+from pydantic import BaseModel
+
+from agents.disk_cache import DiskCache
+from agents.prompt_budget import count_message_tokens, count_tokens
+from agents.rate_limiter import completion_estimate, is_rate_limiting_enabled, quota_limiter
+from agents.resilience import aread_stream, aresilient_call, read_stream, resilient_call
+from agents.tracing import current_span, span
+from agents.structured_output import (
+    IncrementalJSONParser, StructuredOutputError, function_tool, repair_messages,
+    schema_fingerprint, validate_output
+)
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 캐시 설정 (환경 변수로 기본값 지정)
+_cache_config = {
+    "enabled": os.getenv("LLM_CACHE", "1") != "0",
+    "path": os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite")),
+    "ttl_seconds": float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+    "max_entries": int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+    "max_bytes": int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+    "disabled_nodes": {n.strip() for n in os.getenv("LLM_CACHE_DISABLED_NODES", "").split(",") if n.strip()},
+}
+
+# 구조화 출력 설정 (함수 호출 + 스키마 검증, 끄면 정규식 JSON 추출 방식 사용)
+_structured_config = {
+    "enabled": os.getenv("LLM_STRUCTURED_OUTPUT", "1") != "0",
+    "stream": os.getenv("LLM_STRUCTURED_STREAM", "1") != "0",
+}
+_structured_stats: Dict[str, Dict[str, int]] = {}
+
+_cache: Optional[DiskCache] = None
+_cache_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+def configure_llm_cache(enabled: Optional[bool] = None, path: Optional[str] = None,
+                        ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None,
+                        max_bytes: Optional[int] = None, disabled_nodes: Optional[List[str]] = None):
+    """
+    LLM 응답 캐시 설정을 변경합니다. 생략한 항목은 기존 값을 유지합니다.
+
+    Args:
+        enabled: 캐시 전체 사용 여부
+        path: SQLite 캐시 파일 경로
+        ttl_seconds: 응답 보관 기간 (초)
+        max_entries: 최대 항목 수 (초과 시 LRU 제거)
+        max_bytes: 최대 저장 크기 (초과 시 LRU 제거)
+        disabled_nodes: 캐시를 사용하지 않을 노드 이름 목록
+    """
+    global _cache
+    with _cache_lock:
+        for key, value in (("enabled", enabled), ("path", path), ("ttl_seconds", ttl_seconds),
+                           ("max_entries", max_entries), ("max_bytes", max_bytes)):
+            if value is not None:
+                _cache_config[key] = value
+        if disabled_nodes is not None:
+            _cache_config["disabled_nodes"] = set(disabled_nodes)
+
+        # 저장소 설정이 바뀌었을 수 있으므로 다음 호출 때 다시 연다
+        if _cache is not None:
+            _cache.close()
+            _cache = None
+
+def configure_structured_output(enabled: Optional[bool] = None, stream: Optional[bool] = None):
+    """
+    구조화 출력 설정을 변경합니다. 생략한 항목은 기존 값을 유지합니다.
+
+    Args:
+        enabled: 함수 호출/스키마 검증 경로 사용 여부 (False면 기존 정규식 파싱)
+        stream: 응답을 스트리밍으로 받아 점진적으로 파싱할지 여부
+    """
+    if enabled is not None:
+        _structured_config["enabled"] = enabled
+    if stream is not None:
+        _structured_config["stream"] = stream
+
+def is_structured_output_enabled() -> bool:
+    return _structured_config["enabled"]
+
+def is_cache_enabled(node: Optional[str] = None) -> bool:
+    """해당 노드가 LLM 응답 캐시를 사용하는지 여부를 반환합니다."""
+    if not _cache_config["enabled"]:
+        return False
+    return node not in _cache_config["disabled_nodes"]
+
+def _get_cache() -> DiskCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(
+                _cache_config["path"],
+                ttl_seconds=_cache_config["ttl_seconds"],
+                max_entries=_cache_config["max_entries"],
+                max_bytes=_cache_config["max_bytes"],
+            )
+        return _cache
+
+def make_cache_key(model: str, messages: List[Dict[str, Any]], temperature: Optional[float] = None,
+                   max_tokens: Optional[int] = None, **extra) -> str:
+    """모델, 메시지, temperature, max_tokens로 요청 내용에 대한 해시 키를 만듭니다."""
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    payload.update(extra)
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _record(node: Optional[str], outcome: str):
+    with _stats_lock:
+        counters = _stats.setdefault(node or "default", {"hits": 0, "misses": 0, "bypassed": 0})
+        counters[outcome] += 1
+
+def _lookup(key: str, node: Optional[str], cache_enabled: bool) -> Optional[str]:
+    """캐시에서 응답을 찾아 반환하고 적중/실패 통계를 기록합니다."""
+    if not cache_enabled:
+        _record(node, "bypassed")
+        return None
+
+    try:
+        cached = _get_cache().get(key)
+    except Exception as e:
+        logger.warning(f"LLM 캐시 조회 중 오류 발생: {str(e)}")
+        cached = None
+    if cached is not None:
+        _record(node, "hits")
+        return json.loads(cached.decode("utf-8"))["content"]
+    _record(node, "misses")
+    return None
+
+def _store(key: str, content: Optional[str], cache_enabled: bool):
+    if cache_enabled and content is not None:
+        try:
+            _get_cache().set(key, json.dumps({"content": content}, ensure_ascii=False).encode("utf-8"))
+        except Exception as e:
+            logger.warning(f"LLM 캐시 저장 중 오류 발생: {str(e)}")
+
+def _tool_tokens(tools: Optional[List[Dict[str, Any]]], model: str) -> int:
+    """함수 호출 스키마도 입력 토큰으로 계산됨"""
+    return count_tokens(json.dumps(tools, ensure_ascii=False), model) if tools else 0
+
+def _record_tokens(llm_span, usage, messages: List[Dict[str, Any]], model: str, output_text: str,
+                   quota: Optional[Tuple[str, int]] = None, tools: Optional[List[Dict[str, Any]]] = None):
+    """
+    호출의 토큰 수를 스팬에 더하고, 호출 한도에 예약한 예상 토큰 수를 실제 사용량으로 정산합니다.
+    (응답에 usage가 없으면, 예: 스트리밍 구조 오류로 조기 중단, 토크나이저로 메시지 + 도구 스키마 토큰을 추정)
+    """
+    if usage is not None and getattr(usage, "prompt_tokens", None) is not None:
+        prompt_tokens, completion_tokens = usage.prompt_tokens, getattr(usage, "completion_tokens", 0) or 0
+        source = "api"
+    else:
+        prompt_tokens = count_message_tokens(messages, model) + _tool_tokens(tools, model)
+        completion_tokens = count_tokens(output_text or "", model)
+        source = "estimated"
+    if quota is not None and is_rate_limiting_enabled():
+        quota_limiter.reconcile(quota[0], quota[1], prompt_tokens + completion_tokens)
+    if llm_span is None:
+        return
+    llm_span.add("prompt_tokens", prompt_tokens)
+    llm_span.add("completion_tokens", completion_tokens)
+    llm_span.set(usage_source="api" if source == "api" else llm_span.attrs.get("usage_source") or source)
+
+def _quota(params: Dict[str, Any]) -> Tuple[str, int]:
+    """요청의 호출 한도 키와 예상 토큰 수 (입력 + 도구 스키마 + 최대 출력)"""
+    model = params["model"]
+    tokens = count_message_tokens(params["messages"], model) + _tool_tokens(params.get("tools"), model)
+    tokens += params.get("max_tokens") or completion_estimate()
+    return f"openai:{model}", tokens
+
+def _request_params(model: str, messages: List[Dict[str, Any]], temperature: Optional[float],
+                    max_tokens: Optional[int]) -> Dict[str, Any]:
+    params = {"model": model, "messages": messages}
+    if temperature is not None:
+        params["temperature"] = temperature
+    if max_tokens is not None:
+        params["max_tokens"] = max_tokens
+    return params
+
+def chat_completion(client, model: str, messages: List[Dict[str, Any]], temperature: Optional[float] = None,
+                    max_tokens: Optional[int] = None, node: Optional[str] = None,
+                    use_cache: Optional[bool] = None) -> str:
+    """
+    chat.completions 호출 공통 레이어 - 응답 텍스트를 반환합니다.
+
+    동일한 (model, messages, temperature, max_tokens) 요청은 디스크 캐시에서 바로 응답합니다.
+
+    Args:
+        client: OpenAI 클라이언트
+        model: 모델 이름
+        messages: 대화 메시지 목록
+        temperature: 샘플링 temperature
+        max_tokens: 최대 생성 토큰 수
+        node: 호출한 노드 이름 (노드별 캐시 사용 여부와 통계에 사용)
+        use_cache: 캐시 사용 여부를 강제로 지정 (None이면 노드 설정을 따름)
+    """
+    cache_enabled = is_cache_enabled(node) if use_cache is None else use_cache
+    key = make_cache_key(model, messages, temperature, max_tokens)
+
+    with span("openai.chat", kind="llm", node=node, model=model) as llm_span:
+        cached = _lookup(key, node, cache_enabled)
+        if cached is not None:
+            llm_span.set(cache_hit=True)
+            return cached
+
+        params = _request_params(model, messages, temperature, max_tokens)
+        quota = _quota(params)
+        response = resilient_call("openai", client.chat.completions.create, hedge=True, quota=quota, **params)
+        content = response.choices[0].message.content
+        _record_tokens(llm_span, getattr(response, "usage", None), messages, model, content, quota)
+
+    _store(key, content, cache_enabled)
+    return content
+
+async def achat_completion(client, model: str, messages: List[Dict[str, Any]], temperature: Optional[float] = None,
+                           max_tokens: Optional[int] = None, node: Optional[str] = None,
+                           use_cache: Optional[bool] = None) -> str:
+    """chat_completion의 비동기 버전 - AsyncOpenAI 클라이언트를 사용하며 같은 캐시를 공유합니다."""
+    cache_enabled = is_cache_enabled(node) if use_cache is None else use_cache
+    key = make_cache_key(model, messages, temperature, max_tokens)
+
+    with span("openai.chat", kind="llm", node=node, model=model) as llm_span:
+        cached = _lookup(key, node, cache_enabled)
+        if cached is not None:
+            llm_span.set(cache_hit=True)
+            return cached
+
+        params = _request_params(model, messages, temperature, max_tokens)
+        quota = _quota(params)
+        response = await aresilient_call("openai", client.chat.completions.create, hedge=True, quota=quota, **params)
+        content = response.choices[0].message.content
+        _record_tokens(llm_span, getattr(response, "usage", None), messages, model, content, quota)
+
+    _store(key, content, cache_enabled)
+    return content
+
+def _record_structured(node: Optional[str], outcome: str):
+    with _stats_lock:
+        counters = _structured_stats.setdefault(
+            node or "default", {"calls": 0, "early_aborts": 0, "repairs": 0, "repaired": 0, "failed": 0}
+        )
+        counters[outcome] += 1
+
+def _tool_request(model: str, messages: List[Dict[str, Any]], temperature: Optional[float],
+                  max_tokens: Optional[int], response_model: Type[BaseModel]) -> Dict[str, Any]:
+    """응답 모델의 스키마를 함수로 정의하고 그 함수를 반드시 호출하도록 요청 파라미터를 만듭니다."""
+    tool = function_tool(response_model)
+    params = _request_params(model, messages, temperature, max_tokens)
+    params["tools"] = [tool]
+    params["tool_choice"] = {"type": "function", "function": {"name": tool["function"]["name"]}}
+    return params
+
+def _message_text(message) -> str:
+    """함수 호출 인자(없으면 본문)를 반환합니다."""
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        return tool_calls[0].function.arguments or ""
+    return message.content or ""
+
+def _delta_text(chunk) -> str:
+    """스트리밍 조각에서 함수 호출 인자(없으면 본문) 조각을 꺼냅니다."""
+    if not chunk.choices:
+        return ""
+    delta = chunk.choices[0].delta
+    tool_calls = getattr(delta, "tool_calls", None)
+    if tool_calls:
+        return "".join(call.function.arguments or "" for call in tool_calls if call.function)
+    return delta.content or ""
+
+def _feed(parser: IncrementalJSONParser, pieces: List[str], text: str,
+          on_partial: Optional[Callable[[Dict[str, Any]], None]]) -> bool:
+    """조각 하나를 파서에 넣고, 계속 읽어야 하면 True를 반환합니다."""
+    pieces.append(text)
+    keep_reading = parser.feed(text)
+    if on_partial is not None and "," in text:
+        partial = parser.partial()
+        if partial is not None:
+            on_partial(partial)
+    return keep_reading
+
+def _check(parser: IncrementalJSONParser, response_model: Type[BaseModel], node: Optional[str]):
+    """(검증된 결과, 오류) 중 하나를 반환합니다."""
+    if parser.error:
+        _record_structured(node, "early_aborts")
+    try:
+        return response_model.model_validate(parser.result()), None
+    except ValueError as e:  # pydantic ValidationError도 ValueError
+        return None, e
+
+def structured_completion(client, model: str, messages: List[Dict[str, Any]], response_model: Type[BaseModel],
+                          temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                          node: Optional[str] = None, use_cache: Optional[bool] = None,
+                          on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> BaseModel:
+    """
+    pydantic 모델의 JSON 스키마를 함수 호출로 요청하고 검증된 모델 인스턴스를 반환합니다.
+
+    - 스트리밍 응답을 IncrementalJSONParser로 읽어, 구조가 깨지면 스트림을 바로 끊고
+      객체가 닫히면 남은 조각은 파싱하지 않고 실제 사용량이 담긴 마지막 usage 조각까지만 읽습니다.
+    - 검증에 실패하면 잘못된 응답과 오류만 담은 작은 복구 요청을 한 번 보냅니다.
+      그래도 실패하면 StructuredOutputError를 발생시킵니다.
+    - 검증된 결과만 캐시에 저장합니다.
+
+    Args:
+        response_model: 응답 스키마로 사용할 pydantic 모델
+        on_partial: 스트리밍 중 값이 하나씩 완성될 때마다 부분 결과로 호출할 콜백
+        (나머지 인자는 chat_completion과 같음)
+    """
+    cache_enabled = is_cache_enabled(node) if use_cache is None else use_cache
+    key = make_cache_key(model, messages, temperature, max_tokens, response_schema=schema_fingerprint(response_model))
+
+    with span("openai.chat", kind="llm", node=node, model=model, structured=True) as llm_span:
+        cached = _lookup(key, node, cache_enabled)
+        if cached is not None:
+            llm_span.set(cache_hit=True)
+            return validate_output(cached, response_model)
+
+        _record_structured(node, "calls")
+        params = _tool_request(model, messages, temperature, max_tokens, response_model)
+        quota = _quota(params)
+        parser = IncrementalJSONParser()
+        pieces: List[str] = []
+        usage = None
+
+        if _structured_config["stream"]:
+            stream = resilient_call("openai", client.chat.completions.create, stream=True,
+                                    stream_options={"include_usage": True}, quota=quota, **params)
+            try:
+                reading = True
+                for chunk in read_stream("openai", stream):
+                    usage = getattr(chunk, "usage", None) or usage
+                    if reading and not _feed(parser, pieces, _delta_text(chunk), on_partial):
+                        if parser.error:
+                            break  # 구조가 깨지면 바로 끊음 (토큰 수는 추정)
+                        # 객체가 닫혔으면 남은 조각은 파싱하지 않고 마지막 usage 조각까지만 읽음
+                        reading = False
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+        else:
+            response = resilient_call("openai", client.chat.completions.create, hedge=True, quota=quota, **params)
+            usage = getattr(response, "usage", None)
+            _feed(parser, pieces, _message_text(response.choices[0].message), on_partial)
+        _record_tokens(llm_span, usage, messages, model, "".join(pieces), quota, params["tools"])
+
+        result, error = _check(parser, response_model, node)
+        if error is not None:
+            llm_span.add("retries")
+            result = _repair(client, model, "".join(pieces), error, response_model, node)
+
+    _store(key, result.model_dump_json(), cache_enabled)
+    return result
+
+def _repair(client, model: str, raw_output: str, error: Exception, response_model: Type[BaseModel],
+            node: Optional[str]) -> BaseModel:
+    logger.warning(f"[{node}] 구조화 출력 검증 실패, 복구 요청: {str(error)[:200]}")
+    _record_structured(node, "repairs")
+    try:
+        messages = repair_messages(raw_output, error, response_model)
+        params = _tool_request(model, messages, 0, None, response_model)
+        quota = _quota(params)
+        response = resilient_call("openai", client.chat.completions.create, quota=quota, **params)
+        text = _message_text(response.choices[0].message)
+        _record_tokens(current_span(), getattr(response, "usage", None), messages, model, text, quota, params["tools"])
+        result = validate_output(text, response_model)
+    except Exception as e:
+        _record_structured(node, "failed")
+        raise StructuredOutputError(f"구조화 출력 복구 실패: {str(e)}", raw_output) from e
+    _record_structured(node, "repaired")
+    return result
+
+async def astructured_completion(client, model: str, messages: List[Dict[str, Any]], response_model: Type[BaseModel],
+                                 temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                                 node: Optional[str] = None, use_cache: Optional[bool] = None,
+                                 on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> BaseModel:
+    """structured_completion의 비동기 버전 - AsyncOpenAI 클라이언트를 사용합니다."""
+    cache_enabled = is_cache_enabled(node) if use_cache is None else use_cache
+    key = make_cache_key(model, messages, temperature, max_tokens, response_schema=schema_fingerprint(response_model))
+
+    with span("openai.chat", kind="llm", node=node, model=model, structured=True) as llm_span:
+        cached = _lookup(key, node, cache_enabled)
+        if cached is not None:
+            llm_span.set(cache_hit=True)
+            return validate_output(cached, response_model)
+
+        _record_structured(node, "calls")
+        params = _tool_request(model, messages, temperature, max_tokens, response_model)
+        quota = _quota(params)
+        parser = IncrementalJSONParser()
+        pieces: List[str] = []
+        usage = None
+
+        if _structured_config["stream"]:
+            stream = await aresilient_call("openai", client.chat.completions.create, stream=True,
+                                           stream_options={"include_usage": True}, quota=quota, **params)
+            try:
+                reading = True
+                async for chunk in aread_stream("openai", stream):
+                    usage = getattr(chunk, "usage", None) or usage
+                    if reading and not _feed(parser, pieces, _delta_text(chunk), on_partial):
+                        if parser.error:
+                            break  # 구조가 깨지면 바로 끊음 (토큰 수는 추정)
+                        # 객체가 닫혔으면 남은 조각은 파싱하지 않고 마지막 usage 조각까지만 읽음
+                        reading = False
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    await close()
+        else:
+            response = await aresilient_call("openai", client.chat.completions.create, hedge=True, quota=quota, **params)
+            usage = getattr(response, "usage", None)
+            _feed(parser, pieces, _message_text(response.choices[0].message), on_partial)
+        _record_tokens(llm_span, usage, messages, model, "".join(pieces), quota, params["tools"])
+
+        result, error = _check(parser, response_model, node)
+        if error is not None:
+            llm_span.add("retries")
+            result = await _arepair(client, model, "".join(pieces), error, response_model, node)
+
+    _store(key, result.model_dump_json(), cache_enabled)
+    return result
+
+async def _arepair(client, model: str, raw_output: str, error: Exception, response_model: Type[BaseModel],
+                   node: Optional[str]) -> BaseModel:
+    logger.warning(f"[{node}] 구조화 출력 검증 실패, 복구 요청: {str(error)[:200]}")
+    _record_structured(node, "repairs")
+    try:
+        messages = repair_messages(raw_output, error, response_model)
+        params = _tool_request(model, messages, 0, None, response_model)
+        quota = _quota(params)
+        response = await aresilient_call("openai", client.chat.completions.create, quota=quota, **params)
+        text = _message_text(response.choices[0].message)
+        _record_tokens(current_span(), getattr(response, "usage", None), messages, model, text, quota, params["tools"])
+        result = validate_output(text, response_model)
+    except Exception as e:
+        _record_structured(node, "failed")
+        raise StructuredOutputError(f"구조화 출력 복구 실패: {str(e)}", raw_output) from e
+    _record_structured(node, "repaired")
+    return result
+
+def json_completion(client, model: str, messages: List[Dict[str, Any]], response_model: Type[BaseModel],
+                    fallback_parser: Callable[[str], Dict[str, Any]], temperature: Optional[float] = None,
+                    max_tokens: Optional[int] = None, node: Optional[str] = None) -> Dict[str, Any]:
+    """
+    노드가 사용하는 JSON 응답 호출 - 구조화 출력이 켜져 있으면 structured_completion 결과를,
+    꺼져 있으면 chat_completion 응답을 fallback_parser로 파싱한 결과를 딕셔너리로 반환합니다.
+    """
+    if is_structured_output_enabled():
+        return structured_completion(client, model, messages, response_model, temperature=temperature,
+                                     max_tokens=max_tokens, node=node).model_dump()
+    raw_output = chat_completion(client, model, messages, temperature=temperature, max_tokens=max_tokens, node=node)
+    return fallback_parser(raw_output)
+
+async def ajson_completion(client, model: str, messages: List[Dict[str, Any]], response_model: Type[BaseModel],
+                           fallback_parser: Callable[[str], Dict[str, Any]], temperature: Optional[float] = None,
+                           max_tokens: Optional[int] = None, node: Optional[str] = None) -> Dict[str, Any]:
+    """json_completion의 비동기 버전"""
+    if is_structured_output_enabled():
+        result = await astructured_completion(client, model, messages, response_model, temperature=temperature,
+                                              max_tokens=max_tokens, node=node)
+        return result.model_dump()
+    raw_output = await achat_completion(client, model, messages, temperature=temperature,
+                                        max_tokens=max_tokens, node=node)
+    return fallback_parser(raw_output)
+
+def get_structured_output_stats() -> Dict[str, Any]:
+    """노드별 구조화 출력 호출/조기 중단/복구 시도/복구 성공/실패 횟수를 반환합니다."""
+    with _stats_lock:
+        per_node = {node: dict(counters) for node, counters in _structured_stats.items()}
+    totals = {name: sum(c[name] for c in per_node.values())
+              for name in ("calls", "early_aborts", "repairs", "repaired", "failed")}
+    totals["nodes"] = per_node
+    return totals
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    """노드별 캐시 적중/실패 횟수와 전체 합계를 반환합니다."""
+    with _stats_lock:
+        per_node = {node: dict(counters) for node, counters in _stats.items()}
+
+    hits = sum(c["hits"] for c in per_node.values())
+    misses = sum(c["misses"] for c in per_node.values())
+    return {
+        "hits": hits,
+        "misses": misses,
+        "bypassed": sum(c["bypassed"] for c in per_node.values()),
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "nodes": per_node,
+    }
+
+def reset_llm_cache_stats():
+    """캐시 통계를 초기화합니다."""
+    with _stats_lock:
+        _stats.clear()
+        _structured_stats.clear()
@@ -0,0 +1,334 @@
+import os
+import json
+import math
+import logging
+import argparse
+import threading
+from typing import Dict, Any, List, Optional, Iterable
+
+import numpy as np
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 로컬 점수 모델 입력 (시장성 점수 5개 + 경쟁력 점수, 모두 0-10점)
+FEATURES = [
+    "market_size",
+    "problem_fit",
+    "willingness_to_pay",
+    "revenue_model_clarity",
+    "upside_potential",
+    "competitive_score",
+]
+FEATURE_LABELS = {
+    "market_size": "시장 크기",
+    "problem_fit": "문제 적합성",
+    "willingness_to_pay": "지불 의사",
+    "revenue_model_clarity": "수익 모델 명확성",
+    "upside_potential": "성장 가능성",
+    "competitive_score": "경쟁력",
+}
+
+# 보정 전 기본 가중치 (가중 평균 × 10 = 0-100점)
+DEFAULT_WEIGHTS = {
+    "market_size": 0.15,
+    "problem_fit": 0.20,
+    "willingness_to_pay": 0.15,
+    "revenue_model_clarity": 0.15,
+    "upside_potential": 0.15,
+    "competitive_score": 0.20,
+}
+
+# 로컬 판단 설정 (configure_local_scoring 또는 환경 변수로 변경)
+_scorer_config = {
+    "enabled": os.getenv("LOCAL_SCORING", "1") != "0",
+    "band": float(os.getenv("LOCAL_SCORING_BAND", "10")),           # 기준점 ± band 이내면 LLM 호출
+    "threshold": float(os.getenv("LOCAL_SCORING_THRESHOLD")) if os.getenv("LOCAL_SCORING_THRESHOLD") else None,
+    "require_reasoning": os.getenv("JUDGE_REASONING", "0") == "1",  # 항상 LLM 판단 근거가 필요한지
+    "model_path": os.getenv("LOCAL_SCORER_PATH"),                   # 보정된 모델 파일
+}
+_model = None
+_model_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"fast_path": 0, "borderline": 0, "reasoning_requested": 0, "disabled": 0, "insufficient_data": 0}
+
+# 이전 버전 분석 노드가 실패 시 5점 기본값과 함께 남기던 평가 이유 (이전 실행 결과/체크포인트 판별용)
+_FALLBACK_REASONINGS = ("분석 중 오류", "정보 부족으로 평균 점수 부여", "경쟁사 분석 중 오류", "경쟁사 분석 결과를 파싱할 수 없습니다")
+
+class LocalScoringModel:
+    """
+    투자 판단 로컬 점수 모델.
+
+    - weighted: 0-10점 입력의 가중 평균 × 10 (기본 가중치, 보정 불필요)
+    - logistic: 과거 LLM 판단으로 보정한 로지스틱 회귀, 통과 확률 × 100
+
+    점수가 threshold 이상이면 '통과', 미만이면 '불통과'입니다.
+    """
+
+    def __init__(self, weights: Dict[str, float], bias: float = 0.0, threshold: float = 60.0,
+                 kind: str = "weighted", samples: int = 0):
+        self.weights = {name: float(weights.get(name, 0.0)) for name in FEATURES}
+        self.bias = float(bias)
+        self.threshold = float(threshold)
+        self.kind = kind
+        self.samples = samples
+
+    def score(self, features: Dict[str, float]) -> float:
+        """0-100점 투자 적합성 점수"""
+        if self.kind == "logistic":
+            z = self.bias + sum(self.weights[name] * features[name] / 10.0 for name in FEATURES)
+            return 100.0 / (1.0 + math.exp(-z))
+        total_weight = sum(self.weights.values()) or 1.0
+        return 10.0 * sum(self.weights[name] * features[name] for name in FEATURES) / total_weight
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "weights": self.weights,
+            "bias": self.bias,
+            "threshold": self.threshold,
+            "samples": self.samples,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LocalScoringModel":
+        return cls(
+            weights=data["weights"],
+            bias=data.get("bias", 0.0),
+            threshold=data.get("threshold", 60.0),
+            kind=data.get("kind", "weighted"),
+            samples=data.get("samples", 0),
+        )
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalScoringModel":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+def configure_local_scoring(enabled: Optional[bool] = None, band: Optional[float] = None,
+                            threshold: Optional[float] = None, require_reasoning: Optional[bool] = None,
+                            model_path: Optional[str] = None):
+    """
+    로컬 점수 판단 설정을 변경합니다. 생략한 항목은 기존 값을 유지합니다.
+
+    Args:
+        enabled: 로컬 판단 사용 여부 (False면 항상 LLM 호출)
+        band: 불확실 구간 반폭 - |점수 - 기준점| <= band 이면 LLM 호출
+        threshold: 통과 기준점 (None이면 모델에 저장된 값)
+        require_reasoning: True면 판단 근거를 위해 항상 LLM 호출
+        model_path: 보정된 모델 JSON 경로
+    """
+    global _model
+    for key, value in (("enabled", enabled), ("band", band), ("threshold", threshold),
+                       ("require_reasoning", require_reasoning)):
+        if value is not None:
+            _scorer_config[key] = value
+    if model_path is not None:
+        with _model_lock:
+            _scorer_config["model_path"] = model_path
+            _model = None
+
+def get_model() -> LocalScoringModel:
+    """현재 점수 모델 (보정 파일이 있으면 로드, 없으면 기본 가중치)"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            path = _scorer_config["model_path"]
+            if path and os.path.exists(path):
+                _model = LocalScoringModel.load(path)
+                logger.info(f"보정된 로컬 점수 모델 로드: {path} ({_model.kind}, 표본 {_model.samples}개)")
+            else:
+                if path:
+                    logger.warning(f"로컬 점수 모델 파일이 없어 기본 가중치를 사용합니다: {path}")
+                _model = LocalScoringModel(DEFAULT_WEIGHTS)
+        return _model
+
+def _score_value(value: Any, default: float = 5.0) -> float:
+    if isinstance(value, dict):
+        value = value.get("score", default)
+    try:
+        return min(max(float(value), 0.0), 10.0)
+    except (TypeError, ValueError):
+        return default
+
+def extract_features(market_analysis: Dict[str, Any]) -> Dict[str, float]:
+    """market_analysis에서 모델 입력 점수를 꺼냅니다. (없는 항목은 프롬프트와 같이 5점)"""
+    market_scores = market_analysis.get("market_scores", {}) or {}
+    features = {name: _score_value(market_scores.get(name)) for name in FEATURES[:-1]}
+    features["competitive_score"] = _score_value(market_analysis.get("competitive_score"))
+    return features
+
+def _is_fallback(value: Any) -> bool:
+    return isinstance(value, dict) and str(value.get("reasoning", "")).startswith(_FALLBACK_REASONINGS)
+
+def missing_features(market_analysis: Dict[str, Any]) -> List[str]:
+    """
+    분석 실패나 누락으로 실제 점수가 없는 입력 항목을 반환합니다.
+
+    분석 노드가 실패를 표시했거나(analysis_failed, "<노드>_error"), 점수가 없거나,
+    오류 시 채운 기본값이면 해당 항목을 누락으로 봅니다.
+    """
+    market_scores = market_analysis.get("market_scores", {}) or {}
+    market_failed = bool(market_analysis.get("market_research_error"))
+    missing = [name for name in FEATURES[:-1]
+               if market_failed or market_scores.get(name) is None or _is_fallback(market_scores.get(name))]
+    if (market_analysis.get("competitor_analysis_error") or market_analysis.get("competitive_score") is None
+            or str(market_analysis.get("competitive_reasoning", "")).startswith(_FALLBACK_REASONINGS)):
+        missing.append("competitive_score")
+    if market_analysis.get("analysis_failed") and not missing:
+        missing = list(FEATURES)
+    return missing
+
+def _record(outcome: str):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+def _reasoning(features: Dict[str, float], score: float, threshold: float, judgement: str) -> str:
+    """로컬 판단의 근거 문장 (가장 높은/낮은 항목 요약)"""
+    ranked = sorted(FEATURES, key=lambda name: features[name], reverse=True)
+    strengths = [n for n in ranked if features[n] >= 7][:2]
+    weaknesses = [n for n in reversed(ranked) if features[n] <= 4][:2]
+    text = f"로컬 점수 모델 판단: 종합 {score:.0f}점 (기준 {threshold:.0f}점)으로 '{judgement}'."
+    if strengths:
+        text += " 강점: " + ", ".join(f"{FEATURE_LABELS[n]} {features[n]:g}점" for n in strengths) + "."
+    if weaknesses:
+        text += " 약점: " + ", ".join(f"{FEATURE_LABELS[n]} {features[n]:g}점" for n in weaknesses) + "."
+    return text
+
+def local_decision(market_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    로컬 점수 모델로 투자 판단을 시도합니다.
+
+    Returns:
+        fast_path: 로컬 판단으로 충분한지 여부 (False면 LLM 호출 필요)
+        recommendation: fast_path일 때의 투자 판단 (judgement/reasoning/score/decision_source)
+        local_score: 로컬 점수 (0-100)
+        reason: LLM 호출이 필요한 이유 (insufficient_data/borderline/reasoning_requested/disabled)
+        missing_features: insufficient_data일 때 점수가 없는 입력 항목
+    """
+    # 분석 실패로 점수가 빠진 경우 기본값(5점)으로 채운 점수로 확신 있는 판단을 내리지 않음
+    missing = missing_features(market_analysis)
+    if missing:
+        _record("insufficient_data")
+        return {"fast_path": False, "local_score": None, "reason": "insufficient_data", "missing_features": missing}
+
+    model = get_model()
+    features = extract_features(market_analysis)
+    score = model.score(features)
+    threshold = _scorer_config["threshold"] if _scorer_config["threshold"] is not None else model.threshold
+    decision = {"fast_path": False, "local_score": round(score, 1), "reason": None}
+
+    if not _scorer_config["enabled"]:
+        decision["reason"] = "disabled"
+    elif _scorer_config["require_reasoning"]:
+        decision["reason"] = "reasoning_requested"
+    elif abs(score - threshold) <= _scorer_config["band"]:
+        decision["reason"] = "borderline"
+    else:
+        judgement = "통과" if score >= threshold else "불통과"
+        decision["fast_path"] = True
+        decision["recommendation"] = {
+            "judgement": judgement,
+            "reasoning": _reasoning(features, score, threshold, judgement),
+            "score": int(round(score)),
+            "decision_source": "local",
+        }
+
+    _record("fast_path" if decision["fast_path"] else decision["reason"])
+    return decision
+
+def get_local_scoring_stats() -> Dict[str, Any]:
+    """로컬 판단(fast path)과 LLM 호출 횟수, fast path 비율을 반환합니다."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    stats["total"] = total
+    stats["fast_path_rate"] = round(stats["fast_path"] / total, 3) if total else 0.0
+    return stats
+
+def reset_local_scoring_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+def load_training_records(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    배치 결과 JSONL(main.py --output)에서 LLM이 내린 판단만 학습 데이터로 꺼냅니다.
+
+    로컬 판단 결과는 모델 자신의 출력이므로 제외합니다.
+    """
+    samples = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                result = record.get("result") or record
+                recommendation = result.get("investment_recommendation") or {}
+                market_analysis = result.get("market_analysis") or {}
+                if recommendation.get("judgement") not in ("통과", "불통과") or not market_analysis:
+                    continue
+                if recommendation.get("decision_source") == "local":
+                    continue
+                # 데이터 부족/오류로 인한 기본 판단과 분석 실패로 점수가 빠진 입력은 제외
+                if "score" not in recommendation or str(recommendation.get("reasoning", "")).startswith("평가 중 오류"):
+                    continue
+                if missing_features(market_analysis):
+                    continue
+                samples.append({
+                    "features": extract_features(market_analysis),
+                    "label": 1 if recommendation["judgement"] == "통과" else 0,
+                })
+    return samples
+
+def calibrate(samples: List[Dict[str, Any]], l2: float = 0.1, epochs: int = 2000,
+              learning_rate: float = 0.5) -> LocalScoringModel:
+    """
+    과거 판단으로 로지스틱 회귀 모델을 보정합니다. (경사 하강법, L2 정규화)
+
+    Args:
+        samples: load_training_records()의 {"features", "label"} 목록
+        l2: 가중치 L2 정규화 계수 (표본이 적을 때 과적합 방지)
+    """
+    labels = np.asarray([s["label"] for s in samples], dtype=np.float64)
+    if len(samples) < 2 or labels.min() == labels.max():
+        raise ValueError("보정에는 '통과'와 '불통과' 판단이 모두 포함된 과거 실행 결과가 필요합니다.")
+
+    x = np.asarray([[s["features"][name] / 10.0 for name in FEATURES] for s in samples], dtype=np.float64)
+    weights = np.zeros(x.shape[1])
+    bias = 0.0
+    for _ in range(epochs):
+        p = 1.0 / (1.0 + np.exp(-(x.dot(weights) + bias)))
+        error = p - labels
+        weights -= learning_rate * (x.T.dot(error) / len(samples) + l2 * weights)
+        bias -= learning_rate * error.mean()
+
+    p = 1.0 / (1.0 + np.exp(-(x.dot(weights) + bias)))
+    accuracy = float(((p >= 0.5) == (labels == 1)).mean())
+    logger.info(f"로컬 점수 모델 보정 완료: 표본 {len(samples)}개, 학습 정확도 {accuracy:.1%}")
+    return LocalScoringModel(dict(zip(FEATURES, weights.tolist())), bias=bias, threshold=50.0,
+                             kind="logistic", samples=len(samples))
+
+# 과거 배치 결과로 보정하는 CLI
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="과거 실행 결과로 투자 판단 로컬 점수 모델 보정")
+    parser.add_argument("inputs", nargs="+", help="배치 결과 JSONL 파일 (main.py --output)")
+    parser.add_argument("--out", type=str, default=os.path.join("data", "local_scorer.json"), help="모델 저장 경로")
+    parser.add_argument("--l2", type=float, default=0.1, help="L2 정규화 계수")
+    args = parser.parse_args()
+
+    training = load_training_records(args.inputs)
+    model = calibrate(training, l2=args.l2)
+    model.save(args.out)
+    print(json.dumps(model.to_dict(), ensure_ascii=False, indent=2))
@@ -1,38 +1,47 @@
-import os
 import json
 import re
-from langchain.utils import TavilyClient
-from openai import OpenAI
-from state_definitions import InvestmentState  # 중앙 집중식 상태 모듈 임포트
+import asyncio
+import logging
+from typing import Dict, Any, List
+from agents.clients import get_async_openai_client, get_openai_client
+from agents.llm_client import json_completion, ajson_completion
+from agents.search_client import get_search_client
+from agents.prompt_budget import compact_documents, get_prompt_budget, usage_record, record_usage
+from state_definitions import InvestmentState, MarketResearchOutput  # 중앙 집중식 상태 모듈 임포트
 
-# API 설정
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# 로깅 설정
+logger = logging.getLogger(__name__)
 
-# 클라이언트 초기화
-tavily = TavilyClient(api_key=TAVILY_API_KEY)
-client = OpenAI(api_key=OPENAI_API_KEY)
+# OpenAI 클라이언트 (첫 호출 시 공유 레지스트리에서 가져옴, Tavily 검색은 캐시된 공유 클라이언트 사용)
+client = None
+async_client = None
 
-def market_research(state: InvestmentState) -> InvestmentState:
-    """
-    시장 연구 에이전트 - 스타트업 도메인의 시장 규모 및 잠재력을 분석합니다.
-    """
+def _get_client():
+    global client
+    if client is None:
+        client = get_openai_client()
+    return client
+
+def _get_async_client():
+    global async_client
+    if async_client is None:
+        async_client = get_async_openai_client()
+    return async_client
+
+# 시장 분석 모델 설정
+MODEL = "gpt-3.5-turbo-0125"  # 최신 모델 사용
+TEMPERATURE = 0.3
+
+def _build_search_query(state: InvestmentState):
+    """상태에서 도메인/스타트업 이름을 꺼내 Tavily 검색어를 만듭니다."""
     # 스타트업 정보 추출 (이전 에이전트에서 설정한 값)
     domain = state.get("startup_info", {}).get("domain", "헬스케어")
     startup_name = state.get("startup_info", {}).get("name", "")
-    
-    # 1. Tavily 웹 검색
     query = f"{domain} 시장 규모 성장률 트렌드 수익 모델 {startup_name}"
-    try:
-        result = tavily.search(query=query, search_depth="advanced")
-        documents = result.get("results", [])[:3]  # 상위 3개 문서만 가져옴
-        market_text = "\n\n".join([f"{doc['title']}\n{doc['content']}" for doc in documents])
-    except Exception as e:
-        print(f"시장 정보 검색 중 오류 발생: {str(e)}")
-        market_text = f"시장 정보를 가져오지 못했습니다. 오류: {str(e)}"
-        documents = []
-    
-    # 2. GPT 프롬프트 구성
+    return domain, startup_name, query
+
+def _build_messages(domain: str, startup_name: str, market_text: str) -> List[Dict[str, str]]:
+    """GPT 프롬프트 구성"""
     system_prompt = (
         "당신은 스타트업 투자 평가 전문가입니다. 아래 시장 관련 정보를 바탕으로 5가지 항목을 0~10점으로 평가하고 평가 이유를 함께 설명하세요.\n"
         f"대상 도메인: {domain}\n"
@@ -52,106 +61,153 @@ def market_research(state: InvestmentState) -> InvestmentState:
     )
     
     user_prompt = f"시장 분석을 위한 정보:\n{market_text}"
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+def _parse_output(raw_output: str) -> Dict[str, Any]:
+    """GPT 응답에서 JSON을 추출합니다. JSON 형식이 아니면 ValueError를 발생시킵니다."""
+    # JSON 형식 추출 (정규식 사용)
+    json_match = re.search(r"\{[\s\S]*\}", raw_output)
+    if json_match:
+        json_str = json_match.group(0)
+        return json.loads(json_str)
+    # JSON 형식이 아니면 점수를 지어내지 않고 분석 실패로 처리
+    raise ValueError("시장 분석 응답에서 JSON을 찾을 수 없습니다: " + raw_output[:100])
+
+def _market_documents(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """참조 문서에서 보고서에 필요한 필드만 남깁니다."""
+    return [
+        {"title": doc.get("title", ""), "url": doc.get("url", ""), "content": doc.get("content", "")}
+        for doc in documents
+    ]
+
+def _node_update(state: InvestmentState, analysis: Dict[str, Any], status: str) -> Dict[str, Any]:
+    """
+    이 노드가 담당하는 키만 돌려줍니다.
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo-0125",  # 최신 모델 사용
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.3,
-        )
-        
-        # 3. JSON 파싱
-        raw_output = response.choices[0].message.content
-        
-        # JSON 형식 추출 (정규식 사용)
-        json_match = re.search(r"\{[\s\S]*\}", raw_output)
-        if json_match:
-            json_str = json_match.group(0)
-            parsed = json.loads(json_str)
-        else:
-            # JSON 형식이 아닌 경우 기본값 설정
-            parsed = {
-                "market_size": {"score": 5, "reasoning": "정보 부족으로 평균 점수 부여"},
-                "problem_fit": {"score": 5, "reasoning": "정보 부족으로 평균 점수 부여"},
-                "willingness_to_pay": {"score": 5, "reasoning": "정보 부족으로 평균 점수 부여"},
-                "revenue_model_clarity": {"score": 5, "reasoning": "정보 부족으로 평균 점수 부여"},
-                "upside_potential": {"score": 5, "reasoning": "정보 부족으로 평균 점수 부여"},
-                "market_size_estimate": "정보 부족",
-                "growth_rate_estimate": "정보 부족",
-                "key_trends": ["정보 부족"],
-                "regulatory_concerns": ["정보 부족"]
-            }
-            
-    except Exception as e:
-        print(f"시장 분석 중 오류 발생: {str(e)}")
-        # 오류 발생 시 기본값 설정
-        parsed = {
-            "market_size": {"score": 5, "reasoning": f"분석 중 오류: {str(e)}"},
-            "problem_fit": {"score": 5, "reasoning": f"분석 중 오류: {str(e)}"},
-            "willingness_to_pay": {"score": 5, "reasoning": f"분석 중 오류: {str(e)}"},
-            "revenue_model_clarity": {"score": 5, "reasoning": f"분석 중 오류: {str(e)}"},
-            "upside_potential": {"score": 5, "reasoning": f"분석 중 오류: {str(e)}"},
-            "market_size_estimate": "분석 중 오류",
-            "growth_rate_estimate": "분석 중 오류",
-            "key_trends": ["분석 중 오류"],
-            "regulatory_concerns": ["분석 중 오류"]
-        }
-    
-    # 4. 시장 분석 데이터 생성
+    경쟁사 분석과 같은 단계에서 병렬로 실행되므로, 상태 전체를 돌려주면 이 노드가 받은
+    예전 값(빈 경쟁사 목록 등)이 경쟁사 분석 결과를 덮어씁니다. market_analysis는 키 단위로 합쳐집니다.
+    """
+    return {"market_analysis": analysis, "token_usage": state.get("token_usage", {}), "status": status}
+
+def _apply_result(state: InvestmentState, parsed: Dict[str, Any], documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """파싱된 평가 결과와 참조 문서로 상태 업데이트를 만듭니다."""
+    # 4. 시장 분석 데이터 생성 (응답에 없는 항목은 점수를 지어내지 않고 제외)
     market_scores = {
-        "market_size": parsed.get("market_size", {"score": 5, "reasoning": ""}),
-        "problem_fit": parsed.get("problem_fit", {"score": 5, "reasoning": ""}),
-        "willingness_to_pay": parsed.get("willingness_to_pay", {"score": 5, "reasoning": ""}),
-        "revenue_model_clarity": parsed.get("revenue_model_clarity", {"score": 5, "reasoning": ""}),
-        "upside_potential": parsed.get("upside_potential", {"score": 5, "reasoning": ""})
+        name: parsed[name]
+        for name in ("market_size", "problem_fit", "willingness_to_pay", "revenue_model_clarity", "upside_potential")
+        if parsed.get(name)
     }
     
     # 5. 참조 문서 저장
-    market_documents = []
-    for doc in documents:
-        market_documents.append({
-            "title": doc.get("title", ""),
-            "url": doc.get("url", ""),
-            "content": doc.get("content", "")
-        })
-    
-    # 6. 시장 분석 상태 업데이트
-    if "market_analysis" not in state:
-        state["market_analysis"] = {}
+    market_documents = _market_documents(documents)
     
-    state["market_analysis"].update({
+    # 6. 시장 분석 결과
+    analysis = {
         "market_scores": market_scores,
         "market_documents": market_documents,
         "market_size_estimate": parsed.get("market_size_estimate", "정보 없음"),
         "growth_rate_estimate": parsed.get("growth_rate_estimate", "정보 없음"),
         "key_trends": parsed.get("key_trends", []),
         "regulatory_concerns": parsed.get("regulatory_concerns", [])
-    })
+    }
     
     # 평균 시장 점수 계산 (투자 결정에 활용)
-    scores_only = [item.get("score", 5) for item in market_scores.values()]
-    state["market_analysis"]["average_market_score"] = sum(scores_only) / len(scores_only)
+    scores_only = [item["score"] for item in market_scores.values() if item.get("score") is not None]
+    if scores_only:
+        analysis["average_market_score"] = sum(scores_only) / len(scores_only)
     
     # 7. 상태 업데이트
-    state["status"] = "market_research_completed"
+    return _node_update(state, analysis, "market_research_completed")
+
+def _apply_failure(state: InvestmentState, error: Exception, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    재시도/서킷 브레이커/구조화 출력 복구가 모두 실패한 경우 - 기본 점수를 채우지 않고
+    실패 표시(analysis_failed)와 노드 오류 상태를 남겨 투자 판단과 이어서 실행이 알 수 있게 합니다.
+    """
+    logger.error(f"시장 분석 중 오류 발생: {str(error)}")
+    analysis = {
+        "analysis_failed": True,
+        "market_research_error": str(error),
+        "market_documents": _market_documents(documents),
+    }
+    return _node_update(state, analysis, "market_research_error")
+
+def market_research(state: InvestmentState) -> Dict[str, Any]:
+    """
+    시장 연구 에이전트 - 스타트업 도메인의 시장 규모 및 잠재력을 분석합니다.
+    
+    상태 전체가 아니라 이 노드가 담당하는 키(market_analysis, token_usage, status)만 반환합니다.
+    """
+    domain, startup_name, query = _build_search_query(state)
+    
+    # 1. Tavily 웹 검색
+    try:
+        result = get_search_client().search(query=query, domain=domain, search_depth="advanced")
+        documents = result.get("results", [])[:3]  # 상위 3개 문서만 가져옴
+        # 토큰 예산 안에서 쿼리와 관련된 문장만 남김
+        market_text, compaction = compact_documents(documents, query, get_prompt_budget("market_research"), MODEL)
+    except Exception as e:
+        logger.error(f"시장 정보 검색 중 오류 발생: {str(e)}")
+        market_text = f"시장 정보를 가져오지 못했습니다. 오류: {str(e)}"
+        documents, compaction = [], None
+    
+    # 2. GPT 호출 및 3. JSON 파싱
+    messages = _build_messages(domain, startup_name, market_text)
+    record_usage(state, "market_research", usage_record(messages, MODEL, compaction))
+    try:
+        parsed = json_completion(
+            _get_client(),
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            response_model=MarketResearchOutput,
+            fallback_parser=_parse_output,
+            node="market_research",
+        )
+    except Exception as e:
+        return _apply_failure(state, e, documents)
     
-    return state
+    return _apply_result(state, parsed, documents)
 
-# 랭그래프 노드 생성 함수 - 메인에서 임포트할 때 사용
-def create_market_research_agent():
-    from langgraph.graph import StateGraph
+async def market_research_async(state: InvestmentState) -> Dict[str, Any]:
+    """
+    market_research의 비동기 버전 - AsyncOpenAI와 비동기 Tavily 검색을 사용합니다.
+    """
+    domain, startup_name, query = _build_search_query(state)
     
-    graph = StateGraph(InvestmentState)
-    graph.add_node("market_research", market_research)
+    # 1. Tavily 웹 검색
+    try:
+        result = await get_search_client().asearch(query=query, domain=domain, search_depth="advanced")
+        documents = result.get("results", [])[:3]  # 상위 3개 문서만 가져옴
+        # 문장 임베딩은 CPU 작업이므로 스레드에서 실행
+        market_text, compaction = await asyncio.to_thread(
+            compact_documents, documents, query, get_prompt_budget("market_research"), MODEL
+        )
+    except Exception as e:
+        logger.error(f"시장 정보 검색 중 오류 발생: {str(e)}")
+        market_text = f"시장 정보를 가져오지 못했습니다. 오류: {str(e)}"
+        documents, compaction = [], None
     
-    # 시작점과 종료점이 같은 단일 노드 그래프
-    graph.set_entry_point("market_research")
-    graph.set_finish_point("market_research")
+    # 2. GPT 호출 및 3. JSON 파싱
+    messages = _build_messages(domain, startup_name, market_text)
+    record_usage(state, "market_research", usage_record(messages, MODEL, compaction))
+    try:
+        parsed = await ajson_completion(
+            _get_async_client(),
+            model=MODEL,
+            messages=messages,
+            temperature=TEMPERATURE,
+            response_model=MarketResearchOutput,
+            fallback_parser=_parse_output,
+            node="market_research",
+        )
+    except Exception as e:
+        return _apply_failure(state, e, documents)
     
-    return graph.compile()
+    return _apply_result(state, parsed, documents)
 
 # 단독 실행 테스트용
 if __name__ == "__main__":
@@ -1,17 +1,30 @@
 import os
+import re
+import json
 import logging
-from typing import Dict, Any
-import markdown2
-from weasyprint import HTML
-from langgraph.graph import StateGraph
+import argparse
+import datetime
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Iterable
 
 # state_definitions.py에서 정의한 상태 가져오기
 from state_definitions import InvestmentState
+from agents.pdf_renderer import make_report_path, submit_render, wait_for_report
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 보고서 설정 (configure_reports로 변경)
+report_config = {
+    "individual_pdf": os.getenv("INDIVIDUAL_PDF", "1") != "0",  # 평가마다 개별 PDF를 만들지 여부
+}
+
+def configure_reports(individual_pdf: Optional[bool] = None):
+    """보고서 설정을 변경합니다. 생략한 항목은 기존 값을 유지합니다."""
+    if individual_pdf is not None:
+        report_config["individual_pdf"] = individual_pdf
+
 def generate_markdown_from_state(state: Dict[str, Any]) -> str:
     """
     상태 정보를 기반으로 마크다운 보고서 콘텐츠를 생성합니다.
@@ -62,9 +75,9 @@ def generate_markdown_from_state(state: Dict[str, Any]) -> str:
     # 시장 점수 테이블 채우기
     for key, data in market_scores.items():
         if isinstance(data, dict):
-            score = data.get("score", "-")
-            reasoning = data.get("reasoning", "정보 없음")
-            markdown_content += f"| {key.replace('_', ' ').title()} | {score} | {reasoning} |\n"
+            item_score = data.get("score", "-")
+            item_reasoning = data.get("reasoning", "정보 없음")
+            markdown_content += f"| {key.replace('_', ' ').title()} | {item_score} | {item_reasoning} |\n"
     
     # 주요 트렌드 추가
     markdown_content += "\n### 주요 트렌드\n\n"
@@ -108,92 +121,166 @@ def generate_markdown_from_state(state: Dict[str, Any]) -> str:
     
     return markdown_content
 
-def pdf_generation(state: InvestmentState, output_path: str = "investment_report.pdf") -> InvestmentState:
+def markdown_to_html(markdown_content: str) -> str:
+    """마크다운 보고서를 HTML 본문으로 변환합니다. (스타일은 렌더링 워커가 공통 CSS로 적용)"""
+    # 변환 라이브러리는 처음 보고서를 만들 때 임포트 (임포트 비용이 큼)
+    import markdown2
+    
+    return markdown2.markdown(
+        markdown_content,
+        extras=["tables", "fenced-code-blocks"]
+    )
+
+def pdf_generation(state: InvestmentState, output_path: Optional[str] = None) -> InvestmentState:
     """
-    상태 정보를 기반으로 투자 평가 PDF 보고서를 생성합니다.
+    상태 정보를 기반으로 투자 평가 PDF 보고서 렌더링을 시작합니다.
+    
+    WeasyPrint 렌더링은 미리 띄워 둔 워커 풀에서 진행되고, 이 노드는 바로 반환합니다.
+    report_data의 pdf_path는 실행별 고유 경로(REPORT_OUTPUT_DIR 아래)이며,
+    pdf_status가 "rendering"인 동안은 wait_for_report()/await_report()로 완료를 기다릴 수 있습니다.
     """
+    report_data = dict(state.get("report_data") or {})
     try:
         # 1. Markdown 생성
         markdown_content = generate_markdown_from_state(state)
+        report_data["markdown_content"] = markdown_content
         
-        # 2. Markdown → HTML로 변환
-        html_content = markdown2.markdown(
-            markdown_content,
-            extras=["tables", "fenced-code-blocks"]
-        )
+        # 개별 PDF를 만들지 않는 경우 (포트폴리오 보고서만 생성) 마크다운만 남김
+        if not report_config["individual_pdf"]:
+            report_data["pdf_path"] = ""
+            report_data["pdf_status"] = "skipped"
+            state["report_data"] = report_data
+            state["status"] = "pdf_generation_completed"
+            return state
         
-        # HTML 스타일 추가
-        styled_html = f"""
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; margin: 40px; }}
-                h1 {{ color: #2c3e50; border-bottom: 2px solid #eee; padding-bottom: 10px; }}
-                h2 {{ color: #3498db; margin-top: 30px; }}
-                h3 {{ color: #2980b9; }}
-                table {{ border-collapse: collapse; width: 100%; margin: 20px 0; }}
-                th, td {{ padding: 12px; text-align: left; border: 1px solid #ddd; }}
-                th {{ background-color: #f2f2f2; }}
-                .highlight {{ background-color: #ffffcc; padding: 2px 5px; }}
-                .judgement {{ font-weight: bold; font-size: 18px; margin: 20px 0; }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
+        # 2. Markdown → HTML로 변환
+        html_body = markdown_to_html(markdown_content)
         
-        # 3. HTML → PDF로 변환
+        # 3. HTML → PDF 렌더링을 워커에 맡김
         try:
-            HTML(string=styled_html).write_pdf(output_path)
-            report_path = os.path.abspath(output_path)
-            logger.info(f"PDF 보고서 생성 완료: {report_path}")
+            startup_name = state.get("startup_info", {}).get("name", "")
+            report_path = os.path.abspath(output_path or make_report_path(startup_name))
+            submit_render(html_body, report_path)
+            report_data["pdf_path"] = report_path
+            report_data["pdf_status"] = "rendering"
         except Exception as e:
-            logger.error(f"PDF 생성 중 오류 발생: {str(e)}")
-            report_path = "생성 실패"
+            logger.error(f"PDF 렌더링 요청 중 오류 발생: {str(e)}")
+            report_data["pdf_path"] = "생성 실패"
+            report_data["pdf_status"] = "failed"
         
         # 4. 상태에 저장 (PDF 경로)
-        if "report_data" not in state:
-            state["report_data"] = {}
-        
-        state["report_data"]["pdf_path"] = report_path
-        state["report_data"]["markdown_content"] = markdown_content
-        state["status"] = "pdf_generation_completed"
+        state["report_data"] = report_data
+        state["status"] = "pdf_generation_submitted"
         
     except Exception as e:
         logger.error(f"보고서 생성 중 오류 발생: {str(e)}")
         
-        if "report_data" not in state:
-            state["report_data"] = {}
-        
-        state["report_data"]["error"] = str(e)
+        report_data["error"] = str(e)
+        state["report_data"] = report_data
         state["status"] = "pdf_generation_error"
     
     return state
 
-# 랭그래프 노드 생성 함수 - 메인에서 임포트할 때 사용
-def create_pdf_generation_agent():
-    from langgraph.graph import StateGraph
-    
-    graph = StateGraph(InvestmentState)
-    
-    # PDF 생성 함수에 파라미터 설정을 위한 래퍼 함수
-    def pdf_gen_wrapper(state):
-        return pdf_generation(state, "investment_report.pdf")
+async def pdf_generation_async(state: InvestmentState, output_path: Optional[str] = None) -> InvestmentState:
+    """
+    pdf_generation의 비동기 버전 - 렌더링은 워커 풀에서 진행되므로 요청만 하고 바로 반환합니다.
+    """
+    return pdf_generation(state, output_path)
+
+def _cell(value: Any) -> str:
+    # 표 안에서 줄바꿈/파이프가 표를 깨지 않도록 정리
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+def _numeric(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+def rank_states(states: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """투자 적합성 점수 내림차순 (같으면 '통과' 먼저, 점수가 없으면 맨 뒤)"""
+    def key(state):
+        recommendation = state.get("investment_recommendation") or {}
+        score = _numeric(recommendation.get("score"))
+        return (score is None, -(score or 0), recommendation.get("judgement") != "통과")
+    return sorted(states, key=key)
+
+def _demote_headings(markdown_content: str) -> str:
+    # 개별 보고서의 제목 수준을 한 단계 낮춰 포트폴리오 문서의 하위 섹션으로 만듦
+    return re.sub(r"^(#{1,5}) ", r"#\1 ", markdown_content, flags=re.MULTILINE)
+
+def generate_portfolio_markdown(states: Iterable[Dict[str, Any]], title: str = "스타트업 포트폴리오 투자 평가 보고서") -> str:
+    """
+    여러 평가 결과를 하나의 마크다운 문서로 합칩니다.
+
+    순위 요약 표 뒤에 회사별 섹션(개별 보고서와 같은 내용)을 점수 순서대로 이어 붙입니다.
+    """
+    ranked = rank_states(states)
+    passed = sum(1 for s in ranked if (s.get("investment_recommendation") or {}).get("judgement") == "통과")
     
-    graph.add_node("pdf_generation", pdf_gen_wrapper)
+    markdown_content = f"""
+# {title}
+
+**평가 기업 수**: {len(ranked)}  
+**통과**: {passed} / **불통과**: {len(ranked) - passed}  
+**생성일**: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")}
+
+## 순위 요약
+
+| 순위 | 스타트업 | 도메인 | 결정 | 투자 적합성 점수 | 평균 시장 점수 | 경쟁력 점수 |
+|------|----------|--------|------|------------------|----------------|-------------|
+"""
+    for rank, state in enumerate(ranked, 1):
+        startup_info = state.get("startup_info") or {}
+        market_analysis = state.get("market_analysis") or {}
+        recommendation = state.get("investment_recommendation") or {}
+        markdown_content += (
+            f"| {rank} | {_cell(startup_info.get('name', '미확인 스타트업'))} | {_cell(startup_info.get('domain', '-'))} "
+            f"| {_cell(recommendation.get('judgement', '판단 불가'))} | {_cell(recommendation.get('score', '-'))} "
+            f"| {_cell(market_analysis.get('average_market_score', '-'))} | {_cell(market_analysis.get('competitive_score', '-'))} |\n"
+        )
     
-    # 시작점과 종료점이 같은 단일 노드 그래프
-    graph.set_entry_point("pdf_generation")
-    graph.set_finish_point("pdf_generation")
+    # 회사별 섹션 (새 페이지에서 시작)
+    for rank, state in enumerate(ranked, 1):
+        name = (state.get("startup_info") or {}).get("name", "미확인 스타트업")
+        section = generate_markdown_from_state(state).replace("# 스타트업 투자 평가 보고서", f"# {rank}. {name}", 1)
+        markdown_content += f'\n<div class="company-section"></div>\n{_demote_headings(section)}\n'
     
-    return graph.compile()
+    return markdown_content
+
+def render_portfolio_report(states: Iterable[Dict[str, Any]], output_path: Optional[str] = None,
+                            title: str = "스타트업 포트폴리오 투자 평가 보고서") -> Future:
+    """
+    포트폴리오 보고서를 한 번의 렌더링으로 만듭니다. (공통 CSS/폰트 설정은 렌더링 워커에서 한 번만 준비)
 
-# 단독 실행 테스트용
+    Returns:
+        PDF 절대 경로를 결과로 갖는 Future
+    """
+    markdown_content = generate_portfolio_markdown(states, title)
+    return submit_render(markdown_to_html(markdown_content), output_path or make_report_path("portfolio"))
+
+def load_result_states(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """배치 결과 JSONL(main.py --output)에서 성공한 평가의 결과 상태만 읽습니다."""
+    states = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get("status", "ok") == "ok" and record.get("result"):
+                    states.append(record["result"])
+    return states
+
+# 단독 실행 테스트용 (배치 결과 파일을 주면 포트폴리오 보고서 생성)
 if __name__ == "__main__":
-    import datetime
+    parser = argparse.ArgumentParser(description="투자 평가 보고서 생성")
+    parser.add_argument("--portfolio", nargs="+", default=None, help="포트폴리오 보고서로 합칠 배치 결과 JSONL 파일")
+    parser.add_argument("--out", type=str, default=None, help="포트폴리오 보고서 경로 (기본값: 출력 디렉터리의 고유 경로)")
+    args = parser.parse_args()
+    
+    if args.portfolio:
+        portfolio_states = load_result_states(args.portfolio)
+        print(f"포트폴리오 보고서: {render_portfolio_report(portfolio_states, args.out).result()} ({len(portfolio_states)}개 기업)")
+        raise SystemExit(0)
     
     # 테스트용 초기 상태
     test_state = {
@@ -240,7 +327,7 @@ if __name__ == "__main__":
     }
     
     # 에이전트 실행
-    result_state = pdf_generation(test_state)
+    result_state = wait_for_report(pdf_generation(test_state))
     
     # 결과 출력
     print("\n=== PDF 생성 결과 ===")
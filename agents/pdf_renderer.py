@@ -0,0 +1,212 @@
+import os
+import re
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional
+
+from agents.tracing import start_span
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 보고서 공통 스타일 (워커마다 한 번만 파싱)
+REPORT_CSS = """
+body { font-family: Arial, sans-serif; line-height: 1.6; margin: 40px; }
+h1 { color: #2c3e50; border-bottom: 2px solid #eee; padding-bottom: 10px; }
+h2 { color: #3498db; margin-top: 30px; }
+h3 { color: #2980b9; }
+table { border-collapse: collapse; width: 100%; margin: 20px 0; }
+th, td { padding: 12px; text-align: left; border: 1px solid #ddd; }
+th { background-color: #f2f2f2; }
+.highlight { background-color: #ffffcc; padding: 2px 5px; }
+.judgement { font-weight: bold; font-size: 18px; margin: 20px 0; }
+.company-section { page-break-before: always; }
+"""
+
+# 렌더링 설정 (configure_pdf_rendering 또는 환경 변수로 변경)
+_render_config = {
+    "output_dir": os.getenv("REPORT_OUTPUT_DIR", "reports"),
+    "workers": int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1)))),  # 0이면 프로세스 풀 없이 스레드 하나
+    "start_method": os.getenv("PDF_MP_START_METHOD", "spawn"),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending: Dict[str, Future] = {}   # 보고서 경로 → 렌더링 Future
+_pending_lock = threading.Lock()
+
+# 워커 프로세스 전역 상태 (폰트 설정과 스타일시트)
+_worker: Dict[str, Any] = {}
+
+def configure_pdf_rendering(output_dir: Optional[str] = None, workers: Optional[int] = None,
+                            start_method: Optional[str] = None):
+    """
+    PDF 렌더링 설정을 변경합니다. 생략한 항목은 기존 값을 유지합니다.
+
+    워커 설정이 바뀌면 기존 풀은 다음 사용 전에 종료됩니다.
+    """
+    if output_dir is not None:
+        _render_config["output_dir"] = output_dir
+    if workers is not None or start_method is not None:
+        shutdown_render_pool()
+        if workers is not None:
+            _render_config["workers"] = workers
+        if start_method is not None:
+            _render_config["start_method"] = start_method
+
+def _init_worker():
+    """워커 초기화 - WeasyPrint 임포트, 폰트 설정, 스타일시트 파싱을 한 번만 수행합니다."""
+    try:
+        from weasyprint import CSS
+        try:
+            from weasyprint.text.fonts import FontConfiguration
+        except ImportError:  # WeasyPrint 53 미만
+            from weasyprint.fonts import FontConfiguration
+
+        font_config = FontConfiguration()
+        _worker["font_config"] = font_config
+        _worker["css"] = CSS(string=REPORT_CSS, font_config=font_config)
+    except Exception as e:
+        _worker["error"] = f"{type(e).__name__}: {str(e)}"
+
+def _ping() -> int:
+    return os.getpid()
+
+def _render(html_body: str, output_path: str) -> str:
+    """(워커에서 실행) HTML 본문을 PDF로 저장하고 절대 경로를 반환합니다."""
+    if not _worker:
+        _init_worker()
+    if "error" in _worker:
+        raise RuntimeError(f"WeasyPrint를 사용할 수 없습니다: {_worker['error']}")
+
+    from weasyprint import HTML
+
+    html = f'<html><head><meta charset="UTF-8"></head><body>{html_body}</body></html>'
+    HTML(string=html).write_pdf(output_path, stylesheets=[_worker["css"]], font_config=_worker["font_config"])
+    return os.path.abspath(output_path)
+
+def get_render_pool():
+    """렌더링 풀을 반환합니다. 처음 호출 시 워커를 띄우고 초기화까지 마칩니다(prewarm)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = _render_config["workers"]
+            started = time.perf_counter()
+            if workers <= 0:
+                _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-render",
+                                           initializer=_init_worker)
+                workers = 1
+            else:
+                context = multiprocessing.get_context(_render_config["start_method"])
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker)
+            # 워커를 모두 띄워 첫 보고서가 프로세스 시작/초기화 비용을 치르지 않도록 함
+            wait([_pool.submit(_ping) for _ in range(workers)])
+            logger.info(f"PDF 렌더링 풀 준비 완료: 워커 {workers}개 ({time.perf_counter() - started:.2f}초)")
+        return _pool
+
+def prewarm_render_pool(background: bool = False):
+    """
+    렌더링 풀을 미리 띄웁니다.
+
+    background가 True면 별도 스레드에서 띄워 그래프 실행(검색/LLM 호출)과 워커 시작이 겹치도록 합니다.
+    """
+    if background:
+        threading.Thread(target=get_render_pool, name="pdf-prewarm", daemon=True).start()
+    else:
+        get_render_pool()
+
+def shutdown_render_pool(wait_pending: bool = True):
+    """렌더링 풀을 종료합니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait_pending)
+            _pool = None
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^\w가-힣-]+", "_", text or "").strip("_")[:40] or "report"
+
+def make_report_path(name: str, suffix: str = ".pdf") -> str:
+    """동시 실행끼리 겹치지 않는 실행별 보고서 경로 (출력 디렉터리/시각_이름_고유값.pdf)"""
+    output_dir = _render_config["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(output_dir, f"{stamp}_{_slug(name)}_{uuid.uuid4().hex[:8]}{suffix}")
+
+def submit_render(html_body: str, output_path: str) -> Future:
+    """
+    PDF 렌더링을 워커에 맡기고 바로 Future를 반환합니다.
+
+    Future는 wait_for_report()/await_report()가 보고서 경로로 찾을 수 있도록 등록됩니다.
+    """
+    output_path = os.path.abspath(output_path)
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # 렌더링 스팬은 제출부터 워커 완료까지 (대기 시간 포함), Future 완료 시 끝냄
+    render_span = start_span("weasyprint.render", kind="pdf", html_chars=len(html_body))
+    try:
+        future = get_render_pool().submit(_render, html_body, output_path)
+    except BrokenProcessPool:
+        # 워커가 비정상 종료되어 풀을 쓸 수 없으면 새 풀로 한 번 더 시도
+        logger.warning("PDF 렌더링 풀이 손상되어 다시 생성합니다.")
+        render_span.add("retries")
+        shutdown_render_pool(wait_pending=False)
+        future = get_render_pool().submit(_render, html_body, output_path)
+    future.add_done_callback(lambda done: render_span.end(None if done.cancelled() else done.exception()))
+    with _pending_lock:
+        _pending[output_path] = future
+    return future
+
+def _pop_pending(report_data: Dict[str, Any]) -> Optional[Future]:
+    if report_data.get("pdf_status") != "rendering":
+        return None
+    with _pending_lock:
+        return _pending.pop(report_data.get("pdf_path", ""), None)
+
+def _apply_render_result(state: Dict[str, Any], future: Future, timeout: Optional[float] = None):
+    # 렌더링 결과를 상태에 반영 (실패/시간 초과 시 기존과 같이 "생성 실패")
+    report_data = dict(state.get("report_data") or {})
+    try:
+        report_data["pdf_path"] = future.result(timeout=timeout)
+        report_data["pdf_status"] = "completed"
+        logger.info(f"PDF 보고서 생성 완료: {report_data['pdf_path']}")
+    except Exception as e:
+        logger.error(f"PDF 생성 중 오류 발생: {str(e)}")
+        report_data["pdf_path"] = "생성 실패"
+        report_data["pdf_status"] = "failed"
+        report_data["pdf_error"] = str(e)
+    state["report_data"] = report_data
+    state["status"] = "pdf_generation_completed"
+
+def wait_for_report(state: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """렌더링 중인 보고서가 있으면 끝날 때까지 기다려 상태의 report_data를 갱신합니다."""
+    future = _pop_pending(state.get("report_data") or {})
+    if future is not None:
+        _apply_render_result(state, future, timeout)
+    return state
+
+async def await_report(state: Dict[str, Any]) -> Dict[str, Any]:
+    """wait_for_report의 비동기 버전 (이벤트 루프를 막지 않음)"""
+    future = _pop_pending(state.get("report_data") or {})
+    if future is not None:
+        try:
+            await asyncio.wrap_future(future)
+        except Exception:
+            pass  # 오류는 _apply_render_result에서 기록
+        _apply_render_result(state, future)
+    return state
+
+def wait_for_all_reports(timeout: Optional[float] = None) -> List[str]:
+    """등록된 모든 렌더링을 기다립니다. (프로그램 종료 전 호출) 완료된 경로 목록을 반환합니다."""
+    with _pending_lock:
+        futures = dict(_pending)
+        _pending.clear()
+    wait(list(futures.values()), timeout=timeout)
+    return [path for path, future in futures.items() if future.done() and future.exception() is None]
@@ -1,98 +1,507 @@
-import pandas as pd
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
-import uuid
+import os
+import json
 import time
+import hashlib
+import argparse
+import queue
+import random
+import threading
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from agents.rate_limiter import AIMDRateLimiter, is_rate_limit_error, get_retry_after
+from agents.preprocess import preprocess_startup_csv
+from agents.embedding_service import as_embedding_service
+from agents.domain_classifier import DomainClassifier, classify_by_name
+
+# 기본 경로 및 인덱스 설정
+DEFAULT_CSV_PATH = os.path.join("data", "startup_data.csv")
+DEFAULT_MANIFEST_PATH = os.path.join("data", "pinecone_manifest.json")
+DEFAULT_DEAD_LETTER_PATH = os.path.join("data", "pinecone_dead_letter.jsonl")
+DEFAULT_INDEX_NAME = "startup-index"
+MODEL_NAME = "all-MiniLM-L6-v2"  # 384차원 벡터 생성
+# 업로드 기록에 남기는 메타데이터 버전 (이보다 낮은 기록은 다음 동기화 때 메타데이터만 갱신)
+# - 1: name/summary (이전 manifest는 ID → 스타트업 이름 문자열만 기록)
+# - 2: + CSV 전체 기준으로 스타트업마다 한 번 분류한 domain
+METADATA_VERSION = 2
+
+def make_vector_id(name: str, summary: str) -> str:
+    """(스타트업, 텍스트) 내용 해시로 벡터 ID를 만듭니다. 같은 행은 항상 같은 ID를 갖습니다."""
+    raw = f"{name}\x1f{summary}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+def _prepare_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """CSV 청크에 name/summary 열과 내용 해시 ID를 추가합니다."""
+    # 열 이름 변경
+    df = df.rename(columns={
+        'startup': 'name',
+        'text': 'summary'
+    })
+    df = df.dropna(subset=['name', 'summary'])
+    df['name'] = df['name'].astype(str)
+    df['summary'] = df['summary'].astype(str)
+
+    # 내용 해시 ID
+    df['id'] = [make_vector_id(n, s) for n, s in zip(df['name'], df['summary'])]
+    return df
+
+def load_startup_csv(csv_path: str) -> pd.DataFrame:
+    """CSV를 읽어 name/summary 열과 내용 해시 ID를 가진 데이터프레임으로 반환합니다."""
+    df = _prepare_chunk(pd.read_csv(csv_path))
+
+    # 완전히 같은 행은 하나만 남김
+    df = df.drop_duplicates(subset='id').reset_index(drop=True)
+
+    print(f"CSV 파일에서 {len(df)}개의 고유 레코드를 로드했습니다.")
+    return df
+
+def iter_csv_chunks(csv_path: str, chunksize: int = 1000) -> Iterator[pd.DataFrame]:
+    """CSV를 청크 단위로 읽어 임베딩과 읽기가 겹쳐 진행되도록 합니다."""
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        yield _prepare_chunk(chunk)
+
+def iter_preprocessed_chunks(csv_path: str, chunksize: int = 1000, **options) -> Iterator[pd.DataFrame]:
+    """
+    보일러플레이트 제거와 스타트업별 청크 통합(agents.preprocess)을 거친 데이터를 청크 단위로 반환합니다.
+
+    회사 간 중복 탐지에 전체 데이터가 필요하므로 CSV는 한 번에 읽고, 임베딩/업로드 단계만 청크로 나눕니다.
+    """
+    df, report = preprocess_startup_csv(csv_path, **options)
+    print(f"전처리: {report['input_rows']}행 → {report['output_chunks']}개 청크")
+    for i in range(0, len(df), chunksize):
+        yield _prepare_chunk(df.iloc[i:i + chunksize])
+
+def load_manifest(manifest_path: str, index_name: str) -> Dict[str, Any]:
+    """업로드 기록(manifest)을 읽습니다. 파일이 없거나 다른 인덱스의 기록이면 빈 기록을 반환합니다."""
+    empty = {"index_name": index_name, "vectors": {}}
+    if not os.path.exists(manifest_path):
+        return empty
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("index_name") != index_name:
+        print(f"manifest가 다른 인덱스('{manifest.get('index_name')}')의 기록이므로 무시합니다.")
+        return empty
+    return manifest
+
+def save_manifest(manifest_path: str, manifest: Dict[str, Any]):
+    """업로드 기록을 원자적으로 저장합니다. (중간에 중단되어도 파일이 깨지지 않음)"""
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    manifest["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+def entry_version(entry) -> int:
+    """업로드 기록 항목의 메타데이터 버전"""
+    return entry.get("metadata_version", 1) if isinstance(entry, dict) else 1
+
+def make_manifest_entry(metadata: Dict[str, Any], classified: bool) -> Dict[str, Any]:
+    """업로드 기록 항목 (도메인을 분류하지 않고 올린 벡터는 버전 1로 남겨, 분류를 켜면 갱신되게 함)"""
+    return {
+        "name": metadata["name"],
+        "domain": metadata.get("domain"),
+        "metadata_version": METADATA_VERSION if classified else 1,
+    }
+
+def _needs_metadata_update(entry, domain: Optional[str]) -> bool:
+    return entry_version(entry) < METADATA_VERSION or entry.get("domain") != domain
+
+def collect_rows(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """청크를 하나의 데이터프레임(id/name/summary, 같은 ID는 하나만)으로 모읍니다. 임베딩은 아직 계산하지 않습니다."""
+    frames = [chunk[['id', 'name', 'summary']] for chunk in chunks]
+    if not frames:
+        return pd.DataFrame(columns=['id', 'name', 'summary'])
+    return pd.concat(frames, ignore_index=True).drop_duplicates(subset='id').reset_index(drop=True)
+
+def plan_rows(rows: pd.DataFrame, manifest: Dict[str, Any], classify_domains: bool = True) -> pd.DataFrame:
+    """
+    임베딩할 행을 고릅니다.
+
+    - 새로 추가되거나 내용이 바뀐 행 (pending=True, 업로드 대상)
+    - 도메인을 분류하면, 업로드 대상이 있거나 메타데이터 버전이 낮은 스타트업의 나머지 행도 포함
+      (스타트업의 모든 행으로 한 번 분류하고, 도메인이 바뀐 기존 벡터는 메타데이터만 갱신)
+
+    반환 데이터프레임은 스타트업 이름 순으로 정렬되어 있습니다.
+    """
+    uploaded = manifest["vectors"]
+    pending = ~rows['id'].isin(uploaded)
+    if classify_domains:
+        stale = rows['id'].map(lambda vector_id: vector_id in uploaded
+                               and entry_version(uploaded[vector_id]) < METADATA_VERSION)
+        work = rows[rows['name'].isin(set(rows.loc[pending | stale, 'name']))]
+    else:
+        work = rows[pending]
+    work = work.assign(pending=~work['id'].isin(uploaded))
+    return work.sort_values('name', kind='stable').reset_index(drop=True)
+
+def iter_startup_chunks(work: pd.DataFrame, chunksize: int = 1000) -> Iterator[pd.DataFrame]:
+    """스타트업 경계에서 자른 청크를 반환합니다. (한 스타트업의 행은 항상 같은 청크에 들어감)"""
+    names = work['name'].to_numpy()
+    start = 0
+    while start < len(work):
+        end = min(start + chunksize, len(work))
+        while end < len(work) and names[end] == names[end - 1]:
+            end += 1
+        yield work.iloc[start:end]
+        start = end
+
+class IngestionPipeline:
+    """
+    생산자/소비자 방식의 업로드 파이프라인.
+
+    - 생산자 스레드: 청크를 읽고 배치 단위로 model.encode를 수행해 큐에 넣습니다.
+      청크는 스타트업 경계에서 잘려 있으므로, 스타트업마다 모든 행의 임베딩으로 도메인을 한 번 분류합니다.
+    - 업로드 워커 여러 개: 큐에서 배치를 꺼내 동시에 upsert 하거나, 이미 올린 벡터의 도메인 메타데이터만 갱신합니다.
+    - AIMD 속도 제한기가 429 응답에 맞춰 업로드 속도를 조절합니다.
+    - 실패한 배치는 지수 백오프로 재시도하고, 끝내 실패하면 dead-letter 파일에 기록합니다.
+    """
+
+    def __init__(self, index, model_loader, manifest, manifest_path, batch_size=50, encode_batch_size=256,
+                 workers=4, queue_size=8, max_retries=5, base_backoff=1.0, max_backoff=60.0,
+                 limiter: Optional[AIMDRateLimiter] = None, dead_letter_path=DEFAULT_DEAD_LETTER_PATH,
+                 manifest_save_interval=2.0, classify_domains=True):
+        self.index = index
+        self.model_loader = model_loader
+        self.manifest = manifest
+        self.manifest_path = manifest_path
+        self.batch_size = batch_size
+        self.encode_batch_size = encode_batch_size
+        self.workers = workers
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.limiter = limiter or AIMDRateLimiter()
+        self.dead_letter_path = dead_letter_path
+        self.manifest_save_interval = manifest_save_interval
+        self.classify_domains = classify_domains
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._last_manifest_save = 0.0
+        self._producer_error = None
+
+        self.stats = {"encoded": 0, "upserted": 0, "metadata_updated": 0, "failed": 0, "retries": 0, "batches": 0}
+
+    def _produce(self, work_chunks: Iterable[pd.DataFrame]):
+        """청크를 배치로 나눠 임베딩한 뒤 업로드 큐에 넣습니다."""
+        model = None
+        classifier = None
+        try:
+            for chunk in work_chunks:
+                if model is None:
+                    # 업로드할 행이 실제로 있을 때만 모델을 로드
+                    model = self.model_loader()
+                    classifier = DomainClassifier(model.encode_many) if self.classify_domains else None
+
+                # 큰 단위로 한 번에 인코딩해 모델의 배치 처리를 활용하고, 업로드는 작은 배치로 나눈다
+                vectors = model.encode_many(chunk['summary'].tolist(), batch_size=self.encode_batch_size)
+                with self._lock:
+                    self.stats["encoded"] += len(chunk)
+
+                # 이미 계산한 임베딩으로 스타트업별 도메인을 분류해 메타데이터에 기록 (검색 시 LLM 호출 불필요)
+                domains = classify_by_name(classifier, chunk['name'].tolist(), vectors) if classifier else {}
+
+                upserts, updates = [], []
+                for j, row in enumerate(chunk.itertuples()):
+                    metadata = self._metadata(row, domains)
+                    if row.pending:
+                        upserts.append({'id': row.id, 'values': vectors[j].tolist(), 'metadata': metadata})
+                    elif _needs_metadata_update(self.manifest["vectors"].get(row.id), metadata.get('domain')):
+                        updates.append({'id': row.id, 'metadata': metadata})
 
-# Pinecone API 키 설정
-PINECONE_API_KEY = "pcsk_5eomHM_G5Qphjze7azah2CE7XnhygHsrVvp76ZzwtydLFFgFZtUR438teA7v2psLU16jFa"  # 실제 API 키의 일부만 표시됨
-
-# CSV 파일 로드
-csv_path = r"C:\Users\lucy8\skala\AI_project\data\startup_data.csv"
-df = pd.read_csv(csv_path)
-
-# 열 이름 변경
-df = df.rename(columns={
-    'startup': 'name',
-    'text': 'summary'
-})
-
-print(f"CSV 파일에서 {len(df)}개의 레코드를 로드했습니다.")
-
-# 임베딩 모델 로드
-model_name = "all-MiniLM-L6-v2"  # 384차원 벡터 생성
-model = SentenceTransformer(model_name)
-embedding_dim = model.get_sentence_embedding_dimension()
-print(f"모델 임베딩 차원: {embedding_dim}")
-
-# Pinecone 초기화
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
-# 이미 생성된 인덱스에 연결
-index_name = "startup-index"
-index = pc.Index(index_name)
-print(f"인덱스 '{index_name}'에 연결됨")
-
-# 벡터화 및 업로드 함수
-def upsert_to_pinecone(index, df, model):
-    batch_size = 50  # 작은 배치 사이즈로 시작
-    total_records = len(df)
-    successful_uploads = 0
-    
-    for i in range(0, total_records, batch_size):
-        end_idx = min(i + batch_size, total_records)
-        # 배치 데이터 준비
-        batch_df = df.iloc[i:end_idx]
-        
-        # 임베딩 생성
-        summaries = batch_df['summary'].tolist()
+                for kind, records in (("upsert", upserts), ("update", updates)):
+                    for i in range(0, len(records), self.batch_size):
+                        self._queue.put((kind, records[i:i + self.batch_size]))
+        except Exception as e:
+            self._producer_error = e
+            print(f"임베딩 생성 중 오류 발생: {e}")
+        finally:
+            for _ in range(self.workers):
+                self._queue.put(None)
+
+    @staticmethod
+    def _metadata(row, domains: Dict[str, str]) -> Dict[str, Any]:
+        metadata = {'name': row.name, 'summary': row.summary}
+        if row.name in domains:
+            metadata['domain'] = domains[row.name]
+        return metadata
+
+    def _send(self, kind: str, records):
+        if kind == "upsert":
+            self.index.upsert(vectors=records)
+            return
+        # 이미 올린 벡터는 도메인 메타데이터만 갱신 (신뢰도가 낮아 도메인이 없으면 빈 값으로 덮어씀)
+        for record in records:
+            self.index.update(id=record["id"], set_metadata={"domain": record["metadata"].get("domain") or ""})
+
+    def _upsert_with_retry(self, records, kind: str = "upsert") -> bool:
+        """배치를 업로드(또는 메타데이터 갱신)합니다. 429와 일시적 오류는 지수 백오프로 재시도합니다."""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                self._send(kind, records)
+                self.limiter.on_success()
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self._write_dead_letter(records, e)
+                    return False
+
+                retry_after = get_retry_after(e)
+                if is_rate_limit_error(e):
+                    self.limiter.on_throttle(retry_after)
+
+                # 지수 백오프 + 지터 (Retry-After가 있으면 그 이상 대기)
+                delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+                delay = max(random.uniform(delay / 2, delay), retry_after or 0)
+                with self._lock:
+                    self.stats["retries"] += 1
+                print(f"업로드 실패 ({len(records)}개, 시도 {attempt + 1}/{self.max_retries + 1}): {e} "
+                      f"- {delay:.1f}초 후 재시도")
+                time.sleep(delay)
+        return False
+
+    def _write_dead_letter(self, records, error: Exception):
+        """최종 실패한 배치를 dead-letter 파일에 기록합니다. (다음 동기화 때 자동으로 다시 시도됨)"""
+        entry = {
+            "failed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "error": str(error),
+            "rows": [{"id": r["id"], **r["metadata"]} for r in records],
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_path)), exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"배치 {len(records)}개를 dead-letter 파일에 기록했습니다: {self.dead_letter_path}")
+
+    def _consume(self):
+        """업로드 워커 - 큐에서 배치를 꺼내 업로드하고 업로드 기록을 갱신합니다."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            kind, records = item
+            ok = self._upsert_with_retry(records, kind)
+            with self._lock:
+                self.stats["batches"] += 1
+                if not ok:
+                    self.stats["failed"] += len(records)
+                    continue
+
+                self.stats["upserted" if kind == "upsert" else "metadata_updated"] += len(records)
+                for record in records:
+                    self.manifest["vectors"][record["id"]] = make_manifest_entry(record["metadata"], self.classify_domains)
+
+                # 업로드 기록은 일정 간격으로만 저장
+                now = time.monotonic()
+                if now - self._last_manifest_save >= self.manifest_save_interval:
+                    save_manifest(self.manifest_path, self.manifest)
+                    self._last_manifest_save = now
+
+    def run(self, work_chunks: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+        """
+        파이프라인을 실행하고 처리량 통계를 반환합니다.
+
+        Args:
+            work_chunks: iter_startup_chunks 형식의 청크 (pending 열이 False인 행은 도메인 분류/메타데이터 갱신에만 사용)
+        """
+        started = time.perf_counter()
+
+        producer = threading.Thread(target=self._produce, args=(work_chunks,), daemon=True)
+        consumers = [threading.Thread(target=self._consume, daemon=True) for _ in range(self.workers)]
+        producer.start()
+        for consumer in consumers:
+            consumer.start()
+
+        # 진행 상황 출력
+        while any(c.is_alive() for c in consumers):
+            for consumer in consumers:
+                consumer.join(timeout=5.0)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                upserted = self.stats["upserted"]
+            if upserted:
+                print(f"진행: 업로드 {upserted}개, {upserted / elapsed:.1f} rows/s, "
+                      f"허용 속도 {self.limiter.rate:.2f} 배치/s")
+        producer.join()
+
+        save_manifest(self.manifest_path, self.manifest)
+        elapsed = time.perf_counter() - started
+
+        stats = dict(self.stats)
+        stats["elapsed_sec"] = round(elapsed, 3)
+        stats["rows_per_sec"] = round(stats["upserted"] / elapsed, 2) if elapsed > 0 else 0.0
+        stats["throttled"] = self.limiter.throttled
+        if self._producer_error is not None:
+            stats["producer_error"] = str(self._producer_error)
+        return stats
+
+def delete_from_pinecone(index, vector_ids, manifest, manifest_path, batch_size=1000):
+    """원본에서 사라진 행의 벡터를 삭제하고 업로드 기록에서도 제거합니다."""
+    deleted = 0
+    for i in range(0, len(vector_ids), batch_size):
+        batch_ids = vector_ids[i:i + batch_size]
         try:
-            vectors = model.encode(summaries)
-            
-            # 업로드할 데이터 준비
-            records = []
-            for j, row in enumerate(batch_df.itertuples()):
-                # ID 생성 (고유해야 함)
-                id = str(uuid.uuid4())
-                
-                # 메타데이터 준비
-                metadata = {
-                    'name': str(row.name),  # 문자열로 변환
-                    'summary': str(row.summary)  # 문자열로 변환
-                }
-                
-                # 벡터 준비
-                vector = vectors[j].tolist()
-                
-                # 레코드 추가
-                records.append({
-                    'id': id,
-                    'values': vector,
-                    'metadata': metadata
-                })
-            
-            # Pinecone에 업로드
-            index.upsert(vectors=records)
-            
-            successful_uploads += len(records)
-            print(f"업로드 완료: {i+1}~{end_idx}/{total_records} 레코드 (총 성공: {successful_uploads})")
-            # 속도 제한을 피하기 위한 짧은 대기
-            time.sleep(1)
-            
+            index.delete(ids=batch_ids)
+            for vector_id in batch_ids:
+                manifest["vectors"].pop(vector_id, None)
+            save_manifest(manifest_path, manifest)
+            deleted += len(batch_ids)
         except Exception as e:
-            print(f"배치 {i}~{end_idx} 처리 중 오류 발생: {e}")
-            time.sleep(5)  # 오류 후 더 긴 대기
+            print(f"벡터 삭제 중 오류 발생 ({i}~{i + len(batch_ids)}): {e}")
+    return deleted
+
+def delete_unmanaged_vectors(index, manifest, batch_size=1000):
+    """
+    업로드 기록에 없는 벡터(예: 이전 uuid 방식으로 올린 중복 벡터)를 인덱스에서 삭제합니다.
+
+    index.list()를 지원하는 서버리스 인덱스에서만 동작합니다.
+    """
+    known_ids = manifest["vectors"]
+    unmanaged = []
+    for id_batch in index.list():
+        unmanaged.extend(vector_id for vector_id in id_batch if vector_id not in known_ids)
+
+    for i in range(0, len(unmanaged), batch_size):
+        index.delete(ids=unmanaged[i:i + batch_size])
+    return len(unmanaged)
+
+def _load_default_model():
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(MODEL_NAME)
+    print(f"모델 임베딩 차원: {model.get_sentence_embedding_dimension()}")
+    return as_embedding_service(model, MODEL_NAME)
+
+def sync_index(index, chunks: Iterable[pd.DataFrame], manifest_path, index_name, model=None,
+               dry_run=False, delete_unmanaged=False, chunksize=1000, **pipeline_options):
+    """
+    CSV 청크와 인덱스를 증분 동기화합니다.
+
+    새로 추가되거나 내용이 바뀐 행만 파이프라인으로 임베딩/업로드하고, 원본에서 사라진 벡터는 삭제합니다.
+    도메인은 CSV 전체에서 스타트업마다 한 번 분류하며, 업로드 대상이 생긴 스타트업이나 메타데이터 버전이
+    낮은 기록(METADATA_VERSION 이전 업로드)은 기존 벡터의 도메인 메타데이터를 갱신합니다.
+    변경이 없으면 임베딩 모델을 로드하지 않고, 임베딩/업로드 호출도 하지 않습니다.
+
+    Args:
+        index: Pinecone 인덱스
+        chunks: _prepare_chunk 형식의 데이터프레임 청크들 (데이터프레임 하나도 가능)
+        manifest_path: 업로드 기록 파일 경로
+        index_name: 인덱스 이름 (업로드 기록 검증용)
+        model: 임베딩 모델 (None이면 필요할 때 로드)
+        dry_run: 변경 계획만 출력
+        delete_unmanaged: 업로드 기록에 없는 벡터도 삭제
+        chunksize: 한 번에 인코딩하는 행 수 (스타트업 경계에서 자름)
+        **pipeline_options: IngestionPipeline 옵션 (workers, batch_size, classify_domains 등)
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+
+    manifest = load_manifest(manifest_path, index_name)
+    previously_uploaded = set(manifest["vectors"])
+    # 스타트업 단위 도메인 분류에 CSV 전체가 필요하므로 텍스트는 모두 읽고, 임베딩만 청크로 나눠 계산
+    rows = collect_rows(chunks)
+    seen_ids = set(rows['id'])
+    work = plan_rows(rows, manifest, pipeline_options.get("classify_domains", True))
+    planned = int(work['pending'].sum())
+
+    if dry_run:
+        planned_deletes = len(previously_uploaded - seen_ids)
+        reclassify = len(work) - planned
+        print(f"동기화 계획: 추가/변경 {planned}개, 삭제 {planned_deletes}개, 유지 {len(seen_ids) - planned}개 "
+              f"(그중 도메인 재분류 {reclassify}개)")
+        return {"upserted": 0, "deleted": 0, "planned_upserts": planned, "planned_deletes": planned_deletes,
+                "planned_reclassify": reclassify}
+
+    pipeline = IngestionPipeline(
+        index,
+        model_loader=(lambda: as_embedding_service(model, MODEL_NAME)) if model is not None else _load_default_model,
+        manifest=manifest,
+        manifest_path=manifest_path,
+        **pipeline_options
+    )
+    stats = pipeline.run(iter_startup_chunks(work, chunksize))
+
+    # 임베딩이 중간에 실패했다면 읽지 못한 행을 삭제 대상으로 오인할 수 있으므로 삭제는 건너뜀
+    if "producer_error" in stats:
+        print("임베딩 단계 오류로 삭제 단계를 건너뜁니다.")
+        stats["deleted"] = 0
+    else:
+        to_delete = sorted(previously_uploaded - seen_ids)
+        stats["deleted"] = delete_from_pinecone(index, to_delete, manifest, manifest_path) if to_delete else 0
+
+    if delete_unmanaged:
+        removed = delete_unmanaged_vectors(index, manifest)
+        print(f"업로드 기록에 없는 벡터 {removed}개를 삭제했습니다.")
+
+    save_manifest(manifest_path, manifest)
+    print(f"동기화 완료: 추가/변경 {stats['upserted']}개, 도메인 갱신 {stats['metadata_updated']}개, "
+          f"실패 {stats['failed']}개, 삭제 {stats['deleted']}개, 유지 {len(seen_ids) - stats['upserted'] - stats['failed']}개 "
+          f"({stats['elapsed_sec']}초, {stats['rows_per_sec']} rows/s, 재시도 {stats['retries']}회)")
+    return stats
 
 # 메인 함수 실행
-print(f"시작: {len(df)}개의 레코드를 Pinecone에 업로드합니다...")
-upsert_to_pinecone(index, df, model)
-print("완료: 모든 데이터가 Pinecone에 업로드되었습니다.")
-
-# 인덱스 크기 확인
-try:
-    stats = index.describe_index_stats()
-    print(f"업로드된 총 벡터 수: {stats['total_vector_count']}")
-    print(f"인덱스 통계: {stats}")
-except Exception as e:
-    print(f"인덱스 통계 조회 중 오류 발생: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="스타트업 CSV를 Pinecone 인덱스와 증분 동기화")
+    parser.add_argument("--csv", type=str, default=DEFAULT_CSV_PATH, help="입력 CSV 경로")
+    parser.add_argument("--index-name", type=str, default=DEFAULT_INDEX_NAME, help="Pinecone 인덱스 이름")
+    parser.add_argument("--manifest", type=str, default=DEFAULT_MANIFEST_PATH, help="업로드 기록 파일 경로")
+    parser.add_argument("--dry-run", action="store_true", help="변경 계획만 출력하고 업로드하지 않음")
+    parser.add_argument("--delete-unmanaged", action="store_true",
+                        help="업로드 기록에 없는 기존 벡터(이전 uuid 업로드 등)를 삭제")
+    parser.add_argument("--no-preprocess", action="store_true",
+                        help="보일러플레이트 제거/청크 통합 없이 원본 조각을 그대로 업로드")
+    parser.add_argument("--chunksize", type=int, default=1000, help="CSV를 읽고 인코딩하는 청크 크기")
+    parser.add_argument("--batch-size", type=int, default=50, help="upsert 배치 크기")
+    parser.add_argument("--workers", type=int, default=4, help="동시 upsert 워커 수")
+    parser.add_argument("--rate", type=float, default=2.0, help="초기 upsert 허용 속도 (배치/초, 429에 맞춰 자동 조절)")
+    parser.add_argument("--max-retries", type=int, default=5, help="배치당 최대 재시도 횟수")
+    parser.add_argument("--no-domain", action="store_true", help="업로드 시 도메인 분류/기록을 하지 않음")
+    parser.add_argument("--dead-letter", type=str, default=DEFAULT_DEAD_LETTER_PATH, help="최종 실패 배치 기록 파일")
+    args = parser.parse_args()
+
+    # Pinecone API 키 설정
+    PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+    if not PINECONE_API_KEY:
+        print("환경 변수 PINECONE_API_KEY가 설정되지 않았습니다.")
+        exit(1)
+
+    # 이미 생성된 인덱스에 연결 (업로드 워커 수만큼 연결을 유지하는 공유 클라이언트)
+    from agents.clients import configure_clients, get_pinecone_index
+    configure_clients(pool_size=max(args.workers, 1))
+    index = get_pinecone_index(args.index_name, PINECONE_API_KEY)
+    print(f"인덱스 '{args.index_name}'에 연결됨")
+
+    # 전처리된(또는 원본) 데이터를 청크 단위로 동기화
+    if args.no_preprocess:
+        chunks = iter_csv_chunks(args.csv, chunksize=args.chunksize)
+    else:
+        chunks = iter_preprocessed_chunks(args.csv, chunksize=args.chunksize)
+
+    sync_index(
+        index,
+        chunks,
+        args.manifest,
+        args.index_name,
+        dry_run=args.dry_run,
+        delete_unmanaged=args.delete_unmanaged,
+        chunksize=args.chunksize,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        max_retries=args.max_retries,
+        limiter=AIMDRateLimiter(initial_rate=args.rate),
+        dead_letter_path=args.dead_letter,
+        classify_domains=not args.no_domain,
+    )
+
+    # 인덱스 크기 확인
+    try:
+        stats = index.describe_index_stats()
+        print(f"업로드된 총 벡터 수: {stats['total_vector_count']}")
+        print(f"인덱스 통계: {stats}")
+    except Exception as e:
+        print(f"인덱스 통계 조회 중 오류 발생: {e}")
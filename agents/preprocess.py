@@ -0,0 +1,289 @@
+import re
+import zlib
+import logging
+import argparse
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# MinHash 설정
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def normalize_text(text: str) -> str:
+    """유니코드 정규화(NFKC)와 공백 정리를 수행합니다."""
+    text = unicodedata.normalize("NFKC", str(text))
+    return re.sub(r"\s+", " ", text).strip()
+
+def _shingles(text: str, size: int) -> np.ndarray:
+    """공백을 제거한 문자 n-gram 집합을 32비트 해시 배열로 반환합니다."""
+    compact = re.sub(r"\s+", "", text.lower())
+    if len(compact) <= size:
+        grams = {compact}
+    else:
+        grams = {compact[i:i + size] for i in range(len(compact) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+class MinHasher:
+    """문자 n-gram 기반 MinHash 서명 생성기"""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 4, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # (a * h + b) mod p: a, b < 2^32 - 1, h < 2^32 이므로 a * h + b <= (2^32 - 1)^2 + 2^32 - 2 < 2^64
+        # (uint64 범위 안, mod p 전에 넘치지 않음)
+        self.a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = _shingles(text, self.shingle_size)
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+def _find_near_duplicate_groups(signatures: np.ndarray, bands: int, threshold: float) -> List[List[int]]:
+    """
+    LSH 밴딩으로 후보 쌍을 찾고, 추정 자카드 유사도가 threshold 이상인 문서들을 묶습니다.
+
+    Returns:
+        2개 이상의 문서로 이루어진 근사 중복 그룹 목록 (문서 인덱스)
+    """
+    count, num_perm = signatures.shape
+    rows = num_perm // bands
+
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets = defaultdict(list)
+        band_slice = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(count):
+            buckets[band_slice[i].tobytes()].append(i)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = find(first), find(other)
+                if root_a == root_b:
+                    continue
+                similarity = float(np.mean(signatures[first] == signatures[other]))
+                if similarity >= threshold:
+                    parent[root_b] = root_a
+
+    groups = defaultdict(list)
+    for i in range(count):
+        groups[find(i)].append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+def _split_long(fragment: str, max_chars: int) -> List[str]:
+    """max_chars보다 긴 조각을 가능한 한 공백 위치에서 잘라 여러 조각으로 나눕니다."""
+    pieces = []
+    while len(fragment) > max_chars:
+        cut = fragment.rfind(" ", 0, max_chars)
+        if cut <= max_chars // 2:
+            cut = max_chars
+        pieces.append(fragment[:cut].strip())
+        fragment = fragment[cut:].strip()
+    if fragment:
+        pieces.append(fragment)
+    return pieces
+
+def _strip_shared_spans(texts: List[str], startups: List[str], min_companies: int,
+                        gram_size: int = 16, min_span: int = 24) -> Tuple[List[str], int]:
+    """
+    조각 안에 섞인 보일러플레이트 구간(사이트 메뉴, 푸터 등)을 잘라냅니다.
+
+    문자 gram_size-gram이 min_companies곳 이상의 회사에 나타나면 공통 문구로 보고, 공통 n-gram으로만 덮인
+    min_span자 이상의 구간을 조각에서 제거합니다. (조각 전체가 같을 때만 지우는 완전 중복 단계를 보완)
+
+    Returns:
+        (정리된 조각 목록, 제거한 문자 수)
+    """
+    def grams(text: str):
+        return (text[i:i + gram_size] for i in range(len(text) - gram_size + 1))
+
+    companies: Dict[str, set] = defaultdict(set)
+    for text, startup in zip(texts, startups):
+        for gram in set(grams(text)):
+            companies[gram].add(startup)
+
+    cleaned, removed = [], 0
+    for text in texts:
+        mask = np.zeros(len(text), dtype=bool)
+        for i, gram in enumerate(grams(text)):
+            if len(companies[gram]) >= min_companies:
+                mask[i:i + gram_size] = True
+
+        pieces, start = [], 0
+        for match in re.finditer(r"1+", "".join("1" if m else "0" for m in mask)):
+            if match.end() - match.start() >= min_span:
+                pieces.append(text[start:match.start()])
+                start = match.end()
+                removed += match.end() - match.start()
+        pieces.append(text[start:])
+        cleaned.append(normalize_text(" ".join(pieces)))
+    return cleaned, removed
+
+def _chunk_fragments(fragments: List[str], max_chars: int, separator: str) -> List[str]:
+    """조각들을 순서대로 이어 붙여 max_chars 이하의 청크로 묶습니다."""
+    chunks, current, current_len = [], [], 0
+    for fragment in fragments:
+        added = len(fragment) + (len(separator) if current else 0)
+        if current and current_len + added > max_chars:
+            chunks.append(separator.join(current))
+            current, current_len = [], 0
+            added = len(fragment)
+        current.append(fragment)
+        current_len += added
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+def clean_and_consolidate(df: pd.DataFrame, min_chars: int = 10, boilerplate_company_ratio: float = 0.4,
+                          near_dup_threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                          shingle_size: int = 4, max_chunk_chars: int = 500,
+                          separator: str = "\n") -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    스크랩된 조각 데이터(startup, text)에서 노이즈를 제거하고 스타트업별로 청크를 만듭니다.
+
+    1. 정규화 후 min_chars보다 짧은 조각을 제거하고, max_chunk_chars보다 긴 조각은 나눕니다.
+    2. 여러 회사에 공통으로 나타나는 문구(사이트 메뉴 등)를 조각 안의 구간 단위로 잘라내고,
+       완전히 같은 공통 조각을 제거합니다.
+    3. MinHash/LSH로 찾은 근사 중복 그룹이 여러 회사에 걸쳐 있으면 보일러플레이트로 보고 제거하고,
+       한 회사 안의 근사 중복은 하나만 남깁니다.
+    4. 남은 조각을 스타트업별로 이어 붙여 max_chunk_chars 이하의 청크로 만듭니다.
+
+    Args:
+        df: startup, text 열을 가진 데이터프레임
+        min_chars: 남길 조각의 최소 길이 (공백 제외)
+        boilerplate_company_ratio: 전체 회사 중 이 비율 이상(최소 2곳)에 나타나면 보일러플레이트로 판단
+        near_dup_threshold: 근사 중복으로 볼 추정 자카드 유사도
+        num_perm: MinHash 서명 길이
+        bands: LSH 밴드 수 (num_perm의 약수)
+        shingle_size: 문자 n-gram 크기
+        max_chunk_chars: 청크 최대 길이
+        separator: 청크 안에서 조각을 잇는 구분자
+
+    Returns:
+        (startup, text 열을 가진 청크 데이터프레임, 단계별 제거 통계)
+    """
+    report = {"input_rows": len(df)}
+
+    data = df.dropna(subset=["startup", "text"]).copy()
+    data["startup"] = data["startup"].astype(str)
+    data["text"] = data["text"].map(normalize_text)
+
+    # 1. 짧은 조각 제거
+    lengths = data["text"].str.replace(" ", "", regex=False).str.len()
+    data = data[lengths >= min_chars]
+    report["dropped_short"] = report["input_rows"] - len(data)
+
+    # 긴 페이지 덤프는 청크 크기로 먼저 나눠, 겹치는 부분도 중복 제거 대상이 되도록 한다
+    data = data.assign(text=data["text"].map(lambda t: _split_long(t, max_chunk_chars))).explode("text")
+    report["split_fragments"] = len(data)
+
+    num_companies = data["startup"].nunique()
+    min_companies = max(2, int(np.ceil(num_companies * boilerplate_company_ratio)))
+
+    # 2. 조각 안에 섞인 공통 구간을 잘라내고, 그 결과 짧아진 조각 제거
+    texts, stripped_chars = _strip_shared_spans(data["text"].tolist(), data["startup"].tolist(), min_companies)
+    data = data.assign(text=texts)
+    before = len(data)
+    data = data[data["text"].str.replace(" ", "", regex=False).str.len() >= min_chars]
+    report["stripped_boilerplate_chars"] = stripped_chars
+    report["dropped_stripped_fragments"] = before - len(data)
+
+    # 회사 간 완전 중복 문구 제거, 회사 내 완전 중복은 하나만 유지
+    companies_per_text = data.groupby("text")["startup"].nunique()
+    boilerplate_texts = set(companies_per_text[companies_per_text >= min_companies].index)
+    before = len(data)
+    data = data[~data["text"].isin(boilerplate_texts)]
+    report["dropped_exact_boilerplate"] = before - len(data)
+
+    before = len(data)
+    data = data.drop_duplicates(subset=["startup", "text"]).reset_index(drop=True)
+    report["dropped_exact_duplicates"] = before - len(data)
+
+    # 3. MinHash 기반 근사 중복 제거
+    texts = data["text"].tolist()
+    startups = data["startup"].tolist()
+    drop = set()
+    boilerplate_groups = 0
+
+    if texts:
+        hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        signatures = np.vstack([hasher.signature(t) for t in texts])
+
+        for group in _find_near_duplicate_groups(signatures, bands, near_dup_threshold):
+            group_companies = {startups[i] for i in group}
+            if len(group_companies) >= min_companies:
+                drop.update(group)
+                boilerplate_groups += 1
+            else:
+                # 회사별로 가장 긴 조각 하나만 남김
+                best = {}
+                for i in group:
+                    if startups[i] not in best or len(texts[i]) > len(texts[best[startups[i]]]):
+                        best[startups[i]] = i
+                drop.update(i for i in group if i not in best.values())
+
+    data = data.drop(index=list(drop))
+    report["dropped_near_duplicates"] = len(drop)
+    report["near_boilerplate_groups"] = boilerplate_groups
+
+    # 4. 스타트업별 청크 생성 (원래 순서 유지)
+    records = []
+    for startup, group in data.groupby("startup", sort=False):
+        for chunk in _chunk_fragments(group["text"].tolist(), max_chunk_chars, separator):
+            records.append({"startup": startup, "text": chunk})
+
+    result = pd.DataFrame(records, columns=["startup", "text"])
+    report["kept_fragments"] = len(data)
+    report["output_chunks"] = len(result)
+    return result, report
+
+def preprocess_startup_csv(csv_path: str, **options) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """CSV를 읽어 clean_and_consolidate를 적용하고 결과와 통계를 로그로 남깁니다."""
+    df = pd.read_csv(csv_path)
+    result, report = clean_and_consolidate(df, **options)
+    logger.info(
+        f"전처리 완료: 입력 {report['input_rows']}행 → 조각 {report['kept_fragments']}개 → "
+        f"청크 {report['output_chunks']}개 (짧은 조각 {report['dropped_short']}, "
+        f"공통 문구 {report['dropped_exact_boilerplate']}, 완전 중복 {report['dropped_exact_duplicates']}, "
+        f"근사 중복 {report['dropped_near_duplicates']} 제거)"
+    )
+    return result, report
+
+# 전처리 결과를 CSV로 저장하는 CLI
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="스타트업 조각 데이터 노이즈 제거 및 청크 통합")
+    parser.add_argument("--csv", type=str, default="data/startup_data.csv", help="입력 CSV 경로")
+    parser.add_argument("--out", type=str, default="data/startup_chunks.csv", help="출력 CSV 경로")
+    parser.add_argument("--min-chars", type=int, default=10, help="남길 조각의 최소 길이")
+    parser.add_argument("--max-chunk-chars", type=int, default=500, help="청크 최대 길이")
+    parser.add_argument("--near-dup-threshold", type=float, default=0.8, help="근사 중복 유사도 기준")
+    args = parser.parse_args()
+
+    chunks, stats = preprocess_startup_csv(
+        args.csv,
+        min_chars=args.min_chars,
+        max_chunk_chars=args.max_chunk_chars,
+        near_dup_threshold=args.near_dup_threshold,
+    )
+    chunks.to_csv(args.out, index=False)
+    print(stats)
@@ -0,0 +1,217 @@
+import os
+import re
+import logging
+import threading
+import unicodedata
+from typing import Dict, Any, List, Optional, Callable, Sequence, Tuple
+
+import numpy as np
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 노드별 검색 문서 토큰 예산 (configure_prompt_budget 또는 PROMPT_BUDGET_<노드> 환경 변수로 변경)
+DEFAULT_BUDGET = int(os.getenv("PROMPT_BUDGET", "1500"))
+prompt_budgets: Dict[str, int] = {
+    "market_research": int(os.getenv("PROMPT_BUDGET_MARKET_RESEARCH", str(DEFAULT_BUDGET))),
+    "competitor_analysis": int(os.getenv("PROMPT_BUDGET_COMPETITOR_ANALYSIS", str(DEFAULT_BUDGET))),
+}
+
+_encoders: Dict[str, Any] = {}
+_encoder_lock = threading.Lock()
+_sentence_encoder: Optional[Callable[[List[str]], np.ndarray]] = None
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。])\s+|\n+")
+_WORD = re.compile(r"\w+")
+
+def configure_prompt_budget(tokens: Optional[int] = None, node: Optional[str] = None):
+    """노드별 토큰 예산을 변경합니다. node가 None이면 모든 노드에 적용합니다."""
+    if tokens is None:
+        return
+    for name in ([node] if node else list(prompt_budgets)):
+        prompt_budgets[name] = tokens
+
+def get_prompt_budget(node: str) -> int:
+    return prompt_budgets.get(node, DEFAULT_BUDGET)
+
+def set_sentence_encoder(encoder: Optional[Callable[[List[str]], np.ndarray]]):
+    """
+    문장 관련도 계산에 쓸 임베딩 함수를 등록합니다. (텍스트 목록 → (N, d) 행렬)
+
+    등록하지 않으면 쿼리와의 단어 겹침으로 관련도를 계산합니다.
+    """
+    global _sentence_encoder
+    _sentence_encoder = encoder
+
+def _get_encoder(model: Optional[str]):
+    """tiktoken 인코더 (설치되지 않았거나 로드에 실패하면 None)"""
+    key = model or "cl100k_base"
+    with _encoder_lock:
+        if key in _encoders:
+            return _encoders[key]
+        try:
+            import tiktoken
+            try:
+                encoder = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+            except KeyError:
+                encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.info(f"tiktoken을 사용할 수 없어 근사 토큰 수를 사용합니다: {str(e)}")
+            encoder = None
+        _encoders[key] = encoder
+        return encoder
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    텍스트의 토큰 수를 셉니다.
+
+    tiktoken이 있으면 모델의 토크나이저를, 없으면 근사치(ASCII 4자당 1토큰, 그 외 문자 1자당 1토큰)를 사용합니다.
+    """
+    if not text:
+        return 0
+    encoder = _get_encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+def count_message_tokens(messages: Sequence[Dict[str, Any]], model: Optional[str] = None) -> int:
+    """chat 메시지 목록의 입력 토큰 수 (메시지당 형식 토큰 포함)"""
+    return sum(4 + count_tokens(str(m.get("content") or ""), model) for m in messages) + 2
+
+def split_sentences(text: str) -> List[str]:
+    """문장 부호와 줄바꿈을 기준으로 문장을 나눕니다."""
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text or "") if s and s.strip()]
+
+def _normalize(sentence: str) -> str:
+    sentence = unicodedata.normalize("NFKC", sentence).lower()
+    return " ".join(_WORD.findall(sentence))
+
+def _lexical_scores(query: str, sentences: List[str]) -> np.ndarray:
+    """쿼리 단어가 문장에 얼마나 등장하는지로 관련도를 계산합니다."""
+    query_words = set(_WORD.findall(query.lower()))
+    if not query_words:
+        return np.zeros(len(sentences), dtype=np.float32)
+    scores = []
+    for sentence in sentences:
+        words = set(_WORD.findall(sentence.lower()))
+        # 한국어 조사 때문에 완전 일치가 드물어 접두 일치도 인정
+        hits = sum(1 for q in query_words if q in words or any(w.startswith(q) for w in words))
+        scores.append(hits / len(query_words))
+    return np.asarray(scores, dtype=np.float32)
+
+def _relevance_scores(query: str, sentences: List[str]) -> Tuple[np.ndarray, str]:
+    """(문장별 관련도, 계산 방식)"""
+    if _sentence_encoder is not None:
+        try:
+            vectors = np.asarray(_sentence_encoder([query] + sentences), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1)
+            norms[norms == 0] = 1.0
+            vectors = vectors / norms[:, None]
+            return vectors[1:].dot(vectors[0]), "embedding"
+        except Exception as e:
+            logger.warning(f"문장 임베딩 실패, 단어 겹침으로 대체합니다: {str(e)}")
+    return _lexical_scores(query, sentences), "lexical"
+
+def _format_documents(documents: List[Dict[str, Any]]) -> str:
+    return "\n\n".join(f"{doc.get('title', '')}\n{doc.get('content', '')}" for doc in documents)
+
+def compact_documents(documents: List[Dict[str, Any]], query: str, budget_tokens: int,
+                      model: Optional[str] = None, min_sentence_chars: int = 15) -> Tuple[str, Dict[str, Any]]:
+    """
+    검색 문서를 토큰 예산 안에 들어가도록 줄여 프롬프트용 텍스트로 만듭니다.
+
+    1. 원문 전체가 예산 안에 들어가면 그대로 사용합니다.
+    2. 넘으면 문서를 문장으로 나누고, 너무 짧은 문장과 (문서 간 포함) 중복 문장을 제거합니다.
+    3. 쿼리와 관련도가 높은 문장부터 예산이 찰 때까지 고른 뒤, 문서/원래 순서대로 다시 배열합니다.
+
+    Args:
+        documents: {"title", "content"} 문서 목록 (검색 순위 순)
+        query: 관련도 기준이 되는 검색어
+        budget_tokens: 문서 텍스트에 허용할 최대 토큰 수
+        model: 토큰을 셀 모델 이름
+
+    Returns:
+        (프롬프트용 문서 텍스트, 압축 통계)
+    """
+    original = _format_documents(documents)
+    original_tokens = count_tokens(original, model)
+    report = {
+        "budget_tokens": budget_tokens,
+        "original_tokens": original_tokens,
+        "final_tokens": original_tokens,
+        "sentences_total": 0,
+        "sentences_kept": 0,
+        "duplicates_removed": 0,
+        "method": "none",
+    }
+    if original_tokens <= budget_tokens:
+        return original, report
+
+    # 문장 단위로 나누고 중복 제거 (문서 순위 순서대로 처음 나온 문장을 유지)
+    seen = set()
+    sentences: List[Tuple[int, int, str]] = []  # (문서 번호, 문장 위치, 문장)
+    total = 0
+    for doc_index, doc in enumerate(documents):
+        for position, sentence in enumerate(split_sentences(doc.get("content", ""))):
+            total += 1
+            if len(sentence) < min_sentence_chars:
+                continue
+            key = _normalize(sentence)
+            if key in seen:
+                report["duplicates_removed"] += 1
+                continue
+            seen.add(key)
+            sentences.append((doc_index, position, sentence))
+    report["sentences_total"] = total
+
+    if not sentences:
+        return "", dict(report, final_tokens=0)
+
+    scores, method = _relevance_scores(query, [s for _, _, s in sentences])
+    report["method"] = method
+
+    # 제목은 문서마다 한 번씩 들어가므로 선택된 문서의 제목 토큰도 예산에 포함
+    title_tokens = [count_tokens(doc.get("title", ""), model) + 2 for doc in documents]
+    used = 0
+    selected_docs = set()
+    selected = []
+    # 관련도가 같으면 상위 문서, 앞쪽 문장 우선
+    for i in sorted(range(len(sentences)), key=lambda i: (-scores[i], sentences[i][0], sentences[i][1])):
+        doc_index, _, sentence = sentences[i]
+        cost = count_tokens(sentence, model) + 1
+        if doc_index not in selected_docs:
+            cost += title_tokens[doc_index]
+        if used + cost > budget_tokens:
+            continue
+        used += cost
+        selected_docs.add(doc_index)
+        selected.append(sentences[i])
+
+    selected.sort(key=lambda s: (s[0], s[1]))
+    blocks = []
+    for doc_index, doc in enumerate(documents):
+        kept = [sentence for d, _, sentence in selected if d == doc_index]
+        if kept:
+            blocks.append(f"{doc.get('title', '')}\n" + " ".join(kept))
+    text = "\n\n".join(blocks)
+
+    report["sentences_kept"] = len(selected)
+    report["final_tokens"] = count_tokens(text, model)
+    return text, report
+
+def usage_record(messages: Sequence[Dict[str, Any]], model: str,
+                 compaction: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """실행 결과(token_usage)에 기록할 호출 한 번의 입력 토큰 정보"""
+    record = {"model": model, "input_tokens": count_message_tokens(messages, model)}
+    if compaction is not None:
+        record["content_tokens_before"] = compaction["original_tokens"]
+        record["content_tokens_after"] = compaction["final_tokens"]
+        record["budget_tokens"] = compaction["budget_tokens"]
+    return record
+
+def record_usage(state: Dict[str, Any], node: str, record: Dict[str, Any]):
+    """상태의 token_usage에 노드의 입력 토큰 정보를 추가합니다. (병렬 노드와 공유하지 않도록 복사)"""
+    usage = dict(state.get("token_usage") or {})
+    usage[node] = record
+    state["token_usage"] = usage
@@ -0,0 +1,371 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from typing import Dict, List, Optional, Tuple
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """예외가 429(요청 한도 초과) 응답인지 판별합니다."""
+    for attr in ("status", "status_code", "http_status"):
+        if getattr(error, attr, None) == 429:
+            return True
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "Too Many Requests" in message or "rate limit" in message.lower()
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """예외에 포함된 HTTP 응답의 Retry-After 헤더 값을 초 단위로 반환합니다."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class AIMDRateLimiter:
+    """
+    AIMD(가산 증가/승산 감소) 방식으로 속도를 조절하는 토큰 버킷 제한기.
+
+    성공할 때마다 허용 속도를 조금씩 올리고, 429 응답을 받으면 속도를 절반으로 줄입니다.
+    Retry-After가 주어지면 그 시간 동안 모든 요청을 멈춥니다.
+    """
+
+    def __init__(self, initial_rate: float = 2.0, min_rate: float = 0.2, max_rate: float = 50.0,
+                 increase: float = 0.5, decrease_factor: float = 0.5):
+        """
+        Args:
+            initial_rate: 초기 허용 속도 (초당 요청 수)
+            min_rate: 최소 허용 속도
+            max_rate: 최대 허용 속도
+            increase: 허용 속도 1초당 요청 1개 분량의 성공마다 더할 속도 (초당 요청 수)
+            decrease_factor: 429 응답 시 곱할 감소 비율
+        """
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        self.throttled = 0
+
+    def _refill_locked(self, now: float):
+        capacity = max(1.0, self.rate)
+        self._tokens = min(capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """요청을 보낼 수 있을 때까지 대기합니다."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill_locked(now)
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return
+                    wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """요청 성공 - 허용 속도를 가산 증가시킵니다."""
+        with self._lock:
+            # 속도 1 단위(초당 rate개 요청)마다 increase만큼 증가하도록 요청당 증가량을 나눈다
+            self.rate = min(self.max_rate, self.rate + self.increase / max(1.0, self.rate))
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """429 응답 - 허용 속도를 승산 감소시키고, Retry-After 동안 요청을 멈춥니다."""
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+# 프로세스 전체 호출 한도 (configure_rate_limits 또는 OPENAI_RPM/OPENAI_TPM/TAVILY_RPM 환경 변수로 변경)
+# - limits: 키("openai" 기본값, "openai:<모델>" 모델별 값, "tavily")별 분당 요청 수(rpm)와 분당 토큰 수(tpm, None이면 제한 없음)
+# - priorities: 노드별 우선순위 (작을수록 먼저) - 끝나가는 실행(투자 판단)이 새 실행의 첫 호출보다 먼저 처리됨
+# - completion_estimate: max_tokens가 없는 요청의 예상 출력 토큰 수 (응답의 실제 사용량으로 정산)
+_quota_config = {
+    "enabled": os.getenv("RATE_LIMIT", "1") != "0",
+    "limits": {
+        "openai": {"rpm": int(os.getenv("OPENAI_RPM", "3500")), "tpm": int(os.getenv("OPENAI_TPM", "200000"))},
+        "tavily": {"rpm": int(os.getenv("TAVILY_RPM", "100")), "tpm": None},
+    },
+    "priorities": {
+        "investment_judgment": 0,
+        "market_research": 1,
+        "competitor_analysis": 1,
+        "extract_domain": 2,
+        "startup_exploration": 2,
+    },
+    "default_priority": 1,
+    "completion_estimate": 500,
+}
+
+class _Bucket:
+    """분당 한도를 초당 보충 속도로 바꾼 토큰 버킷 (용량 = 분당 한도)"""
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # 용량보다 큰 요청은 버킷이 가득 찼을 때 보냄 (영원히 기다리지 않도록)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+class _Waiter:
+    """대기열의 요청 하나 (스레드 또는 이벤트 루프에서 기다림)"""
+
+    def __init__(self, priority: int, seq: int, key: str, tokens: int, loop=None):
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        self.tokens = tokens
+        self.granted = False
+        self.cancelled = False
+        self.delay: Optional[float] = None
+        self.loop = loop
+        self.event = asyncio.Event() if loop is not None else threading.Event()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+class QuotaLimiter:
+    """
+    프로세스 전체의 요청/토큰 한도를 지키는 우선순위 토큰 버킷 제한기.
+
+    키(모델, 검색 API)마다 분당 요청 수와 분당 토큰 수 버킷을 두고, 모든 스레드와 이벤트 루프의 요청을
+    하나의 우선순위 대기열로 처리합니다. 대기열 맨 앞 요청의 버킷이 찰 때까지 기다렸다가 보내므로
+    한도를 넘지 않으면서 보낼 수 있는 만큼 보냅니다. 429 응답을 받으면 Retry-After 동안 그 키를 멈춥니다.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, Dict[str, _Bucket]] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._queues: Dict[str, List[_Waiter]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _limits(self, key: str) -> Dict[str, Optional[int]]:
+        limits = _quota_config["limits"]
+        return limits.get(key) or limits.get(key.split(":", 1)[0]) or {"rpm": None, "tpm": None}
+
+    def _buckets_locked(self, key: str, now: float) -> Dict[str, _Bucket]:
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            limits = self._limits(key)
+            buckets = self._buckets[key] = {
+                name: _Bucket(limits[name], now) for name in ("rpm", "tpm") if limits.get(name)
+            }
+        return buckets
+
+    def _count_locked(self, key: str, name: str, value: float = 1):
+        counters = self._stats.setdefault(key, {
+            "requests": 0, "tokens": 0, "queued": 0, "wait_sec": 0.0, "throttled": 0,
+        })
+        counters[name] += value
+
+    def _wait_time_locked(self, waiter: _Waiter, now: float) -> float:
+        wait = max(0.0, self._paused_until.get(waiter.key, 0.0) - now)
+        for name, bucket in self._buckets_locked(waiter.key, now).items():
+            bucket.refill(now)
+            wait = max(wait, bucket.wait_time(1 if name == "rpm" else waiter.tokens))
+        return wait
+
+    def _schedule_locked(self, key: str, caller: Optional[_Waiter] = None):
+        """대기열 맨 앞부터 보낼 수 있는 요청을 허가하고, 기다려야 하는 맨 앞 요청에 대기 시간을 알립니다."""
+        queue = self._queues.get(key) or []
+        now = time.monotonic()
+        while queue:
+            head = queue[0]
+            if head.cancelled:
+                heapq.heappop(queue)
+                continue
+            wait = self._wait_time_locked(head, now)
+            if wait > 0:
+                head.delay = wait
+                if head is not caller:
+                    head.wake()
+                return
+            heapq.heappop(queue)
+            for name, bucket in self._buckets_locked(key, now).items():
+                bucket.level -= 1 if name == "rpm" else min(head.tokens, bucket.capacity)
+            head.granted = True
+            self._count_locked(key, "requests")
+            self._count_locked(key, "tokens", head.tokens)
+            if head is not caller:
+                head.wake()
+
+    def _enqueue(self, key: str, tokens: int, priority: int, loop=None) -> _Waiter:
+        with self._lock:
+            waiter = _Waiter(priority, next(self._seq), key, max(0, int(tokens)), loop)
+            heapq.heappush(self._queues.setdefault(key, []), waiter)
+            return waiter
+
+    def _poll(self, waiter: _Waiter) -> Tuple[bool, Optional[float]]:
+        with self._lock:
+            if not waiter.granted:
+                waiter.event.clear()
+                waiter.delay = None
+                self._schedule_locked(waiter.key, caller=waiter)
+            return waiter.granted, waiter.delay
+
+    def _cancel(self, waiter: _Waiter):
+        with self._lock:
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._schedule_locked(waiter.key)
+
+    def _finish(self, waiter: _Waiter, started: float):
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            with self._lock:
+                self._count_locked(waiter.key, "queued")
+                self._count_locked(waiter.key, "wait_sec", waited)
+        return waited
+
+    def acquire(self, key: str, tokens: int = 0, priority: int = 1) -> float:
+        """
+        요청 하나를 보낼 수 있을 때까지 기다립니다.
+
+        Args:
+            key: 한도 키 (예: "openai:gpt-3.5-turbo-0125", "tavily")
+            tokens: 요청의 예상 토큰 수 (입력 + 최대 출력)
+            priority: 우선순위 (작을수록 먼저)
+
+        Returns:
+            기다린 시간 (초)
+        """
+        started = time.monotonic()
+        waiter = self._enqueue(key, tokens, priority)
+        try:
+            while True:
+                granted, delay = self._poll(waiter)
+                if granted:
+                    return self._finish(waiter, started)
+                waiter.event.wait(delay)
+        except BaseException:
+            self._cancel(waiter)
+            raise
+
+    async def aacquire(self, key: str, tokens: int = 0, priority: int = 1) -> float:
+        """acquire()의 비동기 버전 - 기다리는 동안 이벤트 루프를 막지 않으며, 스레드 요청과 같은 대기열을 씁니다."""
+        started = time.monotonic()
+        waiter = self._enqueue(key, tokens, priority, loop=asyncio.get_running_loop())
+        try:
+            while True:
+                granted, delay = self._poll(waiter)
+                if granted:
+                    return self._finish(waiter, started)
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._cancel(waiter)
+            raise
+
+    def reconcile(self, key: str, reserved: int, actual: int):
+        """예상 토큰 수로 예약한 양을 응답의 실제 사용량으로 정산합니다. (남은 양은 돌려받음)"""
+        with self._lock:
+            bucket = self._buckets_locked(key, time.monotonic()).get("tpm")
+            if bucket is not None:
+                bucket.level = min(bucket.capacity, bucket.level + reserved - actual)
+            self._count_locked(key, "tokens", actual - reserved)
+            self._schedule_locked(key)
+
+    def on_throttle(self, key: str, retry_after: Optional[float] = None):
+        """429 응답 - 버킷을 비우고 Retry-After(없으면 1초) 동안 그 키의 요청을 멈춥니다."""
+        with self._lock:
+            now = time.monotonic()
+            self._count_locked(key, "throttled")
+            for bucket in self._buckets_locked(key, now).values():
+                bucket.level = min(bucket.level, 0.0)
+            self._paused_until[key] = max(self._paused_until.get(key, 0.0), now + (retry_after or 1.0))
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._paused_until.clear()
+            self._stats.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            stats = {key: dict(counters) for key, counters in self._stats.items()}
+        for counters in stats.values():
+            counters["wait_sec"] = round(counters["wait_sec"], 3)
+        return stats
+
+# 프로세스 전체에서 공유하는 제한기
+quota_limiter = QuotaLimiter()
+
+def configure_rate_limits(key: Optional[str] = None, rpm: Optional[int] = None, tpm: Optional[int] = None,
+                          enabled: Optional[bool] = None, priorities: Optional[Dict[str, int]] = None,
+                          completion_estimate: Optional[int] = None):
+    """
+    프로세스 전체 호출 한도를 변경합니다. (생략한 값은 유지)
+
+    Args:
+        key: 한도 키 ("openai"는 모든 모델의 기본값, "openai:<모델>"은 모델별 값, "tavily")
+        rpm: 분당 요청 수
+        tpm: 분당 토큰 수 (OpenAI)
+        enabled: False면 한도를 적용하지 않음
+        priorities: 노드별 우선순위 (작을수록 먼저, 기존 값에 덮어씀)
+        completion_estimate: max_tokens가 없는 요청의 예상 출력 토큰 수
+    """
+    if key is not None and (rpm is not None or tpm is not None):
+        limits = _quota_config["limits"].setdefault(key, dict(quota_limiter._limits(key)))
+        if rpm is not None:
+            limits["rpm"] = rpm
+        if tpm is not None:
+            limits["tpm"] = tpm
+    if enabled is not None:
+        _quota_config["enabled"] = enabled
+    if priorities:
+        _quota_config["priorities"].update(priorities)
+    if completion_estimate is not None:
+        _quota_config["completion_estimate"] = completion_estimate
+    # 바뀐 한도로 버킷을 다시 만듦
+    quota_limiter.reset()
+
+def is_rate_limiting_enabled() -> bool:
+    return _quota_config["enabled"]
+
+def node_priority(node: Optional[str]) -> int:
+    """노드의 호출 우선순위 (작을수록 먼저)"""
+    return _quota_config["priorities"].get(node or "", _quota_config["default_priority"])
+
+def completion_estimate() -> int:
+    return _quota_config["completion_estimate"]
+
+def get_rate_limit_stats() -> Dict[str, Dict[str, float]]:
+    """키별 허가된 요청/토큰 수, 대기한 요청 수와 총 대기 시간, 429 횟수를 반환합니다."""
+    return quota_limiter.get_stats()
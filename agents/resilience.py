@@ -0,0 +1,485 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional, Callable, Tuple, Iterator, AsyncIterator
+
+from agents.rate_limiter import (
+    get_retry_after, is_rate_limit_error, is_rate_limiting_enabled, node_priority, quota_limiter
+)
+from agents.tracing import current_span
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 제공자별 호출 정책 (configure_resilience 또는 <제공자>_TIMEOUT / <제공자>_MAX_RETRIES 환경 변수로 변경)
+# - timeout: 시도 한 번의 제한 시간 (초) - SDK의 요청별 제한 시간 인자(timeout_arg)로 넘겨, 시간이 지나면
+#   SDK가 요청을 닫고 예외를 발생시킴 (스트림은 읽는 동안에도 적용)
+# - max_retries: 재시도 횟수 (첫 시도 제외)
+# - base_delay / max_delay: 지수 백오프 기본/최대 대기 시간 (초, full jitter)
+# - hedge: 시도가 최근 p95 지연 시간을 넘기면 같은 요청을 하나 더 보내 먼저 끝난 응답 사용
+# - failure_threshold / reset_timeout: 연속 실패 수가 넘으면 reset_timeout 동안 바로 실패 (회로 차단)
+_HEDGED_PROVIDERS = {p.strip() for p in os.getenv("RESILIENCE_HEDGE", "").split(",") if p.strip()}
+
+def _policy(provider: str, timeout: float, max_retries: int, timeout_arg: Optional[str] = None) -> Dict[str, Any]:
+    prefix = provider.upper()
+    return {
+        "timeout": float(os.getenv(f"{prefix}_TIMEOUT", str(timeout))),
+        "timeout_arg": timeout_arg,
+        "max_retries": int(os.getenv(f"{prefix}_MAX_RETRIES", str(max_retries))),
+        "base_delay": 0.5,
+        "max_delay": 20.0,
+        "hedge": provider in _HEDGED_PROVIDERS,
+        "hedge_min_samples": 20,   # p95 계산에 필요한 최소 성공 호출 수
+        "failure_threshold": 5,
+        "reset_timeout": 30.0,
+    }
+
+_policies: Dict[str, Dict[str, Any]] = {
+    "openai": _policy("openai", timeout=60.0, max_retries=3, timeout_arg="timeout"),
+    "tavily": _policy("tavily", timeout=20.0, max_retries=2, timeout_arg="timeout"),
+    "pinecone": _policy("pinecone", timeout=10.0, max_retries=2, timeout_arg="_request_timeout"),
+}
+# 헤징한 동기 호출을 실행하는 스레드 수 (먼저 끝난 응답을 쓰고, 진 요청도 SDK 제한 시간 안에 끝남)
+_HEDGE_WORKERS = int(os.getenv("RESILIENCE_HEDGE_WORKERS", "16"))
+
+class CircuitOpenError(RuntimeError):
+    """회로 차단기가 열려 있어 호출하지 않고 바로 실패할 때 발생"""
+
+class CallTimeoutError(TimeoutError):
+    """시도 한 번이 제한 시간을 넘었을 때 발생"""
+
+class CircuitBreaker:
+    """
+    제공자별 회로 차단기.
+
+    연속으로 failure_threshold번 일시적 오류(429, 5xx, 시간 초과, 연결 오류)가 나면 열리고,
+    reset_timeout 동안 모든 호출을 CircuitOpenError로 바로 실패시킵니다. 그 뒤 시험 호출 하나를 보내
+    성공하면 닫히고 실패하면 다시 열립니다.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "open":
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(f"{self.name} 회로 차단 중 ({remaining:.1f}초 후 재시도)")
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open":
+                if self._probing:
+                    raise CircuitOpenError(f"{self.name} 회로 차단 해제 확인 중")
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"{self.name} 회로 차단 해제")
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"{self.name} 회로 차단: 연속 실패 {self.failures}회")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+class LatencyTracker:
+    """최근 성공 호출의 지연 시간 (헤징 지연 계산용 p95)"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_trackers: Dict[str, LatencyTracker] = {}
+_registry_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+
+def configure_resilience(provider: Optional[str] = None, timeout: Optional[float] = None,
+                         max_retries: Optional[int] = None, hedge: Optional[bool] = None,
+                         failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+    """
+    호출 정책을 변경합니다. provider가 None이면 모든 제공자에 적용하고, 생략한 항목은 기존 값을 유지합니다.
+
+    회로 차단기는 새 설정으로 다시 만들어집니다.
+    """
+    options = {"timeout": timeout, "max_retries": max_retries, "hedge": hedge,
+               "failure_threshold": failure_threshold, "reset_timeout": reset_timeout}
+    for name in ([provider] if provider else list(_policies)):
+        policy = _policies.setdefault(name, _policy(name, timeout=30.0, max_retries=2))
+        for key, value in options.items():
+            if value is not None:
+                policy[key] = value
+    with _registry_lock:
+        _breakers.clear()
+
+def _breaker(provider: str) -> CircuitBreaker:
+    with _registry_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            policy = _policies[provider]
+            breaker = _breakers[provider] = CircuitBreaker(provider, policy["failure_threshold"], policy["reset_timeout"])
+        return breaker
+
+def _tracker(provider: str) -> LatencyTracker:
+    with _registry_lock:
+        return _trackers.setdefault(provider, LatencyTracker())
+
+def _count(provider: str, name: str):
+    with _stats_lock:
+        counters = _stats.setdefault(provider, {
+            "calls": 0, "retries": 0, "timeouts": 0, "hedged": 0, "hedge_wins": 0, "circuit_open": 0, "failures": 0,
+        })
+        counters[name] += 1
+    span = current_span()
+    if span is not None and name != "calls":
+        span.add(name)
+
+def _status_code(error: Exception) -> Optional[int]:
+    for attr in ("status_code", "status", "http_status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+def is_retryable(error: Exception) -> bool:
+    """일시적인 오류(429, 408, 5xx, 시간 초과, 연결 오류)인지 판별합니다. 잘못된 요청/인증 오류는 재시도하지 않습니다."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    if is_rate_limit_error(error):
+        return True
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+def backoff_delay(policy: Dict[str, Any], attempt: int, retry_after: Optional[float] = None) -> float:
+    """full jitter 지수 백오프 대기 시간. Retry-After가 있으면 그보다 짧게 기다리지 않습니다."""
+    delay = random.uniform(0, min(policy["max_delay"], policy["base_delay"] * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, policy["max_delay"] * 3))
+    return delay
+
+def _hedge_delay(provider: str, policy: Dict[str, Any], hedge: bool) -> Optional[float]:
+    if not (hedge and policy["hedge"]):
+        return None
+    delay = _tracker(provider).percentile(0.95, policy["hedge_min_samples"])
+    return delay if delay is not None and delay < policy["timeout"] else None
+
+def _is_timeout(error: Exception) -> bool:
+    # SDK마다 시간 초과 예외가 다름 (openai.APITimeoutError, requests ReadTimeout, urllib3 ReadTimeoutError 등)
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError)) or "Timeout" in type(error).__name__
+
+def _after_failure(provider: str, policy: Dict[str, Any], breaker: CircuitBreaker, error: Exception,
+                   attempt: int, quota: Optional[Tuple[str, int]]) -> Optional[float]:
+    """실패한 시도를 기록하고, 재시도하면 대기 시간을, 포기하면 None을 반환합니다."""
+    if _is_timeout(error):
+        _count(provider, "timeouts")
+    if quota is not None and is_rate_limit_error(error):
+        # 한도를 잘못 알고 있거나 다른 프로세스와 한도를 나눠 쓰는 경우 - 같은 키의 모든 요청을 멈춤
+        quota_limiter.on_throttle(quota[0], get_retry_after(error))
+    if not is_retryable(error):
+        # 제공자는 응답했으므로 (잘못된 요청 등) 회로 차단 대상이 아님
+        breaker.record_success()
+        return None
+    breaker.record_failure()
+    if attempt >= policy["max_retries"]:
+        _count(provider, "failures")
+        return None
+    _count(provider, "retries")
+    delay = backoff_delay(policy, attempt, get_retry_after(error))
+    logger.warning(f"{provider} 호출 실패, {delay:.2f}초 후 재시도 ({attempt + 1}/{policy['max_retries']}): {str(error)[:200]}")
+    return delay
+
+def _acquire(quota: Optional[Tuple[str, int]]):
+    """프로세스 전체 호출 한도 안에서 보낼 수 있을 때까지 기다립니다. (현재 노드의 우선순위 사용)"""
+    if quota is None or not is_rate_limiting_enabled():
+        return
+    span = current_span()
+    waited = quota_limiter.acquire(quota[0], quota[1], node_priority(span.node if span is not None else None))
+    if waited > 0.001 and span is not None:
+        span.add("rate_limit_wait_ms", round(waited * 1000, 1))
+
+async def _aacquire(quota: Optional[Tuple[str, int]]):
+    if quota is None or not is_rate_limiting_enabled():
+        return
+    span = current_span()
+    waited = await quota_limiter.aacquire(quota[0], quota[1], node_priority(span.node if span is not None else None))
+    if waited > 0.001 and span is not None:
+        span.add("rate_limit_wait_ms", round(waited * 1000, 1))
+
+def _call_before(provider: str, policy: Dict[str, Any], deadline: float, fn: Callable, args, kwargs):
+    """
+    남은 시간을 SDK의 요청별 제한 시간으로 넘겨 호출합니다.
+
+    시간이 지나면 SDK가 연결을 닫고 예외를 발생시키므로, 시간 초과한 시도가 연결이나 호출 한도를 계속 잡고 있지 않습니다.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise CallTimeoutError(f"{provider} 호출 시간 초과")
+    arg = policy.get("timeout_arg")
+    if arg and arg not in kwargs:
+        kwargs = {**kwargs, arg: remaining}
+    return fn(*args, **kwargs)
+
+def _gated_before(quota: Optional[Tuple[str, int]], provider: str, policy: Dict[str, Any], deadline: float,
+                  fn: Callable, args, kwargs):
+    _acquire(quota)
+    return _call_before(provider, policy, deadline, fn, args, kwargs)
+
+async def _agated(quota: Optional[Tuple[str, int]], fn: Callable, *args, **kwargs):
+    await _aacquire(quota)
+    return await fn(*args, **kwargs)
+
+def _executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _registry_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=_HEDGE_WORKERS, thread_name_prefix="resilient-hedge")
+        return _hedge_executor
+
+def _submit(fn: Callable, *args) -> Future:
+    """헤징용 스레드 풀에서 호출을 시작합니다. (스팬 컨텍스트 유지)"""
+    return _executor().submit(contextvars.copy_context().run, fn, *args)
+
+def _first_success(provider: str, futures: List[Future], deadline: float, backup: Optional[Future] = None):
+    pending = set(futures)
+    error: Optional[BaseException] = None
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is backup:
+                    _count(provider, "hedge_wins")
+                return future.result()
+            error = future.exception()
+    # 아직 시작하지 못한 요청은 취소 (실행 중인 요청은 SDK 제한 시간이 끝냄)
+    for future in pending:
+        future.cancel()
+    if error is not None and not pending:
+        raise error
+    raise CallTimeoutError(f"{provider} 호출 시간 초과")
+
+def _attempt(provider: str, policy: Dict[str, Any], fn: Callable, args, kwargs, hedge: bool,
+             quota: Optional[Tuple[str, int]]):
+    deadline = time.monotonic() + policy["timeout"]
+    hedge_delay = _hedge_delay(provider, policy, hedge)
+    if hedge_delay is None:
+        # 헤징하지 않으면 호출 스레드에서 바로 실행 (제한 시간은 SDK가 적용)
+        return _call_before(provider, policy, deadline, fn, args, kwargs)
+
+    primary = _submit(_call_before, provider, policy, deadline, fn, args, kwargs)
+    done, _ = wait([primary], timeout=hedge_delay)
+    if done:
+        return _first_success(provider, [primary], deadline)
+    _count(provider, "hedged")
+    backup = _submit(_gated_before, quota, provider, policy, deadline, fn, args, kwargs)
+    return _first_success(provider, [primary, backup], deadline, backup)
+
+def resilient_call(provider: str, fn: Callable, *args, hedge: bool = False,
+                   quota: Optional[Tuple[str, int]] = None, **kwargs):
+    """
+    외부 API 호출을 정책에 따라 실행합니다.
+
+    시도마다 제한 시간을 SDK의 요청별 제한 시간 인자로 적용하고 (헤징하지 않으면 호출 스레드에서 바로 실행), 일시적 오류는 Retry-After를 존중하는 지터 지수 백오프로 재시도합니다.
+    회로가 열려 있으면 CircuitOpenError로 바로 실패합니다. quota가 주어지면 시도마다 프로세스 전체 호출 한도
+    (agents.rate_limiter)를 현재 노드의 우선순위로 기다린 뒤 보냅니다. 재시도/시간 초과/헤징은 현재 스팬 속성과
+    get_resilience_stats()에 기록됩니다.
+
+    Args:
+        provider: 정책 이름 ("openai", "tavily", "pinecone")
+        fn: 호출할 함수 (나머지 인자를 그대로 전달)
+        hedge: 멱등 호출이면 True - 정책에서 헤징을 켰을 때만 중복 요청을 보냄
+        quota: (한도 키, 예상 토큰 수) - 예: ("openai:gpt-3.5-turbo-0125", 1200), ("tavily", 0)
+    """
+    policy = _policies[provider]
+    breaker = _breaker(provider)
+    _count(provider, "calls")
+    attempt = 0
+    while True:
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            _count(provider, "circuit_open")
+            raise
+        _acquire(quota)
+        started = time.perf_counter()
+        try:
+            result = _attempt(provider, policy, fn, args, kwargs, hedge, quota)
+        except Exception as e:
+            delay = _after_failure(provider, policy, breaker, e, attempt, quota)
+            if delay is None:
+                raise
+            attempt += 1
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        _tracker(provider).add(time.perf_counter() - started)
+        return result
+
+async def _afirst_success(provider: str, tasks: List["asyncio.Task"], deadline: float,
+                          backup: Optional["asyncio.Task"] = None):
+    pending = set(tasks)
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        _count(provider, "hedge_wins")
+                    return task.result()
+                error = task.exception()
+        if error is not None and not pending:
+            raise error
+        raise CallTimeoutError(f"{provider} 호출 시간 초과")
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def _aattempt(provider: str, policy: Dict[str, Any], fn: Callable, args, kwargs, hedge: bool,
+                    quota: Optional[Tuple[str, int]]):
+    deadline = time.monotonic() + policy["timeout"]
+    primary = asyncio.ensure_future(fn(*args, **kwargs))
+    hedge_delay = _hedge_delay(provider, policy, hedge)
+    if hedge_delay is None:
+        return await _afirst_success(provider, [primary], deadline)
+
+    done, _ = await asyncio.wait([primary], timeout=hedge_delay)
+    if done:
+        return await _afirst_success(provider, [primary], deadline)
+    _count(provider, "hedged")
+    backup = asyncio.ensure_future(_agated(quota, fn, *args, **kwargs))
+    return await _afirst_success(provider, [primary, backup], deadline, backup)
+
+async def aresilient_call(provider: str, fn: Callable, *args, hedge: bool = False,
+                          quota: Optional[Tuple[str, int]] = None, **kwargs):
+    """resilient_call()의 비동기 버전 - fn은 코루틴 함수이며, 시간 초과/헤징에서 진 요청은 취소됩니다."""
+    policy = _policies[provider]
+    breaker = _breaker(provider)
+    _count(provider, "calls")
+    attempt = 0
+    while True:
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            _count(provider, "circuit_open")
+            raise
+        await _aacquire(quota)
+        started = time.perf_counter()
+        try:
+            result = await _aattempt(provider, policy, fn, args, kwargs, hedge, quota)
+        except Exception as e:
+            delay = _after_failure(provider, policy, breaker, e, attempt, quota)
+            if delay is None:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        _tracker(provider).add(time.perf_counter() - started)
+        return result
+
+def read_stream(provider: str, stream) -> Iterator[Any]:
+    """
+    스트리밍 응답 조각을 읽되, 읽기 시작부터 정책의 제한 시간을 넘기면 CallTimeoutError를 발생시킵니다.
+
+    조각 사이에서 응답이 멈춘 경우는 요청에 넘긴 SDK 제한 시간(읽기 제한 시간)이 끊습니다.
+    """
+    deadline = time.monotonic() + _policies[provider]["timeout"]
+    for chunk in stream:
+        if time.monotonic() > deadline:
+            _count(provider, "timeouts")
+            raise CallTimeoutError(f"{provider} 스트림 읽기 시간 초과")
+        yield chunk
+
+async def aread_stream(provider: str, stream) -> AsyncIterator[Any]:
+    """read_stream()의 비동기 버전 - 제한 시간이 지나면 기다리던 조각 읽기를 취소합니다."""
+    deadline = time.monotonic() + _policies[provider]["timeout"]
+    iterator = stream.__aiter__()
+    while True:
+        try:
+            chunk = await asyncio.wait_for(iterator.__anext__(), max(deadline - time.monotonic(), 0))
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            _count(provider, "timeouts")
+            raise CallTimeoutError(f"{provider} 스트림 읽기 시간 초과") from None
+        yield chunk
+
+_EXTERNAL_SPAN_KINDS = ("llm", "search", "vector")
+
+def summarize_calls(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """
+    실행 하나의 스팬 기록에서 외부 호출(OpenAI, Tavily, 벡터 검색)별 호출/캐시 적중/재시도/시간 초과/
+    헤징/오류 수를 집계합니다. (실행 결과의 external_calls에 기록)
+    """
+    summary: Dict[str, Dict[str, int]] = {}
+    for record in spans:
+        if record.get("kind") not in _EXTERNAL_SPAN_KINDS:
+            continue
+        attrs = record.get("attrs") or {}
+        counters = summary.setdefault(record["name"], {
+            "calls": 0, "cache_hits": 0, "retries": 0, "timeouts": 0, "hedged": 0, "circuit_open": 0, "errors": 0,
+        })
+        counters["calls"] += 1
+        counters["cache_hits"] += int(bool(attrs.get("cache_hit") or attrs.get("coalesced")))
+        for key in ("retries", "timeouts", "hedged", "circuit_open"):
+            counters[key] += int(attrs.get(key, 0))
+        if record.get("status") == "error":
+            counters["errors"] += 1
+    return summary
+
+def get_resilience_stats() -> Dict[str, Any]:
+    """제공자별 호출/재시도/시간 초과/헤징/회로 차단 횟수와 회로 상태를 반환합니다."""
+    with _stats_lock:
+        stats = {provider: dict(counters) for provider, counters in _stats.items()}
+    with _registry_lock:
+        for provider, breaker in _breakers.items():
+            stats.setdefault(provider, {})["circuit"] = breaker.state
+    return stats
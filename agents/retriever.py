@@ -0,0 +1,227 @@
+import os
+import abc
+import json
+import asyncio
+import logging
+import argparse
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from agents.resilience import resilient_call
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 로컬 인덱스 파일 이름
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"
+
+class BaseRetriever(abc.ABC):
+    """
+    벡터 검색 백엔드 공통 인터페이스.
+
+    query()는 유사도 내림차순으로 정렬된 {"id", "score", "metadata"} 딕셔너리 목록을 반환합니다.
+    query()를 구현하지 않은 백엔드는 생성할 때 TypeError가 발생합니다.
+    """
+
+    backend = "base"
+
+    @abc.abstractmethod
+    def query(self, vector: Sequence[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        """쿼리 벡터와 가장 유사한 top_k개 벡터를 반환합니다."""
+
+    async def aquery(self, vector: Sequence[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        """query()의 비동기 버전 - 기본 구현은 블로킹 호출을 스레드에서 실행합니다."""
+        return await asyncio.to_thread(self.query, vector, top_k)
+
+class PineconeRetriever(BaseRetriever):
+    """Pinecone 원격 인덱스를 사용하는 백엔드"""
+
+    backend = "pinecone"
+
+    def __init__(self, index):
+        self.index = index
+
+    def query(self, vector: Sequence[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        if isinstance(vector, np.ndarray):
+            vector = vector.tolist()
+
+        results = resilient_call("pinecone", self.index.query, hedge=True,
+                                 vector=vector, top_k=top_k, include_metadata=True)
+        return [
+            {"id": match.id, "score": match.score, "metadata": dict(match.metadata or {})}
+            for match in results.matches
+        ]
+
+class LocalNumpyRetriever(BaseRetriever):
+    """
+    프로세스 내 NumPy 벡터 인덱스 백엔드.
+
+    정규화된 임베딩을 연속된 float32/float16 행렬로 디스크에 저장하고 메모리 맵으로 읽습니다.
+    검색은 행렬-벡터 곱 한 번과 argpartition으로 정확한 top-k 코사인 유사도를 계산합니다.
+    """
+
+    backend = "local"
+
+    def __init__(self, index_dir: str, mmap: bool = True):
+        self.index_dir = index_dir
+        self.matrix = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r" if mmap else None)
+
+        with open(os.path.join(index_dir, METADATA_FILE), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self.ids = [record["id"] for record in records]
+        self.metadata = [record["metadata"] for record in records]
+
+        if len(self.ids) != self.matrix.shape[0]:
+            raise ValueError(
+                f"로컬 인덱스가 손상되었습니다: 벡터 {self.matrix.shape[0]}개, 메타데이터 {len(self.ids)}개"
+            )
+        logger.info(f"로컬 벡터 인덱스 로드 완료: {index_dir} ({self.matrix.shape[0]}개, {self.matrix.dtype})")
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    async def aquery(self, vector: Sequence[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        # 프로세스 내 행렬 연산은 충분히 빠르므로 스레드 전환 없이 바로 실행
+        return self.query(vector, top_k)
+
+    def query(self, vector: Sequence[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        size = self.matrix.shape[0]
+        if size == 0 or top_k <= 0:
+            return []
+
+        query_vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query_vec)
+        if norm > 0:
+            query_vec = query_vec / norm
+
+        # 행렬이 이미 정규화되어 있으므로 내적이 곧 코사인 유사도
+        scores = self.matrix.dot(query_vec.astype(self.matrix.dtype, copy=False)).astype(np.float32)
+
+        k = min(top_k, size)
+        if k < size:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(size)
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [
+            {"id": self.ids[i], "score": float(scores[i]), "metadata": dict(self.metadata[i])}
+            for i in order
+        ]
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """각 행을 L2 정규화합니다. (영벡터는 그대로 둠)"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+def save_local_index(index_dir: str, ids: List[str], embeddings: np.ndarray,
+                     metadatas: List[Dict[str, Any]], dtype: str = "float32"):
+    """
+    임베딩과 메타데이터를 로컬 인덱스 디렉터리에 저장합니다.
+
+    Args:
+        index_dir: 저장할 디렉터리
+        ids: 벡터 ID 목록
+        embeddings: (N, d) 임베딩 행렬
+        metadatas: 벡터별 메타데이터 목록
+        dtype: 저장할 자료형 ("float32" 또는 "float16")
+    """
+    if not (len(ids) == len(metadatas) == len(embeddings)):
+        raise ValueError("ids, embeddings, metadatas의 길이가 일치하지 않습니다.")
+
+    os.makedirs(index_dir, exist_ok=True)
+    matrix = np.ascontiguousarray(normalize_embeddings(embeddings).astype(dtype))
+
+    # 기존 인덱스를 읽고 있는 프로세스가 있을 수 있으므로 임시 파일에 쓴 뒤 교체
+    tmp_embeddings = os.path.join(index_dir, EMBEDDINGS_FILE + ".tmp")
+    with open(tmp_embeddings, "wb") as f:
+        np.save(f, matrix)
+    os.replace(tmp_embeddings, os.path.join(index_dir, EMBEDDINGS_FILE))
+
+    tmp_metadata = os.path.join(index_dir, METADATA_FILE + ".tmp")
+    with open(tmp_metadata, "w", encoding="utf-8") as f:
+        json.dump([{"id": i, "metadata": m} for i, m in zip(ids, metadatas)], f, ensure_ascii=False)
+    os.replace(tmp_metadata, os.path.join(index_dir, METADATA_FILE))
+
+    logger.info(f"로컬 벡터 인덱스 저장 완료: {index_dir} ({matrix.shape[0]}개, {matrix.dtype})")
+
+def build_local_index_from_csv(csv_path: str, index_dir: str, model=None,
+                               dtype: str = "float32", batch_size: int = 256, preprocess: bool = True):
+    """
+    스타트업 CSV(startup, text)로부터 로컬 인덱스를 생성합니다.
+
+    메타데이터 형식은 pinecone_upload.py와 동일하게 name/summary(+ 신뢰도가 충분하면 domain)를 사용합니다.
+    preprocess가 True이면 agents.preprocess로 보일러플레이트를 제거하고 스타트업별 청크로 묶습니다.
+    """
+    import pandas as pd
+
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+
+    if preprocess:
+        from agents.preprocess import preprocess_startup_csv
+        df, _ = preprocess_startup_csv(csv_path)
+    else:
+        df = pd.read_csv(csv_path)
+    df = df.rename(columns={"startup": "name", "text": "summary"})
+    df = df.dropna(subset=["name", "summary"])
+
+    from agents.embedding_service import as_embedding_service
+
+    summaries = df["summary"].astype(str).tolist()
+    service = as_embedding_service(model)
+    embeddings = service.encode_many(summaries, batch_size=batch_size)
+
+    ids = [str(i) for i in range(len(df))]
+    metadatas = [{"name": str(name), "summary": str(summary)} for name, summary in zip(df["name"], summaries)]
+
+    # 스타트업별 도메인을 미리 분류해 메타데이터에 기록 (검색 시 도메인 추출 호출 불필요)
+    from agents.domain_classifier import DomainClassifier, classify_by_name
+    names = [m["name"] for m in metadatas]
+    domains = classify_by_name(DomainClassifier(service.encode_many), names, embeddings)
+    for metadata in metadatas:
+        if metadata["name"] in domains:
+            metadata["domain"] = domains[metadata["name"]]
+    save_local_index(index_dir, ids, embeddings, metadatas, dtype=dtype)
+
+def create_retriever(backend: Optional[str] = None, pinecone_api_key: Optional[str] = None,
+                     index_name: str = "startup-index", local_index_dir: Optional[str] = None) -> BaseRetriever:
+    """
+    설정에 따라 벡터 검색 백엔드를 생성합니다.
+
+    Args:
+        backend: "pinecone" 또는 "local" (None이면 RETRIEVER_BACKEND 환경 변수, 기본값 pinecone)
+        pinecone_api_key: Pinecone API 키 (pinecone 백엔드)
+        index_name: Pinecone 인덱스 이름 (pinecone 백엔드)
+        local_index_dir: 로컬 인덱스 디렉터리 (local 백엔드, 기본값 LOCAL_INDEX_DIR 또는 data/local_index)
+    """
+    backend = (backend or os.getenv("RETRIEVER_BACKEND", "pinecone")).lower()
+
+    if backend == "pinecone":
+        from agents.clients import get_pinecone_index
+
+        return PineconeRetriever(get_pinecone_index(index_name, pinecone_api_key))
+
+    if backend == "local":
+        index_dir = local_index_dir or os.getenv("LOCAL_INDEX_DIR", os.path.join("data", "local_index"))
+        return LocalNumpyRetriever(index_dir)
+
+    raise ValueError(f"지원하지 않는 검색 백엔드입니다: {backend} (pinecone 또는 local)")
+
+# 로컬 인덱스 생성 CLI
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="스타트업 CSV로 로컬 벡터 인덱스 생성")
+    parser.add_argument("--csv", type=str, default=os.path.join("data", "startup_data.csv"), help="입력 CSV 경로")
+    parser.add_argument("--out", type=str, default=os.path.join("data", "local_index"), help="인덱스 저장 디렉터리")
+    parser.add_argument("--dtype", type=str, default="float32", choices=["float32", "float16"], help="저장 자료형")
+    parser.add_argument("--no-preprocess", action="store_true", help="전처리 없이 원본 조각을 그대로 색인")
+    args = parser.parse_args()
+
+    build_local_index_from_csv(args.csv, args.out, dtype=args.dtype, preprocess=not args.no_preprocess)
@@ -0,0 +1,224 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+import unicodedata
+from concurrent.futures import Future
+from typing import Dict, Any, Optional
+
+from agents.disk_cache import DiskCache
+from agents.resilience import aresilient_call, resilient_call
+from agents.tracing import span
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """
+    검색어를 정규화합니다.
+
+    유니코드 정규화(NFKC), 대소문자 통일, 공백 정리만 하여 표기만 다른 같은 검색어가 같은 키를 갖도록 합니다.
+    어순, 반복된 토큰, 기호("C++" 등)는 검색 결과를 바꿀 수 있으므로 그대로 둡니다.
+    """
+    text = unicodedata.normalize("NFKC", query or "").casefold()
+    return " ".join(text.split())
+
+def _parse_domain_ttls(raw: str) -> Dict[str, float]:
+    """'AI=86400,헬스케어=604800' 형식의 문자열을 도메인별 TTL 딕셔너리로 변환합니다."""
+    ttls = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        domain, seconds = item.split("=", 1)
+        ttls[domain.strip()] = float(seconds)
+    return ttls
+
+class CachedSearchClient:
+    """
+    Tavily 검색 클라이언트 래퍼 - 정규화된 검색어 기준의 디스크 캐시와 동시 요청 병합을 제공합니다.
+
+    - 같은 검색어의 결과는 도메인별 TTL 동안 디스크 캐시에서 바로 반환합니다.
+    - 여러 스레드가 같은 검색어를 동시에 요청하면 한 번의 HTTP 호출 결과를 공유합니다.
+    """
+
+    def __init__(self, client, cache_path: str = os.path.join(".cache", "search_cache.sqlite"),
+                 default_ttl: float = 3 * 24 * 3600, domain_ttls: Optional[Dict[str, float]] = None,
+                 max_entries: int = 20000, enabled: bool = True, async_client=None):
+        self.client = client
+        self.async_client = async_client
+        self.default_ttl = default_ttl
+        self.domain_ttls = domain_ttls or {}
+        self.enabled = enabled
+        self.cache = DiskCache(cache_path, ttl_seconds=default_ttl, max_entries=max_entries) if enabled else None
+
+        self._inflight: Dict[str, Future] = {}
+        self._async_inflight: Dict[tuple, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "api_calls": 0, "errors": 0}
+
+    def ttl_for(self, domain: Optional[str]) -> float:
+        """도메인에 적용할 캐시 TTL(초)을 반환합니다."""
+        if domain and domain in self.domain_ttls:
+            return self.domain_ttls[domain]
+        return self.default_ttl
+
+    def make_key(self, query: str, **kwargs) -> str:
+        payload = {"query": normalize_query(query), "params": kwargs}
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def search(self, query: str, domain: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Tavily 검색을 수행합니다. 캐시 또는 진행 중인 동일 요청이 있으면 재사용합니다.
+
+        Args:
+            query: 검색어
+            domain: 스타트업 도메인 (캐시 TTL 결정에 사용)
+            **kwargs: TavilyClient.search에 그대로 전달할 인자 (예: search_depth)
+        """
+        with span("tavily.search", kind="search", query=query) as search_span:
+            return self._search(search_span, query, domain, **kwargs)
+
+    def _search(self, search_span, query: str, domain: Optional[str], **kwargs) -> Dict[str, Any]:
+        self._count("requests")
+        key = self.make_key(query, **kwargs)
+
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("cache_hits")
+                search_span.set(cache_hit=True)
+                return json.loads(cached.decode("utf-8"))
+
+        # 같은 키로 진행 중인 요청이 있으면 그 결과를 기다린다
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            search_span.set(coalesced=True)
+            return future.result()
+
+        try:
+            # 캐시 조회 직후 다른 요청이 완료되었을 수 있으므로 한 번 더 확인
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                self._count("cache_hits")
+                search_span.set(cache_hit=True)
+                result = json.loads(cached.decode("utf-8"))
+                future.set_result(result)
+                return result
+
+            self._count("api_calls")
+            result = resilient_call("tavily", self.client.search, hedge=True, quota=("tavily", 0),
+                                    query=query, **kwargs)
+            if self.cache is not None:
+                self.cache.set(key, json.dumps(result, ensure_ascii=False).encode("utf-8"),
+                               ttl_seconds=self.ttl_for(domain))
+            future.set_result(result)
+            return result
+        except Exception as e:
+            self._count("errors")
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def asearch(self, query: str, domain: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """
+        search()의 비동기 버전 - 비동기 HTTP 클라이언트를 사용하며 같은 디스크 캐시를 공유합니다.
+
+        같은 이벤트 루프에서 동시에 들어온 같은 검색어 요청은 한 번의 HTTP 호출 결과를 공유합니다.
+        """
+        if self.async_client is None:
+            raise RuntimeError("비동기 검색 클라이언트가 설정되지 않았습니다.")
+
+        with span("tavily.search", kind="search", query=query) as search_span:
+            return await self._asearch(search_span, query, domain, **kwargs)
+
+    async def _asearch(self, search_span, query: str, domain: Optional[str], **kwargs) -> Dict[str, Any]:
+        self._count("requests")
+        key = self.make_key(query, **kwargs)
+
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("cache_hits")
+                search_span.set(cache_hit=True)
+                return json.loads(cached.decode("utf-8"))
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (id(loop), key)
+        future = self._async_inflight.get(inflight_key)
+        if future is not None:
+            self._count("coalesced")
+            search_span.set(coalesced=True)
+            # 공유 결과를 기다리는 쪽이 취소되어도 원래 요청은 계속 진행되도록 shield
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._async_inflight[inflight_key] = future
+        try:
+            self._count("api_calls")
+            result = await aresilient_call("tavily", self.async_client.search, hedge=True, quota=("tavily", 0),
+                                           query=query, **kwargs)
+            if self.cache is not None:
+                self.cache.set(key, json.dumps(result, ensure_ascii=False).encode("utf-8"),
+                               ttl_seconds=self.ttl_for(domain))
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self._count("errors")
+            future.set_exception(e)
+            # 기다리는 쪽이 없으면 "예외를 가져가지 않았다"는 경고가 나지 않도록 소비
+            future.exception()
+            raise
+        finally:
+            self._async_inflight.pop(inflight_key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """요청 수, 캐시 적중, 병합된 요청, 실제 API 호출 수와 절약된 호출 수를 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["saved_calls"] = stats["cache_hits"] + stats["coalesced"]
+        return stats
+
+# 프로세스 전역 검색 클라이언트
+_search_client: Optional[CachedSearchClient] = None
+_search_client_lock = threading.Lock()
+
+def get_search_client() -> CachedSearchClient:
+    """market_researcher와 competitor_analyzer가 공유하는 검색 클라이언트를 반환합니다."""
+    global _search_client
+    with _search_client_lock:
+        if _search_client is None:
+            from agents.clients import get_async_tavily_client, get_tavily_client
+
+            _search_client = CachedSearchClient(
+                get_tavily_client(),
+                async_client=get_async_tavily_client(),
+                cache_path=os.getenv("SEARCH_CACHE_PATH", os.path.join(".cache", "search_cache.sqlite")),
+                default_ttl=float(os.getenv("SEARCH_CACHE_TTL", str(3 * 24 * 3600))),
+                domain_ttls=_parse_domain_ttls(os.getenv("SEARCH_CACHE_DOMAIN_TTLS", "")),
+                enabled=os.getenv("SEARCH_CACHE", "1") != "0",
+            )
+        return _search_client
+
+def get_search_stats() -> Dict[str, Any]:
+    """공유 검색 클라이언트의 통계를 반환합니다. (아직 사용되지 않았으면 빈 딕셔너리)"""
+    return _search_client.get_stats() if _search_client is not None else {}
@@ -1,39 +1,90 @@
 import os
+import asyncio
 import logging
-from typing import Dict, Any
-from openai import OpenAI
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
-from langgraph.graph import StateGraph
+import threading
+from typing import Dict, Any, List, Optional
 
 # state_definitions.py에서 정의한 상태 가져오기
 from state_definitions import InvestmentState, CandidateDocument
+from agents.clients import get_async_openai_client, get_openai_client
+from agents.llm_client import chat_completion, achat_completion
+from agents.retriever import create_retriever
+from agents.embedding_service import EmbeddingService
+from agents.prompt_budget import set_sentence_encoder
+from agents.tracing import span
+from agents.domain_classifier import create_domain_classifier, get_confidence_threshold, record_outcome
+from agents.startup_profiler import profiler
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # 글로벌 변수로 데이터/모델 초기화
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 embedding_model = None  # 임베딩 모델
-pinecone_index = None  # Pinecone 인덱스
+embedding_service = None  # 캐시/마이크로 배치를 제공하는 임베딩 서비스
+retriever = None  # 벡터 검색 백엔드 (Pinecone 또는 로컬 NumPy 인덱스)
 openai_client = None  # OpenAI 클라이언트
+async_openai_client = None  # 비동기 노드용 AsyncOpenAI 클라이언트
+domain_classifier = None  # 임베딩 기반 도메인 분류기 (처음 필요할 때 생성)
+_domain_classifier_lock = threading.Lock()
+
+# 후보 검색 설정 (configure_retrieval로 변경)
+retrieval_config = {
+    "top_k": int(os.getenv("RETRIEVAL_TOP_K", "20")),             # 벡터 검색으로 가져올 조각 수
+    "aggregation": os.getenv("RETRIEVAL_AGGREGATION", "rrf"),     # 스타트업별 점수 집계 방식: max, sum, rrf
+    "max_candidates": int(os.getenv("RETRIEVAL_MAX_CANDIDATES", "5")),  # 반환할 후보 스타트업 수
+    "rrf_k": 60,                                                  # reciprocal rank fusion 상수
+    "summary_fragments": 3,                                       # 후보 요약에 사용할 상위 조각 수
+}
+
+def configure_retrieval(top_k: Optional[int] = None, aggregation: Optional[str] = None,
+                        max_candidates: Optional[int] = None):
+    """후보 검색 설정을 변경합니다. 생략한 항목은 기존 값을 유지합니다."""
+    if aggregation is not None and aggregation not in AGGREGATIONS:
+        raise ValueError(f"지원하지 않는 집계 방식입니다: {aggregation} ({', '.join(AGGREGATIONS)})")
+    for key, value in (("top_k", top_k), ("aggregation", aggregation), ("max_candidates", max_candidates)):
+        if value is not None:
+            retrieval_config[key] = value
 
 # 초기화 함수
-def init_resources(pinecone_api_key: str, openai_api_key: str, index_name: str):
-    """필요한 리소스 초기화"""
-    global embedding_model, pinecone_index, openai_client
+def init_resources(pinecone_api_key: Optional[str], openai_api_key: str, index_name: str,
+                   retriever_backend: Optional[str] = None, local_index_dir: Optional[str] = None):
+    """
+    필요한 리소스 초기화
+    
+    retriever_backend가 None이면 RETRIEVER_BACKEND 환경 변수(기본값 pinecone)를 따릅니다.
+    """
+    global embedding_model, embedding_service, retriever, openai_client, async_openai_client
+    
+    # 무거운 의존성은 실제로 초기화할 때 임포트 (CLI --help 등이 빠르게 동작하도록)
+    from sentence_transformers import SentenceTransformer
     
-    # OpenAI 설정
-    openai_client = OpenAI(api_key=openai_api_key)
+    # OpenAI 설정 (다른 노드와 같은 공유 클라이언트 사용)
+    openai_client = get_openai_client(openai_api_key)
+    async_openai_client = get_async_openai_client(openai_api_key)
     
-    # 임베딩 모델 로드
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+    # 임베딩 모델 로드 (쿼리 임베딩은 캐시/마이크로 배치 서비스를 거침)
+    with profiler.phase("startup_explorer.load_embedding_model"):
+        embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    embedding_service = EmbeddingService(
+        embedding_model,
+        EMBEDDING_MODEL_NAME,
+        cache_path=os.getenv("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embedding_cache.sqlite"))
+    )
+    # 프롬프트 압축 시 문장 관련도 계산에 같은 임베딩 모델 사용 (문장은 재사용이 드물어 캐시하지 않음)
+    set_sentence_encoder(lambda texts: embedding_service.encode_many(texts, use_cache=False))
     
-    # Pinecone 클라이언트 초기화
-    pc = Pinecone(api_key=pinecone_api_key)
-    pinecone_index = pc.Index(index_name)
+    # 벡터 검색 백엔드 초기화
+    with profiler.phase("startup_explorer.create_retriever"):
+        retriever = create_retriever(
+            backend=retriever_backend,
+            pinecone_api_key=pinecone_api_key,
+            index_name=index_name,
+            local_index_dir=local_index_dir
+        )
     
-    logger.info(f"리소스 초기화 완료. 인덱스: {index_name}")
+    logger.info(f"리소스 초기화 완료. 검색 백엔드: {retriever.backend}, 인덱스: {index_name}")
 
 # 스타트업 탐색 함수
 def startup_exploration(state: InvestmentState) -> InvestmentState:
@@ -43,8 +94,33 @@ def startup_exploration(state: InvestmentState) -> InvestmentState:
     # 사용자 쿼리 가져오기 (검색 키워드 또는 관심 도메인)
     user_query = state.get("user_query", "AI 스타트업")
     
-    # 1. 관련 스타트업 검색 - Pinecone 벡터 검색 사용
-    candidate_startup = search_related_startup(user_query)
+    # 1. 관련 스타트업 검색 - 벡터 검색 한 번으로 후보 목록을 만들고 1순위 후보를 평가 대상으로 사용
+    candidates = search_candidate_startups(user_query)
+    return _apply_candidates(state, user_query, candidates)
+
+async def startup_exploration_async(state: InvestmentState) -> InvestmentState:
+    """
+    startup_exploration의 비동기 버전 - 임베딩/벡터 검색/도메인 추출을 이벤트 루프를 막지 않고 수행합니다.
+    """
+    user_query = state.get("user_query", "AI 스타트업")
+    candidates = await search_candidate_startups_async(user_query)
+    return _apply_candidates(state, user_query, candidates)
+
+def _apply_candidates(state: InvestmentState, user_query: str, candidates: List[Dict[str, Any]]) -> InvestmentState:
+    """검색된 후보 목록을 상태에 기록하고 1순위 후보를 평가 대상으로 설정합니다."""
+    candidate_startup = candidates[0] if candidates else {}
+    
+    # 후보 목록 저장
+    state["candidates_documents"] = [
+        CandidateDocument(
+            user_query=user_query,
+            name=candidate.get("name", ""),
+            summary=candidate.get("summary", ""),
+            domain=candidate.get("domain") or "기술",
+            score=candidate.get("score")
+        ).dict()
+        for candidate in candidates
+    ]
     
     # 후보 스타트업이 없다면 기본 정보 설정
     if not candidate_startup:
@@ -68,7 +144,7 @@ def startup_exploration(state: InvestmentState) -> InvestmentState:
         # Pinecone에서 찾은 스타트업 정보 활용
         startup_name = candidate_startup.get("name", "")
         startup_summary = candidate_startup.get("summary", "")
-        startup_domain = candidate_startup.get("domain", "기술")
+        startup_domain = candidate_startup.get("domain") or "기술"
         
         # 3. CandidateDocument 생성
         candidate_doc = CandidateDocument(
@@ -92,7 +168,7 @@ def startup_exploration(state: InvestmentState) -> InvestmentState:
             user_query=user_query,
             name=candidate_startup.get("name", "알 수 없음"),
             summary="정보 처리 중 오류가 발생했습니다.",
-            domain=candidate_startup.get("domain", "기술")
+            domain=candidate_startup.get("domain") or "기술"
         )
         
         # 상태 업데이트
@@ -101,59 +177,154 @@ def startup_exploration(state: InvestmentState) -> InvestmentState:
     
     return state
 
-# 관련 스타트업 검색 함수
-def search_related_startup(query: str) -> Dict[str, Any]:
-    """Pinecone에서 쿼리와 관련된 스타트업 검색"""
-    if embedding_model is None or pinecone_index is None:
+def _aggregate_max(hits: List[Dict[str, Any]]) -> float:
+    return max(hit["score"] for hit in hits)
+
+def _aggregate_sum(hits: List[Dict[str, Any]]) -> float:
+    return sum(hit["score"] for hit in hits)
+
+def _aggregate_rrf(hits: List[Dict[str, Any]]) -> float:
+    return sum(1.0 / (retrieval_config["rrf_k"] + hit["rank"]) for hit in hits)
+
+# 스타트업별 점수 집계 함수
+AGGREGATIONS = {
+    "max": _aggregate_max,
+    "sum": _aggregate_sum,
+    "rrf": _aggregate_rrf,
+}
+
+def aggregate_matches(matches: List[Dict[str, Any]], aggregation: str = "rrf") -> List[Dict[str, Any]]:
+    """
+    벡터 검색 결과(조각 단위)를 스타트업 name 기준으로 묶고 점수를 집계해 순위를 매깁니다.
+    
+    Args:
+        matches: retriever.query() 결과 (유사도 내림차순)
+        aggregation: 집계 방식 - max(최고 유사도), sum(유사도 합), rrf(reciprocal rank fusion)
+        
+    Returns:
+        집계 점수 내림차순으로 정렬된 후보 스타트업 목록
+    """
+    aggregate = AGGREGATIONS[aggregation]
+    
+    grouped = {}
+    for rank, match in enumerate(matches, 1):
+        metadata = match.get("metadata") or {}
+        name = metadata.get("name")
+        if not name:
+            continue
+        grouped.setdefault(name, []).append({"rank": rank, "score": match["score"], "metadata": metadata})
+    
+    candidates = []
+    for name, hits in grouped.items():
+        # 요약은 유사도가 높은 조각 순서로 중복 없이 이어 붙임
+        fragments = []
+        for hit in hits:
+            fragment = hit["metadata"].get("summary", "")
+            if fragment and fragment not in fragments:
+                fragments.append(fragment)
+        
+        domain = next((hit["metadata"]["domain"] for hit in hits if hit["metadata"].get("domain")), None)
+        candidates.append({
+            "name": name,
+            "summary": "\n".join(fragments[:retrieval_config["summary_fragments"]]),
+            "domain": domain,
+            "score": aggregate(hits),     # 집계 점수
+            "best_score": hits[0]["score"],  # 최고 유사도
+            "hits": len(hits),            # 검색된 조각 수
+        })
+    
+    candidates.sort(key=lambda c: (c["score"], c["best_score"]), reverse=True)
+    return candidates
+
+def _needs_domain(candidates: List[Dict[str, Any]]) -> bool:
+    # 평가 대상(1순위) 후보의 도메인이 없으면 추출이 필요
+    return bool(candidates) and (not candidates[0]["domain"] or candidates[0]["domain"] == "Unknown")
+
+# 후보 스타트업 검색 함수
+def search_candidate_startups(query: str, top_k: Optional[int] = None, aggregation: Optional[str] = None,
+                              max_candidates: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    벡터 인덱스(Pinecone 또는 로컬)에서 여러 조각을 검색한 뒤 스타트업별로 집계한 후보 목록을 반환합니다.
+    
+    생략한 인자는 retrieval_config 값을 사용합니다.
+    """
+    if embedding_service is None or retriever is None:
         logger.error("리소스가 초기화되지 않았습니다. init_resources()를 먼저 호출하세요.")
-        return {}
+        return []
+    
+    top_k = top_k or retrieval_config["top_k"]
+    aggregation = aggregation or retrieval_config["aggregation"]
+    max_candidates = max_candidates or retrieval_config["max_candidates"]
     
     try:
-        # 쿼리 임베딩 생성
-        query_embedding = embedding_model.encode(query).tolist()
-        
-        # Pinecone에서 가장 유사한 벡터 검색
-        results = pinecone_index.query(
-            vector=query_embedding,
-            top_k=1,  # 가장 유사한 1개만 가져오기
-            include_metadata=True
-        )
+        # 쿼리 임베딩 생성 (캐시 적중 시 모델 호출 없음, 동시 요청은 마이크로 배치로 묶임)
+        with span("embedding.encode", kind="embedding"):
+            query_embedding = embedding_service.encode(query)
+        
+        # 벡터 인덱스에서 유사한 조각 top_k개 검색 후 스타트업별로 집계
+        with span("vector.query", kind="vector", backend=retriever.backend, top_k=top_k) as vector_span:
+            matches = retriever.query(query_embedding, top_k=top_k)
+            vector_span.set(matches=len(matches))
+        candidates = aggregate_matches(matches, aggregation)[:max_candidates]
+        
+        # 평가 대상(1순위) 후보의 도메인이 없으면 추출
+        if _needs_domain(candidates):
+            candidates[0]["domain"] = extract_domain(candidates[0]["name"], candidates[0]["summary"])
         
-        # 결과가 있는지 확인
-        if results.matches and len(results.matches) > 0:
-            match = results.matches[0]
-            
-            # 메타데이터에서 필요한 정보 추출
-            if match.metadata and "name" in match.metadata:
-                startup_info = {
-                    "name": match.metadata.get("name", "Unknown"),
-                    "summary": match.metadata.get("summary", ""),
-                    "domain": match.metadata.get("domain", "기술"),
-                    "score": match.score  # 유사도 점수
-                }
-                
-                # 도메인이 없으면 기본 설정
-                if not startup_info["domain"] or startup_info["domain"] == "Unknown":
-                    startup_info["domain"] = extract_domain(startup_info["name"], startup_info["summary"])
-                
-                return startup_info
-        
-        # 결과가 없으면 빈 딕셔너리 반환
-        return {}
+        logger.info(f"쿼리 '{query}': 조각 {len(matches)}개 → 후보 스타트업 {len(candidates)}개 ({aggregation})")
+        return candidates
         
     except Exception as e:
         logger.error(f"스타트업 검색 중 오류 발생: {str(e)}")
-        return {}
+        return []
 
-# 도메인 추출 함수
-def extract_domain(name: str, summary: str) -> str:
-    """텍스트 정보에서 스타트업 도메인 추출"""
-    if openai_client is None:
-        logger.error("OpenAI 클라이언트가 초기화되지 않았습니다.")
-        return "기술"  # 기본 도메인
+async def search_candidate_startups_async(query: str, top_k: Optional[int] = None, aggregation: Optional[str] = None,
+                                          max_candidates: Optional[int] = None) -> List[Dict[str, Any]]:
+    """search_candidate_startups의 비동기 버전"""
+    if embedding_service is None or retriever is None:
+        logger.error("리소스가 초기화되지 않았습니다. init_resources()를 먼저 호출하세요.")
+        return []
+    
+    top_k = top_k or retrieval_config["top_k"]
+    aggregation = aggregation or retrieval_config["aggregation"]
+    max_candidates = max_candidates or retrieval_config["max_candidates"]
     
     try:
-        prompt = f"""
+        # 같은 루프의 다른 평가가 보낸 쿼리와 함께 마이크로 배치로 인코딩
+        with span("embedding.encode", kind="embedding"):
+            query_embedding = await embedding_service.aencode(query)
+        
+        with span("vector.query", kind="vector", backend=retriever.backend, top_k=top_k) as vector_span:
+            matches = await retriever.aquery(query_embedding, top_k=top_k)
+            vector_span.set(matches=len(matches))
+        candidates = aggregate_matches(matches, aggregation)[:max_candidates]
+        
+        if _needs_domain(candidates):
+            candidates[0]["domain"] = await extract_domain_async(candidates[0]["name"], candidates[0]["summary"])
+        
+        logger.info(f"쿼리 '{query}': 조각 {len(matches)}개 → 후보 스타트업 {len(candidates)}개 ({aggregation})")
+        return candidates
+        
+    except Exception as e:
+        logger.error(f"스타트업 검색 중 오류 발생: {str(e)}")
+        return []
+
+def encode_queries(queries: List[str]) -> List[Any]:
+    """여러 쿼리를 한 번의 배치로 인코딩합니다. (배치 평가 전 미리 캐시를 채울 때 사용)"""
+    if embedding_service is None:
+        logger.error("리소스가 초기화되지 않았습니다. init_resources()를 먼저 호출하세요.")
+        return []
+    return list(embedding_service.encode_many(queries))
+
+# 관련 스타트업 검색 함수
+def search_related_startup(query: str) -> Dict[str, Any]:
+    """벡터 인덱스에서 쿼리와 가장 관련된 스타트업 1개를 검색 (후보가 없으면 빈 딕셔너리)"""
+    candidates = search_candidate_startups(query)
+    return candidates[0] if candidates else {}
+
+# 도메인 추출 함수
+def _domain_messages(name: str, summary: str) -> List[Dict[str, str]]:
+    prompt = f"""
 다음은 '{name}'라는 스타트업에 관한 정보입니다:
 
 {summary}
@@ -163,17 +334,64 @@ def extract_domain(name: str, summary: str) -> str:
 
 한 단어로만 대답해주세요. 위 목록에 없다면 가장 근접한 것을 선택하거나 '기타'라고 답변하세요.
 """
-        response = openai_client.chat.completions.create(
+    return [
+        {"role": "system", "content": "당신은 스타트업 분석가입니다. 주어진 정보를 바탕으로 스타트업의 도메인을 분류하세요."},
+        {"role": "user", "content": prompt}
+    ]
+
+def get_domain_classifier():
+    """도메인 분류기를 처음 사용할 때 생성합니다. (기준 문장 임베딩은 임베딩 캐시에 저장됨)"""
+    global domain_classifier
+    with _domain_classifier_lock:
+        if domain_classifier is None and embedding_service is not None:
+            domain_classifier = create_domain_classifier(embedding_service.encode_many)
+        return domain_classifier
+
+def classify_domain_locally(name: str, summary: str) -> Optional[str]:
+    """로컬 분류기로 도메인을 정합니다. 신뢰도가 기준 미만이거나 분류할 수 없으면 None"""
+    try:
+        classifier = get_domain_classifier()
+        if classifier is None:
+            return None
+        domain, confidence = classifier.classify(name, summary)
+    except Exception as e:
+        logger.warning(f"로컬 도메인 분류 실패: {str(e)}")
+        return None
+    
+    if confidence < get_confidence_threshold():
+        logger.info(f"스타트업 '{name}'의 로컬 도메인 분류 신뢰도가 낮아 LLM을 사용합니다: {domain} ({confidence:.2f})")
+        record_outcome("llm_fallback")
+        return None
+    
+    record_outcome("local")
+    logger.info(f"스타트업 '{name}'의 도메인을 로컬 분류기로 '{domain}'(으)로 정했습니다. (신뢰도 {confidence:.2f})")
+    return domain
+
+def extract_domain(name: str, summary: str) -> str:
+    """
+    텍스트 정보에서 스타트업 도메인 추출
+    
+    임베딩 분류기의 신뢰도가 충분하면 그 결과를 쓰고, 낮을 때만 GPT를 호출합니다.
+    """
+    domain = classify_domain_locally(name, summary)
+    if domain:
+        return domain
+    
+    if openai_client is None:
+        logger.error("OpenAI 클라이언트가 초기화되지 않았습니다.")
+        return "기술"  # 기본 도메인
+    
+    try:
+        raw_output = chat_completion(
+            openai_client,
             model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "당신은 스타트업 분석가입니다. 주어진 정보를 바탕으로 스타트업의 도메인을 분류하세요."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=_domain_messages(name, summary),
             max_tokens=10,
-            temperature=0.3
+            temperature=0.3,
+            node="extract_domain"
         )
         
-        domain = response.choices[0].message.content.strip()
+        domain = raw_output.strip()
         logger.info(f"스타트업 '{name}'의 도메인으로 '{domain}'을(를) 추출했습니다.")
         return domain
         
@@ -181,26 +399,43 @@ def extract_domain(name: str, summary: str) -> str:
         logger.error(f"도메인 추출 중 오류 발생: {str(e)}")
         return "기술"  # 기본 도메인
 
-# 랭그래프 노드 생성 함수 - 메인에서 임포트할 때 사용
-def create_startup_exploration_agent():
-    from langgraph.graph import StateGraph
-    
-    graph = StateGraph(InvestmentState)
-    graph.add_node("startup_exploration", startup_exploration)
+async def extract_domain_async(name: str, summary: str) -> str:
+    """extract_domain의 비동기 버전"""
+    # 임베딩 계산은 CPU 작업이므로 스레드에서 실행
+    domain = await asyncio.to_thread(classify_domain_locally, name, summary)
+    if domain:
+        return domain
     
-    # 시작점과 종료점이 같은 단일 노드 그래프
-    graph.set_entry_point("startup_exploration")
-    graph.set_finish_point("startup_exploration")
+    if async_openai_client is None:
+        logger.error("OpenAI 클라이언트가 초기화되지 않았습니다.")
+        return "기술"  # 기본 도메인
     
-    return graph.compile()
+    try:
+        raw_output = await achat_completion(
+            async_openai_client,
+            model="gpt-3.5-turbo",
+            messages=_domain_messages(name, summary),
+            max_tokens=10,
+            temperature=0.3,
+            node="extract_domain"
+        )
+        
+        domain = raw_output.strip()
+        logger.info(f"스타트업 '{name}'의 도메인으로 '{domain}'을(를) 추출했습니다.")
+        return domain
+        
+    except Exception as e:
+        logger.error(f"도메인 추출 중 오류 발생: {str(e)}")
+        return "기술"  # 기본 도메인
 
 # 테스트 코드
 if __name__ == "__main__":
     # 환경 변수에서 API 키 가져오기
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    USE_PINECONE = os.getenv("RETRIEVER_BACKEND", "pinecone") == "pinecone"
     
-    if not PINECONE_API_KEY or not OPENAI_API_KEY:
+    if (USE_PINECONE and not PINECONE_API_KEY) or not OPENAI_API_KEY:
         logger.error("환경 변수에 API 키가 설정되지 않았습니다.")
         exit(1)
     
@@ -0,0 +1,127 @@
+import sys
+import time
+import builtins
+import importlib.util
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+class StartupProfiler:
+    """
+    시작 시간 프로파일러.
+
+    install() 이후 처음 로드되는 모듈마다 임포트 시간(하위 임포트 포함/제외)을 기록하고,
+    phase()로 감싼 초기화 단계(모델 로드, 클라이언트 생성, 그래프 컴파일 등)의 시간을 기록합니다.
+    """
+
+    def __init__(self):
+        self.installed = False
+        self.imports: Dict[str, Dict[str, float]] = {}
+        self.phases: List[Dict[str, Any]] = []
+        self._original_import = None
+        self._stack: List[List[float]] = []  # 진행 중인 임포트별 하위 임포트 누적 시간
+        self._started = time.perf_counter()
+
+    def install(self):
+        """builtins.__import__를 감싸 임포트 시간 기록을 시작합니다."""
+        if self.installed:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        self._started = time.perf_counter()
+        self.installed = True
+
+    def uninstall(self):
+        if self.installed:
+            builtins.__import__ = self._original_import
+            self.installed = False
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if threading.current_thread() is not threading.main_thread():
+            # 시작 단계 측정 대상은 메인 스레드 임포트뿐
+            return original(name, globals, locals, fromlist, level)
+
+        module_name = name
+        if level:
+            try:
+                package = (globals or {}).get("__package__") or ""
+                module_name = importlib.util.resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                return original(name, globals, locals, fromlist, level)
+
+        if module_name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        self._stack.append([0.0])
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._stack.pop()[0]
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            record = self.imports.setdefault(module_name, {"inclusive": 0.0, "self": 0.0})
+            record["inclusive"] += elapsed
+            record["self"] += elapsed - children
+
+    @contextmanager
+    def phase(self, name: str):
+        """초기화 단계 하나의 소요 시간을 기록합니다."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({"name": name, "seconds": time.perf_counter() - started})
+
+    def report(self, top: int = 20) -> Dict[str, Any]:
+        """
+        측정 결과를 반환합니다.
+
+        Returns:
+            total_sec: install() 이후 경과 시간
+            imports: 자체 시간 기준 상위 top개 모듈 (inclusive/self 초)
+            packages: 최상위 패키지별 자체 시간 합계
+            phases: 초기화 단계별 시간 (기록 순서)
+        """
+        packages: Dict[str, float] = {}
+        for module_name, record in self.imports.items():
+            root = module_name.split(".")[0]
+            packages[root] = packages.get(root, 0.0) + record["self"]
+
+        imports = sorted(self.imports.items(), key=lambda item: item[1]["self"], reverse=True)[:top]
+        return {
+            "total_sec": round(time.perf_counter() - self._started, 3),
+            "imports": [
+                {"module": name, "inclusive_sec": round(r["inclusive"], 4), "self_sec": round(r["self"], 4)}
+                for name, r in imports
+            ],
+            "packages": [
+                {"package": name, "self_sec": round(seconds, 4)}
+                for name, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+            ],
+            "phases": [{"name": p["name"], "seconds": round(p["seconds"], 4)} for p in self.phases],
+        }
+
+    def format_report(self, top: int = 20) -> str:
+        """report()를 콘솔 출력용 문자열로 만듭니다."""
+        data = self.report(top)
+        lines = ["=" * 50, f" 시작 시간 프로파일 (총 {data['total_sec']}초)", "=" * 50]
+
+        lines.append("▶ 패키지별 임포트 시간 (자체 시간 합계)")
+        for item in data["packages"]:
+            lines.append(f"  {item['self_sec'] * 1000:>9.1f}ms  {item['package']}")
+
+        lines.append(f"▶ 모듈별 임포트 시간 (상위 {top}개, 자체 / 하위 포함)")
+        for item in data["imports"]:
+            lines.append(f"  {item['self_sec'] * 1000:>9.1f}ms / {item['inclusive_sec'] * 1000:>9.1f}ms  {item['module']}")
+
+        lines.append("▶ 초기화 단계")
+        for item in data["phases"]:
+            lines.append(f"  {item['seconds'] * 1000:>9.1f}ms  {item['name']}")
+        lines.append("=" * 50)
+        return "\n".join(lines)
+
+# 프로세스 전역 프로파일러 (main.py --profile-startup에서 install)
+profiler = StartupProfiler()
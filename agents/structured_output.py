@@ -0,0 +1,192 @@
+import json
+import hashlib
+from typing import Dict, Any, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+class StructuredOutputError(Exception):
+    """복구 시도 후에도 응답이 스키마를 만족하지 않을 때 발생"""
+
+    def __init__(self, message: str, raw_output: str = ""):
+        super().__init__(message)
+        self.raw_output = raw_output
+
+class IncrementalJSONParser:
+    """
+    스트리밍으로 들어오는 JSON 객체를 조각 단위로 읽는 파서.
+
+    - 괄호 짝과 문자열 이스케이프를 추적해 최상위 객체가 닫히는 순간 complete가 됩니다.
+    - 괄호 짝이 맞지 않는 등 구조가 깨지면 error를 기록하고 더 읽지 않습니다.
+      (스트림을 끝까지 받지 않고 바로 복구 요청으로 넘어갈 수 있음)
+    - partial()은 지금까지 받은 내용을 닫아 최선의 부분 결과를 돌려줍니다.
+    - 최상위 '{' 이전의 텍스트(설명 문장, 코드 펜스 등)는 건너뜁니다.
+    """
+
+    _CLOSERS = {"{": "}", "[": "]"}
+
+    def __init__(self):
+        self._chars: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._last_comma: Optional[Tuple[int, str]] = None  # (위치, 그 시점에 필요한 닫는 괄호)
+        self.started = False
+        self.complete = False
+        self.error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chars)
+
+    @property
+    def done(self) -> bool:
+        """더 읽을 필요가 없는지 여부 (완료 또는 오류)"""
+        return self.complete or self.error is not None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        조각을 읽습니다.
+
+        Returns:
+            계속 읽어야 하면 True, 객체가 끝났거나 구조 오류가 나면 False
+        """
+        for ch in chunk:
+            if self.done:
+                break
+
+            if not self.started:
+                if ch != "{":
+                    continue
+                self.started = True
+
+            self._chars.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in self._CLOSERS:
+                self._stack.append(self._CLOSERS[ch])
+            elif ch in "}]":
+                if not self._stack or self._stack[-1] != ch:
+                    self.error = f"{len(self._chars) - 1}번째 문자 '{ch}'의 괄호 짝이 맞지 않습니다."
+                    break
+                self._stack.pop()
+                if not self._stack:
+                    self.complete = True
+            elif ch == ",":
+                self._last_comma = (len(self._chars) - 1, "".join(reversed(self._stack)))
+
+        return not self.done
+
+    def partial(self) -> Optional[Dict[str, Any]]:
+        """지금까지 받은 내용으로 만들 수 있는 최선의 부분 객체 (없으면 None)"""
+        if not self.started:
+            return None
+        if self.complete:
+            try:
+                return json.loads(self.text)
+            except ValueError:
+                return None
+
+        text = self.text
+        candidates = []
+        if not self._in_string:
+            candidates.append(text.rstrip().rstrip(",") + "".join(reversed(self._stack)))
+        if self._last_comma is not None:
+            position, closers = self._last_comma
+            candidates.append(text[:position] + closers)
+
+        for candidate in candidates:
+            try:
+                value = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(value, dict):
+                return value
+        return None
+
+    def result(self) -> Any:
+        """완성된 JSON 값을 반환합니다. 완성되지 않았거나 문법 오류가 있으면 ValueError"""
+        if self.error:
+            raise ValueError(self.error)
+        if not self.complete:
+            raise ValueError("JSON 객체가 끝나지 않았습니다." if self.started else "JSON 객체가 없습니다.")
+        return json.loads(self.text)
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    """$ref를 $defs 정의로 펼쳐 함수 호출 파라미터에 그대로 넣을 수 있는 스키마로 만듭니다."""
+    if isinstance(node, dict):
+        if "$ref" in node:
+            resolved = dict(defs[node["$ref"].split("/")[-1]])
+            resolved.update({k: v for k, v in node.items() if k != "$ref"})
+            return _inline_refs(resolved, defs)
+        return {k: _inline_refs(v, defs) for k, v in node.items() if k != "$defs"}
+    if isinstance(node, list):
+        return [_inline_refs(item, defs) for item in node]
+    return node
+
+def function_name(response_model: Type[BaseModel]) -> str:
+    """응답 모델에 대응하는 함수 이름 (예: MarketResearchOutput → submit_market_research_output)"""
+    name = response_model.__name__
+    snake = "".join(f"_{c.lower()}" if c.isupper() else c for c in name).lstrip("_")
+    return f"submit_{snake}"
+
+def function_tool(response_model: Type[BaseModel]) -> Dict[str, Any]:
+    """pydantic 모델로 chat.completions의 함수 호출(tool) 정의를 만듭니다."""
+    schema = response_model.model_json_schema()
+    parameters = _inline_refs(schema, schema.get("$defs", {}))
+    parameters.pop("title", None)
+    return {
+        "type": "function",
+        "function": {
+            "name": function_name(response_model),
+            "description": (response_model.__doc__ or response_model.__name__).strip(),
+            "parameters": parameters,
+        },
+    }
+
+def schema_fingerprint(response_model: Type[BaseModel]) -> str:
+    """캐시 키에 넣을 스키마 해시 (스키마가 바뀌면 이전 캐시를 쓰지 않도록)"""
+    raw = json.dumps(response_model.model_json_schema(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+def validate_output(text: str, response_model: Type[BaseModel]) -> BaseModel:
+    """JSON 텍스트를 파싱해 모델로 검증합니다. 실패 시 ValueError/ValidationError"""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return response_model.model_validate(parser.result())
+
+def describe_error(error: Exception) -> str:
+    """복구 요청에 넣을 간결한 오류 설명"""
+    if isinstance(error, ValidationError):
+        return "\n".join(
+            f"- {'.'.join(str(p) for p in e['loc']) or '(root)'}: {e['msg']}" for e in error.errors()[:10]
+        )
+    return f"- {str(error)}"
+
+def repair_messages(raw_output: str, error: Exception, response_model: Type[BaseModel],
+                    max_output_chars: int = 6000) -> List[Dict[str, str]]:
+    """
+    잘못된 응답만 고치도록 요청하는 메시지를 만듭니다.
+
+    원래 프롬프트(검색 문서 등)는 다시 보내지 않으므로 전체 재실행보다 훨씬 작은 호출입니다.
+    """
+    return [
+        {
+            "role": "system",
+            "content": "당신은 JSON 교정기입니다. 주어진 응답의 내용은 유지하고, "
+                       f"{function_name(response_model)} 함수의 스키마에 맞도록 형식만 고쳐 함수를 호출하세요.",
+        },
+        {
+            "role": "user",
+            "content": f"[원래 응답]\n{raw_output[:max_output_chars]}\n\n[스키마 오류]\n{describe_error(error)}",
+        },
+    ]
@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable, Sequence, Tuple
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 추적 설정 (configure_tracing 또는 환경 변수로 변경)
+_trace_config = {
+    "enabled": os.getenv("TRACE", "0") != "0",        # 실행별 JSONL 파일 기록 여부 (지표는 항상 집계)
+    "dir": os.getenv("TRACE_DIR", "traces"),
+}
+
+# 지연 시간 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+_current_trace: "contextvars.ContextVar[Optional[RunTrace]]" = contextvars.ContextVar("current_trace", default=None)
+
+def configure_tracing(enabled: Optional[bool] = None, directory: Optional[str] = None):
+    """
+    추적 설정을 변경합니다. 생략한 항목은 기존 값을 유지합니다.
+
+    Args:
+        enabled: 실행마다 스팬을 JSONL 파일(<directory>/<run_id>.jsonl)로 기록할지 여부
+        directory: 추적 파일을 저장할 디렉터리
+    """
+    if enabled is not None:
+        _trace_config["enabled"] = enabled
+    if directory is not None:
+        _trace_config["dir"] = directory
+
+def is_tracing_enabled() -> bool:
+    return _trace_config["enabled"]
+
+def trace_path(run_id: str) -> str:
+    return os.path.join(_trace_config["dir"], f"{run_id}.jsonl")
+
+class RunTrace:
+    """
+    실행 하나의 스팬 모음.
+
+    실행이 끝나면 스팬을 JSONL 파일로 기록합니다. 그 뒤에 끝난 스팬(백그라운드 PDF 렌더링 등)은
+    같은 파일에 이어서 추가합니다.
+    """
+
+    def __init__(self, run_id: str, path: Optional[str]):
+        self.run_id = run_id
+        self.path = path
+        self.spans: List[Dict[str, Any]] = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]):
+        with self._lock:
+            if not self.closed:
+                self.spans.append(record)
+                return
+            self._write([record], mode="a")
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._write(self.spans, mode="w")
+
+    def _write(self, records: List[Dict[str, Any]], mode: str):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, mode, encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logger.warning(f"추적 파일 기록 실패 ({self.path}): {str(e)}")
+
+class Span:
+    """
+    시간을 잰 작업 하나 (그래프 노드, OpenAI/Tavily/벡터 검색/임베딩/PDF 렌더링 호출).
+
+    속성(attrs)에는 재시도 횟수(retries), 캐시 적중(cache_hit), 토큰 수(prompt_tokens, completion_tokens) 등을 기록합니다.
+    """
+
+    def __init__(self, name: str, kind: str, attrs: Dict[str, Any],
+                 parent: Optional["Span"] = None, trace: Optional[RunTrace] = None):
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.node = attrs.pop("node", None) or (parent.node if parent is not None else None)
+        self.attrs = attrs
+        self.trace = trace
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key: str, value: float = 1):
+        self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def fail(self, error: Any):
+        self.status = "error"
+        self.error = str(error)[:500]
+
+    def end(self, error: Optional[BaseException] = None):
+        """스팬을 끝내고 지표와 실행 추적에 기록합니다. (여러 번 호출해도 한 번만 기록)"""
+        if self.duration is not None:
+            return
+        if error is not None:
+            self.fail(error)
+        self.duration = time.perf_counter() - self._started
+        metrics.record_span(self)
+        if self.trace is not None:
+            self.trace.add(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {
+            "trace_id": self.trace.run_id if self.trace is not None else None,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "node": self.node,
+            "start": round(self.started_at, 6),
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "status": self.status,
+            "attrs": self.attrs,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def start_span(name: str, kind: str = "call", **attrs) -> Span:
+    """
+    현재 스팬의 자식 스팬을 시작합니다. 현재 스팬으로 설정하지는 않으므로,
+    다른 스레드에서 끝나는 작업(렌더링 Future 등)은 이 스팬을 직접 end()합니다.
+    """
+    return Span(name, kind, attrs, parent=_current_span.get(), trace=_current_trace.get())
+
+@contextmanager
+def span(name: str, kind: str = "call", **attrs):
+    """with 블록의 소요 시간을 스팬으로 기록합니다. 블록 안에서 시작한 스팬은 이 스팬의 자식이 됩니다."""
+    current = start_span(name, kind, **attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+@contextmanager
+def trace_run(run_id: str, **attrs):
+    """
+    실행 하나를 최상위 스팬으로 감쌉니다.
+
+    추적이 켜져 있으면 실행 안의 모든 스팬을 모아 <추적 디렉터리>/<run_id>.jsonl로 기록합니다.
+    """
+    trace = RunTrace(run_id, trace_path(run_id) if is_tracing_enabled() else None)
+    token = _current_trace.set(trace)
+    try:
+        with span("run", kind="run", run_id=run_id, **attrs):
+            yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.close()
+
+def _node_failed(result: Any, name: str) -> bool:
+    # 노드는 예외를 상태("<노드>_error")로 기록하고 정상 반환함
+    return isinstance(result, dict) and result.get("status") == f"{name}_error"
+
+def traced_node(name: str, fn: Callable) -> Callable:
+    """그래프 노드 함수(동기/비동기)를 노드 스팬으로 감쌉니다."""
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state, *args, **kwargs):
+            with span(name, kind="node", node=name) as node_span:
+                result = await fn(state, *args, **kwargs)
+                if _node_failed(result, name):
+                    node_span.fail(f"{name}_error")
+                return result
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state, *args, **kwargs):
+        with span(name, kind="node", node=name) as node_span:
+            result = fn(state, *args, **kwargs)
+            if _node_failed(result, name):
+                node_span.fail(f"{name}_error")
+            return result
+    return wrapper
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class MetricsRegistry:
+    """
+    스팬에서 집계한 프로세스 전역 지표 (Prometheus 텍스트 형식으로 출력)
+
+    - startup_eval_run_duration_seconds: 실행 전체 지연 시간 히스토그램
+    - startup_eval_node_duration_seconds{node}: 노드별 지연 시간 히스토그램
+    - startup_eval_call_duration_seconds{call,node}: 외부 호출별 지연 시간 히스토그램
+    - startup_eval_llm_tokens_total{node,model,type}: OpenAI 토큰 수
+    - startup_eval_cache_hits_total / startup_eval_retries_total / startup_eval_errors_total{span}
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # 이름 → (종류, 설명, 라벨 이름, {라벨 값: 값})
+        self._metrics: Dict[str, Tuple[str, str, Tuple[str, ...], Dict[Tuple, Any]]] = {}
+
+    def _series(self, kind: str, name: str, help_text: str, label_names: Tuple[str, ...]) -> Dict[Tuple, Any]:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = (kind, help_text, label_names, {})
+        return metric[3]
+
+    def inc(self, name: str, help_text: str, labels: Dict[str, Any], value: float = 1):
+        with self._lock:
+            series = self._series("counter", name, help_text, tuple(labels))
+            key = tuple(labels.values())
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, help_text: str, labels: Dict[str, Any], value: float):
+        with self._lock:
+            series = self._series("histogram", name, help_text, tuple(labels))
+            key = tuple(labels.values())
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def record_span(self, finished: Span):
+        node = finished.node or ""
+        if finished.kind == "run":
+            self.observe("startup_eval_run_duration_seconds", "평가 실행 전체 지연 시간", {}, finished.duration)
+        elif finished.kind == "node":
+            self.observe("startup_eval_node_duration_seconds", "그래프 노드별 지연 시간",
+                         {"node": finished.name}, finished.duration)
+        else:
+            self.observe("startup_eval_call_duration_seconds", "외부 호출별 지연 시간",
+                         {"call": finished.name, "node": node}, finished.duration)
+
+        attrs = finished.attrs
+        for token_type in ("prompt", "completion"):
+            count = attrs.get(f"{token_type}_tokens")
+            if count:
+                self.inc("startup_eval_llm_tokens_total", "OpenAI 토큰 수",
+                         {"node": node, "model": attrs.get("model", ""), "type": token_type}, count)
+        if attrs.get("cache_hit"):
+            self.inc("startup_eval_cache_hits_total", "캐시로 응답한 호출 수", {"call": finished.name})
+        if attrs.get("retries"):
+            self.inc("startup_eval_retries_total", "호출 재시도 횟수", {"call": finished.name}, attrs["retries"])
+        if finished.status == "error":
+            self.inc("startup_eval_errors_total", "오류로 끝난 스팬 수", {"span": finished.name})
+
+    def counter_values(self, name: str) -> Dict[Tuple, float]:
+        """카운터의 라벨 값별 현재 값 (없으면 빈 딕셔너리)"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            return dict(metric[3]) if metric is not None and metric[0] == "counter" else {}
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식(0.0.4) 문자열을 반환합니다."""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, label_names, series) in sorted(self._metrics.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(series.items()):
+                    if kind == "counter":
+                        lines.append(f"{name}{_labels(label_names, key)} {value}")
+                        continue
+                    for bound, count in list(zip(self.buckets, value["buckets"])) + [("+Inf", value["count"])]:
+                        bucket_labels = _labels(label_names, key, 'le="%s"' % bound)
+                        lines.append(f"{name}_bucket{bucket_labels} {count}")
+                    lines.append(f"{name}_sum{_labels(label_names, key)} {round(value['sum'], 6)}")
+                    lines.append(f"{name}_count{_labels(label_names, key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+# 프로세스 전역 지표
+metrics = MetricsRegistry()
+
+def render_metrics(gauges: Optional[Dict[str, Tuple[str, Dict[str, float]]]] = None) -> str:
+    """
+    지표를 Prometheus 텍스트 형식으로 반환합니다.
+
+    Args:
+        gauges: 함께 출력할 현재 값 {이름: (설명, {라벨 "state" 값: 값})} (서버 대기열 상태 등)
+    """
+    lines = []
+    for name, (help_text, values) in (gauges or {}).items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for state, value in values.items():
+            lines.append(f'{name}{{state="{_escape(state)}"}} {value}')
+    return ("\n".join(lines) + "\n" if lines else "") + metrics.render()
@@ -0,0 +1,358 @@
+"""
+벤치마크용 프로세스 내 가짜 외부 서비스 (API 키/네트워크 없이 파이프라인 전체를 실행)
+
+- FakeOpenAI / FakeAsyncOpenAI: chat.completions.create 호환 (일반 응답, 함수 호출, 스트리밍)
+- FakeTavily / FakeAsyncTavily: TavilyClient.search 호환
+- FakeEmbeddingModel: SentenceTransformer.encode 호환 (텍스트 해시 기반 결정적 벡터)
+- FakeRetriever: BaseRetriever 호환 벡터 검색 (합성 스타트업 코퍼스)
+
+모든 서비스는 LatencyModel로 지연 시간 분포와 오류율을 설정합니다. 오류는 429 응답과 같은
+속성(status_code, Retry-After 헤더)을 가진 예외로 발생합니다.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.retriever import BaseRetriever
+from agents.structured_output import function_name
+from state_definitions import CompetitorAnalysisOutput, InvestmentDecisionOutput, MarketResearchOutput
+
+class LatencyModel:
+    """
+    로그정규 지연 시간 분포와 오류율.
+
+    median_ms는 중앙값, sigma는 꼬리 두께(0이면 고정 지연)입니다.
+    "중앙값ms[:sigma[:오류율]]" 문자열(예: "800:0.6:0.02")로도 만들 수 있습니다.
+    """
+
+    def __init__(self, median_ms: float = 0.0, sigma: float = 0.5, error_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.median = median_ms / 1000.0
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "LatencyModel":
+        parts = [float(p) for p in spec.split(":")]
+        return cls(*parts[:3], seed=seed)
+
+    def sample(self) -> float:
+        """지연 시간(초) 하나를 뽑습니다."""
+        if self.median <= 0:
+            return 0.0
+        with self._lock:
+            return self.median * self._random.lognormvariate(0.0, self.sigma) if self.sigma else self.median
+
+    def should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"median_ms": round(self.median * 1000, 3), "sigma": self.sigma, "error_rate": self.error_rate}
+
+class FakeServiceError(Exception):
+    """가짜 서비스의 오류 응답 (429, Retry-After 포함)"""
+
+    def __init__(self, service: str, status_code: int = 429, retry_after: float = 1.0):
+        super().__init__(f"{service}: {status_code} Too Many Requests (fake)")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers={"retry-after": str(retry_after)})
+
+class CallCounter:
+    """서비스별 호출/오류 수 (벤치마크 결과에 함께 기록)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+calls = CallCounter()
+
+def _score(reasoning: str, score: int = 7) -> Dict[str, Any]:
+    return {"score": score, "reasoning": reasoning}
+
+# 노드별 고정 응답 (스키마 검증을 통과하는 값)
+CANNED_RESPONSES: Dict[str, Dict[str, Any]] = {
+    function_name(MarketResearchOutput): MarketResearchOutput(
+        market_size=_score("시장 규모가 크고 성장 중입니다.", 8),
+        problem_fit=_score("고객 문제와 제품이 잘 맞습니다."),
+        willingness_to_pay=_score("기업 고객의 지불 의사가 확인됩니다.", 6),
+        revenue_model_clarity=_score("구독형 수익 모델이 명확합니다."),
+        upside_potential=_score("해외 확장 가능성이 있습니다.", 8),
+        market_size_estimate="약 5조 원",
+        growth_rate_estimate="연 15%",
+        key_trends=["생성형 AI 도입", "규제 완화"],
+        regulatory_concerns=["개인정보 보호"],
+    ).model_dump(),
+    function_name(CompetitorAnalysisOutput): CompetitorAnalysisOutput(
+        competitive_score=7,
+        competitive_reasoning="기술력은 앞서지만 영업망이 약합니다.",
+        competitors=[{"name": "Rival", "strengths": ["브랜드"], "weaknesses": ["가격"]}],
+    ).model_dump(),
+    function_name(InvestmentDecisionOutput): InvestmentDecisionOutput(
+        judgement="통과", reasoning="시장성과 경쟁력이 모두 양호합니다.", score=78,
+    ).model_dump(),
+}
+
+def _canned_for_prompt(system_prompt: str) -> str:
+    """함수 호출 없이 (정규식 파싱 경로) 요청했을 때 시스템 프롬프트로 노드를 구분해 응답합니다."""
+    if "도메인을 분류" in system_prompt:
+        return "AI"
+    if "경쟁" in system_prompt:
+        return json.dumps(CANNED_RESPONSES[function_name(CompetitorAnalysisOutput)], ensure_ascii=False)
+    if "심사역" in system_prompt:
+        return json.dumps(CANNED_RESPONSES[function_name(InvestmentDecisionOutput)], ensure_ascii=False)
+    return json.dumps(CANNED_RESPONSES[function_name(MarketResearchOutput)], ensure_ascii=False)
+
+def _usage(messages: List[Dict[str, Any]], text: str) -> SimpleNamespace:
+    prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 2
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(text) // 2,
+                           total_tokens=prompt_tokens + len(text) // 2)
+
+class _Completion:
+    """요청 하나에 대한 응답 본문과 응답/스트리밍 객체 생성"""
+
+    def __init__(self, params: Dict[str, Any], chunk_count: int):
+        tools = params.get("tools")
+        self.messages = params.get("messages") or []
+        self.tool_name = tools[0]["function"]["name"] if tools else None
+        if self.tool_name:
+            self.text = json.dumps(CANNED_RESPONSES.get(self.tool_name, {}), ensure_ascii=False)
+        else:
+            self.text = _canned_for_prompt(str(self.messages[0].get("content", "")) if self.messages else "")
+        self.chunk_count = chunk_count
+
+    def _message(self, text: str) -> SimpleNamespace:
+        if self.tool_name:
+            call = SimpleNamespace(function=SimpleNamespace(name=self.tool_name, arguments=text))
+            return SimpleNamespace(content=None, tool_calls=[call])
+        return SimpleNamespace(content=text, tool_calls=None)
+
+    def response(self) -> SimpleNamespace:
+        return SimpleNamespace(choices=[SimpleNamespace(message=self._message(self.text))],
+                               usage=_usage(self.messages, self.text))
+
+    def chunks(self) -> List[SimpleNamespace]:
+        size = max(1, len(self.text) // self.chunk_count + 1)
+        pieces = [self.text[i:i + size] for i in range(0, len(self.text), size)]
+        chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=self._message(piece))], usage=None) for piece in pieces]
+        # stream_options.include_usage와 같이 마지막 조각에만 usage
+        chunks.append(SimpleNamespace(choices=[], usage=_usage(self.messages, self.text)))
+        return chunks
+
+class _Stream:
+    def __init__(self, chunks: List[SimpleNamespace], inter_chunk: float):
+        self._chunks = iter(chunks)
+        self._inter_chunk = inter_chunk
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = next(self._chunks)
+        if self._inter_chunk:
+            time.sleep(self._inter_chunk)
+        return chunk
+
+    def close(self):
+        self._chunks = iter(())
+
+class _AsyncStream(_Stream):
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+        if self._inter_chunk:
+            await asyncio.sleep(self._inter_chunk)
+        return chunk
+
+    async def close(self):
+        self._chunks = iter(())
+
+class FakeOpenAI:
+    """OpenAI 클라이언트 호환 가짜 (latency는 첫 응답까지의 지연, 스트리밍은 조각 사이 지연 추가)"""
+
+    def __init__(self, latency: LatencyModel, chunk_count: int = 8, inter_chunk_ms: float = 2.0):
+        self.latency = latency
+        self.chunk_count = chunk_count
+        self.inter_chunk = inter_chunk_ms / 1000.0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _prepare(self, params: Dict[str, Any]) -> _Completion:
+        calls.add("openai")
+        if self.latency.should_fail():
+            calls.add("openai_errors")
+            raise FakeServiceError("openai")
+        return _Completion(params, self.chunk_count)
+
+    def create(self, **params):
+        completion = self._prepare(params)
+        time.sleep(self.latency.sample())
+        if params.get("stream"):
+            return _Stream(completion.chunks(), self.inter_chunk)
+        return completion.response()
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """AsyncOpenAI 클라이언트 호환 가짜"""
+
+    async def create(self, **params):
+        completion = self._prepare(params)
+        await asyncio.sleep(self.latency.sample())
+        if params.get("stream"):
+            return _AsyncStream(completion.chunks(), self.inter_chunk)
+        return completion.response()
+
+_SENTENCES = [
+    "{q} 시장은 최근 3년간 연평균 15% 이상 성장했습니다.",
+    "주요 기업들은 {q} 분야에서 구독형 서비스를 확대하고 있습니다.",
+    "규제 당국은 {q} 관련 데이터 활용 지침을 새로 발표했습니다.",
+    "투자 업계는 {q} 스타트업에 대한 후속 투자를 늘리고 있습니다.",
+    "해외 경쟁사들이 국내 {q} 시장 진출을 준비하고 있습니다.",
+    "{q} 고객들은 도입 비용보다 운영 효율 개선을 더 중요하게 봅니다.",
+]
+
+class FakeTavily:
+    """TavilyClient 호환 가짜 - 검색어가 들어간 문장으로 만든 문서 목록을 반환합니다."""
+
+    def __init__(self, latency: LatencyModel, results: int = 5, sentences_per_result: int = 12):
+        self.latency = latency
+        self.results = results
+        self.sentences_per_result = sentences_per_result
+
+    def _response(self, query: str) -> Dict[str, Any]:
+        calls.add("tavily")
+        if self.latency.should_fail():
+            calls.add("tavily_errors")
+            raise FakeServiceError("tavily")
+        results = []
+        for i in range(self.results):
+            sentences = [_SENTENCES[(i + j) % len(_SENTENCES)].format(q=query) for j in range(self.sentences_per_result)]
+            results.append({"title": f"Company{i}, {query} 동향", "url": f"https://example.com/{i}",
+                            "content": " ".join(sentences)})
+        return {"query": query, "results": results}
+
+    def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        response = self._response(query)
+        time.sleep(self.latency.sample())
+        return response
+
+class FakeAsyncTavily(FakeTavily):
+    """AsyncTavilyClient 호환 가짜"""
+
+    async def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        response = self._response(query)
+        await asyncio.sleep(self.latency.sample())
+        return response
+
+class FakeEmbeddingModel:
+    """SentenceTransformer 호환 가짜 - 텍스트 해시로 만든 결정적 단위 벡터 (배치당 지연 + 텍스트당 지연)"""
+
+    def __init__(self, latency: LatencyModel, per_text_ms: float = 0.2, dimension: int = 384):
+        self.latency = latency
+        self.per_text = per_text_ms / 1000.0
+        self.dimension = dimension
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64, **kwargs) -> np.ndarray:
+        calls.add("embedding")
+        time.sleep(self.latency.sample() + self.per_text * len(texts))
+        vectors = np.stack([
+            np.random.default_rng(int.from_bytes(hashlib.sha256(t.encode("utf-8")).digest()[:8], "little"))
+            .standard_normal(self.dimension) for t in texts
+        ]).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+class FakeRetriever(BaseRetriever):
+    """BaseRetriever 호환 가짜 벡터 검색 - 합성 스타트업 코퍼스에서 쿼리 벡터로 결정되는 조각을 반환합니다."""
+
+    backend = "fake"
+
+    def __init__(self, latency: LatencyModel, startups: int = 200, fragments_per_startup: int = 3):
+        self.latency = latency
+        self.fragments = [
+            {"name": f"Startup{i:04d}", "summary": f"Startup{i:04d}는 AI 기반 서비스를 제공합니다. (조각 {j})",
+             "domain": "AI" if i % 2 else None}
+            for i in range(startups) for j in range(fragments_per_startup)
+        ]
+
+    def _matches(self, vector, top_k: int) -> List[Dict[str, Any]]:
+        calls.add("vector")
+        if self.latency.should_fail():
+            calls.add("vector_errors")
+            raise FakeServiceError("vector")
+        seed = int(abs(float(np.asarray(vector, dtype=np.float32)[:4].sum())) * 1e6)
+        picks = random.Random(seed).sample(range(len(self.fragments)), min(top_k, len(self.fragments)))
+        return [
+            {"id": f"frag-{i}", "score": round(0.9 - rank * 0.01, 4), "metadata": dict(self.fragments[i])}
+            for rank, i in enumerate(picks)
+        ]
+
+    def query(self, vector, top_k: int = 10) -> List[Dict[str, Any]]:
+        matches = self._matches(vector, top_k)
+        time.sleep(self.latency.sample())
+        return matches
+
+    async def aquery(self, vector, top_k: int = 10) -> List[Dict[str, Any]]:
+        matches = self._matches(vector, top_k)
+        await asyncio.sleep(self.latency.sample())
+        return matches
+
+def install(openai_latency: LatencyModel, tavily_latency: LatencyModel, vector_latency: LatencyModel,
+            embedding_latency: LatencyModel):
+    """
+    가짜 서비스를 에이전트 모듈 전역 클라이언트 자리에 연결합니다. (main.initialize_environment 대신 호출)
+
+    캐시는 모두 끄므로 모든 평가가 가짜 서비스까지 호출합니다.
+    """
+    from agents import competitor_analyzer, inverstment_judge, market_researcher, search_client, startup_explorer
+    from agents.embedding_service import EmbeddingService
+    from agents.llm_client import configure_llm_cache
+    from agents.prompt_budget import set_sentence_encoder
+
+    openai_client = FakeOpenAI(openai_latency)
+    async_openai_client = FakeAsyncOpenAI(openai_latency)
+    for module in (competitor_analyzer, market_researcher, inverstment_judge):
+        module.client = openai_client
+        module.async_client = async_openai_client
+    startup_explorer.openai_client = openai_client
+    startup_explorer.async_openai_client = async_openai_client
+
+    service = EmbeddingService(FakeEmbeddingModel(embedding_latency), "fake-embedding", cache_path=None)
+    startup_explorer.embedding_service = service
+    startup_explorer.retriever = FakeRetriever(vector_latency)
+    startup_explorer.domain_classifier = None
+    set_sentence_encoder(lambda texts: service.encode_many(texts, use_cache=False))
+
+    search_client._search_client = search_client.CachedSearchClient(
+        FakeTavily(tavily_latency), async_client=FakeAsyncTavily(tavily_latency), enabled=False
+    )
+    configure_llm_cache(enabled=False)
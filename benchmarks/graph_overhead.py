@@ -0,0 +1,156 @@
+"""
+워크플로우 그래프 자체의 실행당 오버헤드 측정
+
+노드는 실제 에이전트와 같은 키를 기록하는 no-op 함수로 바꾸고(외부 API 호출 없음),
+그래프 구성 방식만 달리해 실행 한 번에 드는 시간을 비교합니다.
+
+- nested_rebuild: 이전 방식. 노드마다 단일 노드 서브그래프를 컴파일해 끼워 넣고, 실행마다 전체를 다시 컴파일
+- nested_cached: 이전 구조를 한 번만 컴파일하고 실행만 반복 (서브그래프 호출/상태 복사 비용)
+- flat_cached: 현재 방식. 노드 함수를 평면 그래프에 직접 연결하고 한 번만 컴파일
+
+실행: python -m benchmarks.graph_overhead --runs 200
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langgraph.graph import StateGraph
+
+from state_definitions import InvestmentState
+
+def _startup_exploration(state):
+    state["startup_info"] = {"name": "Bench", "domain": "AI", "summary": "benchmark"}
+    state["candidates_documents"] = []
+    state["status"] = "startup_exploration_completed"
+    return state
+
+def _competitor_analysis(state):
+    # 병렬 노드는 담당하는 키만 반환 (agents.competitor_analyzer와 같은 방식)
+    return {
+        "competitors": [{"name": "Rival", "strengths": [], "weaknesses": []}],
+        "market_analysis": {"competitive_score": 5.0},
+        "status": "competitor_analysis_completed",
+    }
+
+def _market_research(state):
+    return {"market_analysis": {"average_market_score": 5.0}, "status": "market_research_completed"}
+
+def _investment_judgment(state):
+    state["investment_recommendation"] = {"judgement": "통과", "reasoning": "", "score": 50}
+    state["status"] = "investment_judgment_completed"
+    return state
+
+def _pdf_generation(state):
+    state["report_data"] = {"pdf_path": "bench.pdf"}
+    state["status"] = "pdf_generation_completed"
+    return state
+
+NODES = {
+    "startup_exploration": _startup_exploration,
+    "competitor_analysis": _competitor_analysis,
+    "market_research": _market_research,
+    "investment_judgment": _investment_judgment,
+    "pdf_generation": _pdf_generation,
+}
+
+def _add_edges(graph: StateGraph):
+    graph.add_edge("startup_exploration", "competitor_analysis")
+    graph.add_edge("startup_exploration", "market_research")
+    graph.add_edge(["competitor_analysis", "market_research"], "investment_judgment")
+    graph.add_edge("investment_judgment", "pdf_generation")
+    graph.set_entry_point("startup_exploration")
+    graph.set_finish_point("pdf_generation")
+
+def build_nested():
+    """노드마다 단일 노드 서브그래프를 컴파일해 연결한 이전 구조"""
+    graph = StateGraph(InvestmentState)
+    for name, node in NODES.items():
+        subgraph = StateGraph(InvestmentState)
+        subgraph.add_node(name, node)
+        subgraph.set_entry_point(name)
+        subgraph.set_finish_point(name)
+        graph.add_node(name, subgraph.compile())
+    _add_edges(graph)
+    return graph.compile()
+
+def build_flat():
+    """노드 함수를 직접 연결한 평면 구조"""
+    graph = StateGraph(InvestmentState)
+    for name, node in NODES.items():
+        graph.add_node(name, node)
+    _add_edges(graph)
+    return graph.compile()
+
+def _initial_state() -> Dict[str, Any]:
+    return {
+        "user_query": "benchmark",
+        "timestamp": "",
+        "status": "starting",
+        "startup_info": {},
+        "candidates_documents": [],
+        "competitors": [],
+        "market_analysis": {},
+        "investment_recommendation": {},
+        "report_data": {},
+    }
+
+def _measure(run: Callable[[], Any], runs: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        run()
+
+    timings: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    return {
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "min_ms": round(timings[0], 3),
+    }
+
+def run_benchmark(runs: int = 200, warmup: int = 10) -> Dict[str, Dict[str, float]]:
+    nested = build_nested()
+    flat = build_flat()
+
+    results = {
+        "nested_rebuild": _measure(lambda: build_nested().invoke(_initial_state()), runs, warmup),
+        "nested_cached": _measure(lambda: nested.invoke(_initial_state()), runs, warmup),
+        "flat_cached": _measure(lambda: flat.invoke(_initial_state()), runs, warmup),
+    }
+
+    # 결과 상태가 같은지 확인 (구조만 다르고 동작은 같아야 함)
+    # 서브그래프는 상태 전체를 돌려주므로 nested에서는 시장 조사 쪽의 빈 경쟁사 목록이 병렬 단계의
+    # 경쟁사 분석 결과를 덮어씀 - 평면 그래프에서 경쟁사 목록이 유지되는지는 따로 확인
+    nested_state, flat_state = nested.invoke(_initial_state()), flat.invoke(_initial_state())
+    if not flat_state["competitors"]:
+        raise AssertionError("flat 그래프에서 경쟁사 분석 결과가 사라졌습니다.")
+    if {**nested_state, "competitors": []} != {**flat_state, "competitors": []}:
+        raise AssertionError("nested/flat 그래프의 결과 상태가 다릅니다.")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="워크플로우 그래프 실행당 오버헤드 측정")
+    parser.add_argument("--runs", type=int, default=200, help="측정 반복 횟수")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 워밍업 횟수")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.runs, args.warmup)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        baseline = results["nested_rebuild"]["mean_ms"]
+        for name, stats in results.items():
+            speedup = baseline / stats["mean_ms"] if stats["mean_ms"] else float("inf")
+            print(f"{name:<16} mean {stats['mean_ms']:>8.3f}ms  p50 {stats['p50_ms']:>8.3f}ms  "
+                  f"p95 {stats['p95_ms']:>8.3f}ms  (x{speedup:.1f} vs nested_rebuild)")
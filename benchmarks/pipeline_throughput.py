@@ -0,0 +1,320 @@
+"""
+파이프라인 전체 처리량 측정 (가짜 OpenAI/Tavily/벡터 검색/임베딩 사용, API 키와 네트워크 불필요)
+
+create_workflow_graph로 컴파일한 실제 그래프와 노드(프롬프트 압축, 구조화 출력 파싱, 로컬 점수 모델,
+도메인 분류, 마이크로 배치 임베딩 등)를 그대로 실행하고, 외부 호출만 benchmarks.fakes의 가짜 서비스로
+바꿉니다. 동시 실행 수를 단계별로 늘리며 다음을 측정합니다.
+
+- evals_per_sec: 초당 완료된 평가 수
+- p50/p95/p99_ms: 평가 한 건의 지연 시간
+- failed / errors: 실패한 평가 수 / 오류로 끝난 스팬(노드, 외부 호출) 수 (주입한 오류율의 영향)
+- peak_rss_mb: 단계 실행 중 최대 메모리 사용량
+- calls: 가짜 서비스별 호출/오류 수
+
+결과는 JSON으로 저장되며, --compare로 이전 결과와 비교해 처리량/지연 시간 회귀를 찾습니다.
+
+실행: python -m benchmarks.pipeline_throughput --levels 1,4,16 --output bench.json
+      python -m benchmarks.pipeline_throughput --levels 1,4,16 --compare bench.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fakes
+
+def _current_rss_mb() -> float:
+    """현재 RSS (MB). /proc이 없으면 프로세스 최대 RSS를 사용합니다."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux는 KB, macOS는 바이트 단위
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class RssSampler:
+    """측정 구간 동안 RSS를 주기적으로 읽어 최댓값을 기록합니다."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self.peak = _current_rss_mb()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _current_rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss_mb())
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+def _failed(result: Dict[str, Any]) -> bool:
+    # 노드 오류는 예외 대신 상태("<노드>_error")로 남음
+    return str(result.get("status", "")).endswith("_error")
+
+def _span_errors() -> Dict[str, int]:
+    # 노드는 호출 오류를 기본값으로 대체하고 계속 진행하므로, 오류로 끝난 스팬 수로 셈
+    from agents.tracing import metrics
+    return {name: int(count) for (name,), count in metrics.counter_values("startup_eval_errors_total").items()}
+
+def _summarize(concurrency: int, latencies: List[float], failures: int, wall_time: float,
+               peak_rss: float, calls_before: Dict[str, int], errors_before: Dict[str, int]) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    calls_after = fakes.calls.snapshot()
+    return {
+        "concurrency": concurrency,
+        "evaluations": len(latencies),
+        "failed": failures,
+        "errors": {name: count - errors_before.get(name, 0) for name, count in _span_errors().items()
+                   if count > errors_before.get(name, 0)},
+        "wall_sec": round(wall_time, 3),
+        "evals_per_sec": round(len(latencies) / wall_time, 3) if wall_time else 0.0,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "peak_rss_mb": round(peak_rss, 1),
+        "calls": {name: count - calls_before.get(name, 0) for name, count in calls_after.items()},
+    }
+
+def run_level(workflow, concurrency: int, evaluations: int, use_async: bool = False) -> Dict[str, Any]:
+    """동시 실행 수 하나에서 evaluations건을 평가하고 처리량/지연 시간을 측정합니다."""
+    import main
+
+    queries = [f"AI 헬스케어 스타트업 {concurrency}-{i}" for i in range(evaluations)]
+    latencies: List[float] = []
+    failures = 0
+    lock = threading.Lock()
+    calls_before = fakes.calls.snapshot()
+    errors_before = _span_errors()
+
+    def record(started: float, result: Optional[Dict[str, Any]]):
+        nonlocal failures
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            if result is None or _failed(result):
+                failures += 1
+
+    def evaluate(query: str):
+        started = time.perf_counter()
+        try:
+            result = main.run_investment_analysis(query, workflow=workflow)
+        except Exception:
+            result = None
+        record(started, result)
+
+    async def evaluate_async(semaphore: asyncio.Semaphore, query: str):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await main.run_investment_analysis_async(query, workflow=workflow)
+            except Exception:
+                result = None
+            record(started, result)
+
+    async def run_async():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(evaluate_async(semaphore, query) for query in queries))
+
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        if use_async:
+            asyncio.run(main.run_closing_clients(run_async()))
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as executor:
+                list(executor.map(evaluate, queries))
+        wall_time = time.perf_counter() - started
+
+    return _summarize(concurrency, latencies, failures, wall_time, sampler.peak, calls_before, errors_before)
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_benchmark(levels: List[int], evaluations: int = 0, use_async: bool = False,
+                  latencies: Optional[Dict[str, fakes.LatencyModel]] = None, with_pdf: bool = False,
+                  checkpoint: bool = False, openai_limits: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    가짜 서비스를 연결하고 그래프를 한 번 컴파일한 뒤 단계별 동시 실행 수로 측정합니다.
+
+    Args:
+        levels: 측정할 동시 실행 수 목록
+        evaluations: 단계별 평가 수 (0이면 max(20, 동시 실행 수 × 4))
+        use_async: 비동기 그래프(ainvoke)로 실행
+        latencies: 서비스별 LatencyModel (openai, tavily, vector, embedding)
+        with_pdf: 평가마다 PDF를 렌더링 (WeasyPrint 필요)
+        checkpoint: 임시 SQLite 파일에 체크포인트를 저장
+        openai_limits: OpenAI 호출 한도 {"rpm", "tpm"} (None이면 가짜 서비스에 한도가 없으므로 제한기를 끔)
+    """
+    import main
+    from agents.checkpointing import configure_checkpointing
+    from agents.pdf_generator import configure_reports
+    from agents.rate_limiter import configure_rate_limits
+    from agents.tracing import configure_tracing
+
+    logging.getLogger().setLevel(logging.WARNING)
+    latencies = latencies or {}
+    models = {name: latencies.get(name) or fakes.LatencyModel() for name in ("openai", "tavily", "vector", "embedding")}
+
+    configure_tracing(enabled=False)
+    configure_reports(individual_pdf=with_pdf)
+    checkpoint_path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "checkpoints.sqlite") if checkpoint else None
+    configure_checkpointing(path=checkpoint_path or "", enabled=bool(checkpoint_path))
+    if openai_limits:
+        configure_rate_limits(key="openai", rpm=openai_limits.get("rpm"), tpm=openai_limits.get("tpm"), enabled=True)
+    else:
+        configure_rate_limits(enabled=False)
+
+    fakes.install(models["openai"], models["tavily"], models["vector"], models["embedding"])
+    main._environment_ready = True
+    workflow = main.create_workflow_graph(async_mode=use_async, checkpoint_path=checkpoint_path)
+
+    # 워밍업 (도메인 분류기 생성, 지연 임포트, PDF 워커 시작)
+    if with_pdf:
+        main.prewarm_render_pool()
+    run_level(workflow, 1, 1, use_async)
+
+    results = []
+    for level in levels:
+        count = evaluations or max(20, level * 4)
+        result = run_level(workflow, level, count, use_async)
+        results.append(result)
+        logging.getLogger(__name__).warning(
+            f"동시 실행 {level}: {result['evals_per_sec']} evals/s, p95 {result['p95_ms']}ms"
+        )
+
+    return {
+        "benchmark": "pipeline_throughput",
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "async": use_async,
+            "with_pdf": with_pdf,
+            "checkpoint": checkpoint,
+            "evaluations": evaluations,
+            "openai_limits": openai_limits,
+            "latency": {name: model.to_dict() for name, model in models.items()},
+        },
+        "levels": results,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> List[str]:
+    """
+    같은 동시 실행 수끼리 비교해 회귀 목록을 반환합니다.
+
+    처리량이 tolerance 비율보다 많이 줄었거나, p95 지연 시간이나 최대 RSS가 그만큼 늘었으면 회귀로 봅니다.
+    """
+    baseline_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    regressions = []
+    for level in current.get("levels", []):
+        before = baseline_levels.get(level["concurrency"])
+        if before is None:
+            continue
+        checks = (
+            ("evals_per_sec", level["evals_per_sec"] < before["evals_per_sec"] * (1 - tolerance)),
+            ("p95_ms", level["p95_ms"] > before["p95_ms"] * (1 + tolerance)),
+            ("peak_rss_mb", level["peak_rss_mb"] > before["peak_rss_mb"] * (1 + tolerance)),
+        )
+        for metric, regressed in checks:
+            if regressed:
+                regressions.append(
+                    f"동시 실행 {level['concurrency']}: {metric} {before[metric]} → {level[metric]}"
+                )
+    return regressions
+
+def format_results(results: Dict[str, Any]) -> str:
+    lines = [f"{'동시 실행':>8} {'평가':>6} {'실패':>5} {'오류':>5} {'evals/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'RSS MB':>8}"]
+    for level in results["levels"]:
+        lines.append(
+            f"{level['concurrency']:>8} {level['evaluations']:>6} {level['failed']:>5} {sum(level['errors'].values()):>5} "
+            f"{level['evals_per_sec']:>9.2f} "
+            f"{level['p50_ms']:>7.0f}ms {level['p95_ms']:>7.0f}ms {level['p99_ms']:>7.0f}ms {level['peak_rss_mb']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 외부 서비스로 파이프라인 전체 처리량 측정")
+    parser.add_argument("--levels", type=str, default="1,2,4,8,16", help="측정할 동시 실행 수 (쉼표 구분)")
+    parser.add_argument("--evaluations", type=int, default=0,
+                        help="단계별 평가 수 (기본값: max(20, 동시 실행 수 × 4))")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="비동기 그래프로 실행")
+    parser.add_argument("--openai", type=str, default="800:0.5:0", help="OpenAI 지연 분포 '중앙값ms:sigma:오류율'")
+    parser.add_argument("--tavily", type=str, default="400:0.5:0", help="Tavily 지연 분포")
+    parser.add_argument("--vector", type=str, default="60:0.3:0", help="벡터 검색 지연 분포")
+    parser.add_argument("--embedding", type=str, default="5:0.2:0", help="임베딩 모델 배치당 지연 분포")
+    parser.add_argument("--seed", type=int, default=42, help="지연/오류 난수 시드")
+    parser.add_argument("--with-pdf", action="store_true", help="평가마다 PDF 렌더링 (WeasyPrint 필요)")
+    parser.add_argument("--checkpoint", action="store_true", help="임시 SQLite 파일에 체크포인트 저장")
+    parser.add_argument("--openai-limits", type=str, default=None, metavar="RPM:TPM",
+                        help="OpenAI 호출 한도를 켜고 측정 (예: 3500:200000, 기본값: 한도 없음)")
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", type=str, default=None, help="비교할 이전 결과 JSON (회귀 시 종료 코드 1)")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="회귀로 볼 변화 비율 (기본값: 0.1)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    latency_models = {
+        name: fakes.LatencyModel.parse(getattr(args, name), seed=args.seed + i)
+        for i, name in enumerate(("openai", "tavily", "vector", "embedding"))
+    }
+    results = run_benchmark(
+        [int(level) for level in args.levels.split(",") if level.strip()],
+        evaluations=args.evaluations,
+        use_async=args.use_async,
+        latencies=latency_models,
+        with_pdf=args.with_pdf,
+        checkpoint=args.checkpoint,
+        openai_limits=dict(zip(("rpm", "tpm"), map(int, args.openai_limits.split(":")))) if args.openai_limits else None,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    print(json.dumps(results, ensure_ascii=False, indent=2) if args.json else format_results(results))
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"회귀: {regression}")
+        exit_code = 1 if regressions else 0
+
+    if args.with_pdf:
+        from agents.pdf_renderer import wait_for_all_reports
+        wait_for_all_reports()
+    sys.exit(exit_code)
@@ -1,17 +1,49 @@
+import sys
+
+# --profile-startup: 이후의 모든 임포트 시간을 기록하도록 다른 임포트보다 먼저 훅을 설치
+from agents.startup_profiler import profiler
+if "--profile-startup" in sys.argv:
+    profiler.install()
+
 import os
+import csv
+import asyncio
+import json
+import math
+import time
 import logging
 import argparse
 import datetime
-from typing import Dict, Any, List
-from langgraph.graph import StateGraph
-from state_definitions import GraphState
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Callable
+from state_definitions import InvestmentState
+from agents.llm_client import (
+    configure_llm_cache, get_llm_cache_stats, configure_structured_output, get_structured_output_stats
+)
+from agents.search_client import get_search_client, get_search_stats
+from agents.tracing import configure_tracing, is_tracing_enabled, trace_path, trace_run, traced_node
+from agents.resilience import configure_resilience, get_resilience_stats, summarize_calls
+from agents.rate_limiter import configure_rate_limits, get_rate_limit_stats
+from agents.clients import configure_clients, aclose_loop_clients
+from agents.prompt_budget import configure_prompt_budget
+from agents.local_scorer import configure_local_scoring, get_local_scoring_stats
 
-# 에이전트들 임포트
-from agents.startup_explorer import create_startup_exploration_agent, init_resources as init_startup_resources
-from agents.competitor_analyzer import create_competitor_analysis_agent
-from agents.market_researcher import create_market_research_agent
-from agents.inverstment_judge import create_investment_judgment_agent, init_openai_client
-from agents.pdf_generator import create_pdf_generation_agent
+# 에이전트 노드 함수 임포트
+from agents.startup_explorer import (
+    startup_exploration, startup_exploration_async,
+    init_resources as init_startup_resources, configure_retrieval, encode_queries, get_domain_classifier
+)
+from agents.domain_classifier import configure_domain_classifier, get_domain_stats
+from agents.competitor_analyzer import competitor_analysis, competitor_analysis_async
+from agents.market_researcher import market_research, market_research_async
+from agents.inverstment_judge import investment_judgment, investment_judgment_async, init_openai_client
+from agents.pdf_generator import (
+    pdf_generation, pdf_generation_async, configure_reports, render_portfolio_report, load_result_states
+)
+from agents.pdf_renderer import (
+    configure_pdf_rendering, prewarm_render_pool, wait_for_report, await_report, wait_for_all_reports
+)
 
 # 로깅 설정
 logging.basicConfig(
@@ -24,10 +56,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def initialize_environment():
-    """필요한 환경 변수와 리소스를 초기화합니다."""
-    # 환경 변수 확인
-    required_vars = ["OPENAI_API_KEY", "PINECONE_API_KEY"]
+# 워크플로우 노드: 이름 → (동기 함수, 비동기 함수)
+WORKFLOW_NODES = {
+    "startup_exploration": (startup_exploration, startup_exploration_async),
+    "competitor_analysis": (competitor_analysis, competitor_analysis_async),
+    "market_research": (market_research, market_research_async),
+    "investment_judgment": (investment_judgment, investment_judgment_async),
+    "pdf_generation": (pdf_generation, pdf_generation_async),
+}
+
+# 설정별로 한 번만 컴파일한 워크플로우 그래프 (프로세스 전체에서 재사용)
+_workflow_registry: Dict[tuple, Any] = {}
+_workflow_lock = threading.Lock()
+_environment_ready = False
+_retriever_backend: Optional[str] = None  # initialize_environment가 사용한 벡터 검색 백엔드
+
+def initialize_environment(retriever_backend: str = None):
+    """
+    필요한 환경 변수와 리소스를 초기화합니다.
+    
+    Args:
+        retriever_backend: 벡터 검색 백엔드 ("pinecone" 또는 "local").
+            None이면 RETRIEVER_BACKEND 환경 변수(기본값 pinecone)를 따릅니다.
+    """
+    retriever_backend = retriever_backend or os.getenv("RETRIEVER_BACKEND", "pinecone")
+    
+    # 환경 변수 확인 (로컬 인덱스를 쓰면 Pinecone 키는 필요 없음)
+    required_vars = ["OPENAI_API_KEY"]
+    if retriever_backend == "pinecone":
+        required_vars.append("PINECONE_API_KEY")
     missing_vars = [var for var in required_vars if not os.getenv(var)]
     
     if missing_vars:
@@ -37,103 +94,574 @@ def initialize_environment():
     openai_api_key = os.getenv("OPENAI_API_KEY")
     pinecone_api_key = os.getenv("PINECONE_API_KEY")
     
+    global _environment_ready, _retriever_backend
+    
     # 각 에이전트 초기화
-    init_openai_client(openai_api_key)
-    init_startup_resources(
-        pinecone_api_key=pinecone_api_key,
-        openai_api_key=openai_api_key,
-        index_name="startup-index"  # Pinecone 인덱스 이름
-    )
+    with profiler.phase("init_openai_client"):
+        init_openai_client(openai_api_key)
+    with profiler.phase("init_startup_resources"):
+        init_startup_resources(
+            pinecone_api_key=pinecone_api_key,
+            openai_api_key=openai_api_key,
+            index_name="startup-index",  # Pinecone 인덱스 이름
+            retriever_backend=retriever_backend
+        )
     
+    _environment_ready = True
+    _retriever_backend = retriever_backend
     logger.info("환경 초기화 완료")
 
-def create_workflow_graph():
-    """전체 투자 분석 워크플로우 그래프를 생성합니다."""
-    graph = StateGraph(GraphState)
+def create_workflow_graph(async_mode: bool = False, checkpoint_path: Optional[str] = None):
+    """
+    전체 투자 분석 워크플로우 그래프를 생성합니다.
+    
+    노드마다 서브그래프를 만들지 않고, 노드 함수를 하나의 평면 그래프에 직접 연결합니다.
+    호출할 때마다 새로 컴파일하므로 실행에는 get_workflow()로 캐시된 그래프를 사용하세요.
+    
+    Args:
+        async_mode: True이면 각 노드를 비동기 버전으로 구성합니다. (ainvoke/astream으로 실행)
+        checkpoint_path: 노드 완료마다 상태를 저장할 SQLite 체크포인트 파일 (None이면 저장하지 않음)
+    """
+    from langgraph.graph import StateGraph
     
-    # 각 에이전트 노드 생성
-    startup_explorer = create_startup_exploration_agent()
-    competitor_analyzer = create_competitor_analysis_agent()
-    market_researcher = create_market_research_agent()
-    investment_judge = create_investment_judgment_agent()
-    pdf_generator = create_pdf_generation_agent()
+    graph = StateGraph(InvestmentState)
     
     # 노드 추가
-    graph.add_node("startup_exploration", startup_explorer)
-    graph.add_node("competitor_analysis", competitor_analyzer)
-    graph.add_node("market_research", market_researcher)
-    graph.add_node("investment_judgment", investment_judge)
-    graph.add_node("pdf_generation", pdf_generator)
+    for name, (sync_node, async_node) in WORKFLOW_NODES.items():
+        graph.add_node(name, traced_node(name, async_node if async_mode else sync_node))
     
     # 엣지 추가 (실행 흐름 정의)
     graph.add_edge("startup_exploration", "competitor_analysis")
     graph.add_edge("startup_exploration", "market_research")
     # 경쟁사 분석과 시장 조사가 모두 완료된 후 투자 판단
-    graph.add_edge("competitor_analysis", "investment_judgment")
-    graph.add_edge("market_research", "investment_judgment")
+    graph.add_edge(["competitor_analysis", "market_research"], "investment_judgment")
     # 투자 판단 후 PDF 생성
     graph.add_edge("investment_judgment", "pdf_generation")
     
-    # 시작 노드 설정
+    # 시작/종료 노드 설정
     graph.set_entry_point("startup_exploration")
+    graph.set_finish_point("pdf_generation")
     
-    # 컴파일 및 반환
-    return graph.compile()
+    # 컴파일 및 반환 (체크포인트 저장소는 실행 ID를 스레드 ID로 사용)
+    checkpointer = None
+    if checkpoint_path:
+        from agents.checkpointing import get_checkpointer
+        checkpointer = get_checkpointer(checkpoint_path)
+    return graph.compile(checkpointer=checkpointer)
 
-def run_investment_analysis(user_query: str) -> Dict[str, Any]:
+def get_workflow(async_mode: bool = False):
+    """
+    설정에 맞는 컴파일된 워크플로우 그래프를 반환합니다.
+    
+    처음 요청된 설정만 컴파일하고, 이후에는 레지스트리에 저장된 같은 인스턴스를 돌려줍니다.
+    레지스트리 키에는 체크포인트 설정이 포함되므로 설정을 바꾸면 새 그래프가 컴파일됩니다.
+    """
+    from agents.checkpointing import get_checkpoint_path
+    
+    checkpoint_path = get_checkpoint_path()
+    key = (async_mode, checkpoint_path)
+    with _workflow_lock:
+        workflow = _workflow_registry.get(key)
+        if workflow is None:
+            with profiler.phase(f"compile_workflow(async_mode={async_mode})"):
+                workflow = create_workflow_graph(async_mode=async_mode, checkpoint_path=checkpoint_path)
+            _workflow_registry[key] = workflow
+            logger.info(f"워크플로우 그래프 컴파일 완료 (async_mode={async_mode})")
+        return workflow
+
+def warm_up():
+    """
+    첫 요청이 초기화 비용을 치르지 않도록 그래프를 컴파일하고 임베딩 모델/검색 클라이언트를 미리 준비합니다.
+    (서버 모드에서 사용)
+    """
+    started = time.perf_counter()
+    get_workflow()
+    # 첫 추론 시 발생하는 모델 지연 초기화를 미리 수행 (결과는 임베딩 캐시에 남음)
+    with profiler.phase("warm_up.embedding"):
+        encode_queries(["warm-up"])
+    with profiler.phase("warm_up.domain_classifier"):
+        get_domain_classifier()
+    with profiler.phase("warm_up.search_client"):
+        get_search_client()
+    with profiler.phase("warm_up.pdf_workers"):
+        prewarm_render_pool()
+    logger.info(f"워밍업 완료 ({time.perf_counter() - started:.2f}초)")
+
+def run_investment_analysis(user_query: str, workflow=None,
+                            on_update: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                            wait_report: bool = True, run_id: Optional[str] = None) -> Dict[str, Any]:
     """
     사용자 쿼리에 따라 투자 분석을 수행하고 결과를 반환합니다.
     
     Args:
         user_query: 투자 평가를 수행할 스타트업 관련 검색어
+        workflow: 사용할 컴파일된 워크플로우 그래프.
+            None이면 (필요 시 환경을 초기화하고) 레지스트리의 그래프를 사용합니다.
+        on_update: 노드가 끝날 때마다 (노드 이름, 갱신된 상태 값)으로 호출할 콜백 (진행 상황 스트리밍용)
+        wait_report: PDF 렌더링이 끝날 때까지 기다릴지 여부.
+            False면 report_data.pdf_status가 "rendering"인 상태로 반환하며, 나중에 wait_for_report()로 기다립니다.
+        run_id: 실행 ID (체크포인트 키, None이면 새로 생성). 실패 시 resume_investment_analysis(run_id)로 이어서 실행합니다.
         
     Returns:
         분석 결과가 담긴 상태 딕셔너리
     """
-    # 환경 초기화
-    initialize_environment()
+    if workflow is None:
+        # 환경 초기화 (프로세스당 한 번)
+        if not _environment_ready:
+            initialize_environment()
+        
+        # 한 번만 컴파일된 워크플로우 그래프 사용
+        workflow = get_workflow()
     
-    # 워크플로우 그래프 생성
-    workflow = create_workflow_graph()
+    from agents.checkpointing import new_run_id, run_config
     
-    # 초기 상태 생성
-    initial_state = GraphState(
-        user_query=user_query,
-        domain=None,
-        candidates_documents=[],
-        evaluation_summary=None,
-        market_analysis=None,
-        market_scores=None,
-        investment_decision=None,
-        final_report=None
-    )
+    run_id = run_id or new_run_id()
+    initial_state_dict = _initial_state(user_query, run_id, async_mode=False)
+    logger.info(f"투자 분석 시작: '{user_query}' (실행 ID {run_id})")
     
-    # 타임스탬프 추가 (PDF 보고서에 사용)
-    initial_state_dict = initial_state.dict()
-    initial_state_dict["timestamp"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    # 워크플로우 실행
+    try:
+        with trace_run(run_id, query=user_query) as trace:
+            result = _execute(workflow, initial_state_dict, run_config(run_id), on_update)
+            result["external_calls"] = summarize_calls(trace.spans)
+            logger.info("투자 분석 워크플로우 완료")
+            if wait_report:
+                wait_for_report(result)
+        return result
+    except Exception as e:
+        logger.error(f"워크플로우 실행 중 오류 발생: {str(e)} (이어서 실행: --resume {run_id})")
+        raise
+
+def _execute(workflow, graph_input: Optional[Dict[str, Any]], config: Dict[str, Any],
+             on_update: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """그래프를 실행하고 최종 상태를 반환합니다. (graph_input이 None이면 체크포인트에서 이어서 실행)"""
+    if on_update is None:
+        return workflow.invoke(graph_input, config)
     
-    logger.info(f"투자 분석 시작: '{user_query}'")
+    result = graph_input or {}
+    for mode, chunk in workflow.stream(graph_input, config, stream_mode=["updates", "values"]):
+        if mode == "values":
+            result = chunk
+        else:
+            for node, update in chunk.items():
+                on_update(node, update or {})
+    return result
+
+def get_run_options(run_id: str) -> Dict[str, Any]:
+    """
+    체크포인트에 저장된 실행 설정 (retriever: 벡터 검색 백엔드, async_mode: 비동기 그래프 사용 여부)을 반환합니다.
     
-    # 워크플로우 실행
+    설정을 저장하기 전의 체크포인트이거나 체크포인트가 꺼져 있으면 빈 딕셔너리를 반환합니다.
+    """
+    from agents.checkpointing import run_config
+    
+    workflow = get_workflow()
+    if workflow.checkpointer is None:
+        return {}
+    return dict(workflow.get_state(run_config(run_id)).values.get("run_options") or {})
+
+def _resume_target(run_id: str, workflow, async_mode: bool, retriever_backend: Optional[str]):
+    """이어서 실행할 그래프와 체크포인트 설정 (None이면 이미 완료된 실행)을 준비합니다."""
+    from agents.checkpointing import find_resume_config
+    
+    if workflow is None:
+        if not _environment_ready:
+            # 원래 실행과 같은 벡터 검색 백엔드 사용 (retriever_backend로 지정하면 그 값 사용)
+            initialize_environment(retriever_backend or get_run_options(run_id).get("retriever"))
+        workflow = get_workflow(async_mode=async_mode)
+    if workflow.checkpointer is None:
+        raise ValueError("체크포인트가 꺼져 있어 이어서 실행할 수 없습니다.")
+    return workflow, find_resume_config(workflow, run_id, WORKFLOW_NODES)
+
+def _completed_result(workflow, run_id: str) -> Dict[str, Any]:
+    from agents.checkpointing import run_config
+    
+    logger.info(f"실행 '{run_id}'은(는) 이미 완료되었습니다.")
+    result = dict(workflow.get_state(run_config(run_id)).values)
+    # 체크포인트에는 렌더링 제출 시점의 상태가 남아 있으므로 만들어진 PDF 기준으로 갱신
+    report_data = dict(result.get("report_data") or {})
+    if report_data.get("pdf_status") == "rendering":
+        report_data["pdf_status"] = "completed"
+        result["report_data"] = report_data
+        result["status"] = "pdf_generation_completed"
+    return result
+
+def resume_investment_analysis(run_id: str, workflow=None,
+                               on_update: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                               retriever_backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    체크포인트에 저장된 실행을 첫 번째 미완료(또는 실패한) 노드부터 이어서 실행합니다.
+    
+    이미 완료된 노드(벡터 검색, Tavily 검색, LLM 호출)의 결과는 체크포인트에서 그대로 사용합니다.
+    비동기 그래프로 실행했던 실행은 resume_investment_analysis_async로 이어서 실행합니다. (get_run_options 참고)
+    
+    Args:
+        run_id: 이어서 실행할 실행 ID
+        workflow: 체크포인트 저장소와 함께 컴파일된 그래프 (None이면 get_workflow())
+        retriever_backend: 환경을 초기화할 때 쓸 벡터 검색 백엔드 (None이면 원래 실행에서 사용한 백엔드)
+        
+    Raises:
+        ValueError: 체크포인트가 꺼져 있거나 해당 실행 ID의 체크포인트가 없을 때
+    """
+    workflow, config = _resume_target(run_id, workflow, False, retriever_backend)
+    if config is None:
+        return _completed_result(workflow, run_id)
+    
+    logger.info(f"투자 분석 재개: 실행 ID {run_id}")
+    try:
+        with trace_run(run_id, resumed=True) as trace:
+            result = _execute(workflow, None, config, on_update)
+            result["external_calls"] = summarize_calls(trace.spans)
+            logger.info("투자 분석 워크플로우 완료")
+            wait_for_report(result)
+        return result
+    except Exception as e:
+        logger.error(f"워크플로우 실행 중 오류 발생: {str(e)} (이어서 실행: --resume {run_id})")
+        raise
+
+async def resume_investment_analysis_async(run_id: str, workflow=None,
+                                           retriever_backend: Optional[str] = None) -> Dict[str, Any]:
+    """resume_investment_analysis의 비동기 버전 - 비동기 노드로 구성된 그래프로 이어서 실행합니다."""
+    workflow, config = _resume_target(run_id, workflow, True, retriever_backend)
+    if config is None:
+        return _completed_result(workflow, run_id)
+    
+    logger.info(f"투자 분석 재개: 실행 ID {run_id}")
     try:
-        result = workflow.invoke(initial_state_dict)
-        logger.info("투자 분석 워크플로우 완료")
+        with trace_run(run_id, resumed=True) as trace:
+            result = await workflow.ainvoke(None, config)
+            result["external_calls"] = summarize_calls(trace.spans)
+            logger.info("투자 분석 워크플로우 완료")
+            await await_report(result)
         return result
     except Exception as e:
-        logger.error(f"워크플로우 실행 중 오류 발생: {str(e)}")
+        logger.error(f"워크플로우 실행 중 오류 발생: {str(e)} (이어서 실행: --resume {run_id})")
         raise
 
+async def run_investment_analysis_async(user_query: str, workflow=None, wait_report: bool = True,
+                                        run_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    run_investment_analysis의 비동기 버전 - 하나의 이벤트 루프에서 여러 평가를 동시에 실행할 때 사용합니다.
+    
+    Args:
+        user_query: 투자 평가를 수행할 스타트업 관련 검색어
+        workflow: 비동기 노드로 구성된 컴파일된 그래프.
+            None이면 (필요 시 환경을 초기화하고) get_workflow(async_mode=True)를 사용합니다.
+        wait_report: PDF 렌더링 완료를 기다릴지 여부 (기다리는 동안 이벤트 루프는 막히지 않음)
+        run_id: 실행 ID (체크포인트 키, None이면 새로 생성)
+    """
+    if workflow is None:
+        if not _environment_ready:
+            initialize_environment()
+        workflow = get_workflow(async_mode=True)
+    
+    from agents.checkpointing import new_run_id, run_config
+    
+    run_id = run_id or new_run_id()
+    initial_state_dict = _initial_state(user_query, run_id, async_mode=True)
+    logger.info(f"투자 분석 시작: '{user_query}' (실행 ID {run_id})")
+    
+    try:
+        with trace_run(run_id, query=user_query) as trace:
+            result = await workflow.ainvoke(initial_state_dict, run_config(run_id))
+            result["external_calls"] = summarize_calls(trace.spans)
+            logger.info("투자 분석 워크플로우 완료")
+            if wait_report:
+                await await_report(result)
+        return result
+    except Exception as e:
+        logger.error(f"워크플로우 실행 중 오류 발생: {str(e)} (이어서 실행: --resume {run_id})")
+        raise
+
+def _initial_state(user_query: str, run_id: str = "", async_mode: bool = False) -> Dict[str, Any]:
+    """
+    워크플로우에 넘길 초기 상태 딕셔너리를 만듭니다.
+    
+    실행 설정(벡터 검색 백엔드, 비동기 여부)을 함께 저장해 이어서 실행할 때 같은 설정을 사용합니다.
+    """
+    # 초기 상태 생성 (타임스탬프는 PDF 보고서에 사용)
+    return InvestmentState(
+        run_id=run_id,
+        user_query=user_query,
+        timestamp=datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        status="starting",
+        startup_info={},
+        candidates_documents=[],
+        competitors=[],
+        market_analysis={},
+        investment_recommendation={},
+        report_data={},
+        token_usage={},
+        run_options={"retriever": _retriever_backend, "async_mode": async_mode}
+    )
+
+def load_queries(path: str) -> List[str]:
+    """
+    배치 평가용 쿼리 파일을 읽습니다.
+    
+    - JSONL: 한 줄에 하나의 JSON 객체 ("query" 키) 또는 JSON 문자열
+    - CSV: "query" 열 (없으면 첫 번째 열)
+    - 그 외: 한 줄에 하나의 쿼리
+    """
+    queries = []
+    ext = os.path.splitext(path)[1].lower()
+    
+    with open(path, "r", encoding="utf-8-sig") as f:
+        if ext == ".csv":
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return []
+            if "query" in header:
+                column = header.index("query")
+            else:
+                # 헤더가 없는 CSV는 첫 행도 쿼리로 취급
+                column = 0
+                queries.append(header[0])
+            for row in reader:
+                if len(row) > column:
+                    queries.append(row[column])
+        elif ext in (".jsonl", ".json"):
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    if "query" not in record:
+                        raise ValueError(f"{path}:{line_no} 에 'query' 키가 없습니다.")
+                    queries.append(record["query"])
+                else:
+                    queries.append(str(record))
+        else:
+            queries = [line.rstrip("\n") for line in f]
+    
+    return [q.strip() for q in queries if q and q.strip()]
+
+def _percentile(values: List[float], pct: float) -> float:
+    """정렬된 값 목록에서 최근접 순위 방식으로 백분위수를 계산합니다."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[index]
+
+def _batch_record(index: int, query: str, started: float, result: Dict[str, Any] = None,
+                  error: Exception = None, run_id: str = "") -> Dict[str, Any]:
+    """배치 결과 파일에 기록할 레코드를 만듭니다. (실패한 쿼리는 run_id로 --resume 가능)"""
+    record = {
+        "index": index,
+        "query": query,
+        "run_id": run_id,
+        "status": "ok" if error is None else "error",
+        "elapsed_sec": round(time.perf_counter() - started, 3),
+    }
+    if error is None:
+        record["result"] = result
+    else:
+        record["error"] = str(error)
+    return record
+
+def _summarize_batch(records: List[Dict[str, Any]], concurrency: int, wall_time: float,
+                     output_path: str) -> Dict[str, Any]:
+    """배치 레코드 목록으로 처리량/지연 시간 요약을 만듭니다."""
+    latencies = sorted(record["elapsed_sec"] for record in records)
+    failed = sum(1 for record in records if record["status"] != "ok")
+    
+    return {
+        "total": len(records),
+        "succeeded": len(records) - failed,
+        "failed": failed,
+        "concurrency": concurrency,
+        "wall_time_sec": round(wall_time, 3),
+        "throughput_per_min": round(len(records) / wall_time * 60, 2) if wall_time > 0 else 0.0,
+        "latency_mean_sec": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "latency_p50_sec": _percentile(latencies, 50),
+        "latency_p95_sec": _percentile(latencies, 95),
+        "latency_max_sec": latencies[-1] if latencies else 0.0,
+        "output_path": os.path.abspath(output_path),
+        "llm_cache": get_llm_cache_stats(),
+        "structured_output": get_structured_output_stats(),
+        "search": get_search_stats(),
+        "local_scoring": get_local_scoring_stats(),
+        "domain_classifier": get_domain_stats(),
+        "resilience": get_resilience_stats(),
+        "rate_limits": get_rate_limit_stats(),
+    }
+
+def _write_record(out, record: Dict[str, Any]):
+    out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    out.flush()
+    if record["status"] != "ok":
+        logger.error(f"[{record['index']}] '{record['query']}' 평가 실패: {record['error']}")
+
+def run_batch(queries: List[str], workflow, concurrency: int = 4,
+              output_path: str = "batch_results.jsonl") -> Dict[str, Any]:
+    """
+    여러 쿼리를 동시에 평가하고, 완료되는 순서대로 결과를 JSONL 파일에 기록합니다.
+    
+    Args:
+        queries: 평가할 검색어 목록
+        workflow: 한 번만 컴파일된 워크플로우 그래프 (모든 실행이 공유)
+        concurrency: 동시에 실행할 최대 평가 수
+        output_path: 결과 레코드를 기록할 JSONL 파일 경로
+        
+    Returns:
+        처리량/지연 시간 요약 딕셔너리
+    """
+    from agents.checkpointing import new_run_id
+    
+    write_lock = threading.Lock()
+    records = []
+    
+    def evaluate(index: int, query: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        run_id = new_run_id()
+        try:
+            # PDF 렌더링은 워커 풀에서 계속 진행되고, 스레드는 바로 다음 쿼리로 넘어감
+            result = run_investment_analysis(query, workflow=workflow, wait_report=False, run_id=run_id)
+            return _batch_record(index, query, started, result=result, run_id=run_id)
+        except Exception as e:
+            # 개별 쿼리 실패는 기록만 하고 배치는 계속 진행
+            return _batch_record(index, query, started, error=e, run_id=run_id)
+    
+    logger.info(f"배치 평가 시작: {len(queries)}개 쿼리, 동시 실행 {concurrency}")
+    batch_started = time.perf_counter()
+    
+    with open(output_path, "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [executor.submit(evaluate, i, q) for i, q in enumerate(queries)]
+        
+        for future in as_completed(futures):
+            record = future.result()
+            if record["status"] == "ok":
+                wait_for_report(record["result"])
+            with write_lock:
+                _write_record(out, record)
+            records.append(record)
+    
+    return _summarize_batch(records, concurrency, time.perf_counter() - batch_started, output_path)
+
+async def run_closing_clients(coro):
+    """코루틴을 실행한 뒤 이 이벤트 루프에서 만든 비동기 HTTP 클라이언트를 닫습니다. (asyncio.run 진입점용)"""
+    try:
+        return await coro
+    finally:
+        await aclose_loop_clients()
+
+async def run_batch_async(queries: List[str], workflow, concurrency: int = 16,
+                          output_path: str = "batch_results.jsonl") -> Dict[str, Any]:
+    """
+    run_batch의 비동기 버전 - 스레드 풀 대신 하나의 이벤트 루프에서 여러 평가를 동시에 진행합니다.
+    
+    LLM/검색 호출은 I/O 대기 동안 다른 평가에 루프를 양보하므로 스레드 수에 묶이지 않고
+    concurrency를 크게 잡을 수 있습니다. 결과 레코드와 요약 형식은 run_batch와 같습니다.
+    
+    Args:
+        workflow: get_workflow(async_mode=True)로 얻은 그래프
+    """
+    from agents.checkpointing import new_run_id
+    
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    records = []
+    
+    async def evaluate(index: int, query: str) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.perf_counter()
+            run_id = new_run_id()
+            try:
+                result = await run_investment_analysis_async(query, workflow=workflow, wait_report=False,
+                                                             run_id=run_id)
+                record = _batch_record(index, query, started, result=result, run_id=run_id)
+            except Exception as e:
+                return _batch_record(index, query, started, error=e, run_id=run_id)
+        # PDF 렌더링은 동시 실행 슬롯을 반납한 뒤 기다림
+        await await_report(record["result"])
+        return record
+    
+    logger.info(f"비동기 배치 평가 시작: {len(queries)}개 쿼리, 동시 실행 {concurrency}")
+    batch_started = time.perf_counter()
+    
+    try:
+        with open(output_path, "w", encoding="utf-8") as out:
+            tasks = [asyncio.create_task(evaluate(i, q)) for i, q in enumerate(queries)]
+            for task in asyncio.as_completed(tasks):
+                record = await task
+                _write_record(out, record)
+                records.append(record)
+    finally:
+        # 이 루프에서 만든 비동기 HTTP 연결 풀을 닫음 (루프마다 새 풀이 생기므로 닫지 않으면 연결이 남음)
+        await aclose_loop_clients()
+    
+    return _summarize_batch(records, concurrency, time.perf_counter() - batch_started, output_path)
+
+def print_batch_summary(summary: Dict[str, Any]):
+    """배치 실행 요약을 콘솔에 출력합니다."""
+    print("\n" + "="*50)
+    print(" 배치 평가 요약")
+    print("="*50)
+    print(f"▶ 전체: {summary['total']}건 (성공 {summary['succeeded']} / 실패 {summary['failed']})")
+    print(f"▶ 동시 실행: {summary['concurrency']}")
+    print(f"▶ 총 소요 시간: {summary['wall_time_sec']}초")
+    print(f"▶ 처리량: {summary['throughput_per_min']}건/분")
+    print(f"▶ 지연 시간: 평균 {summary['latency_mean_sec']}초, "
+          f"p50 {summary['latency_p50_sec']}초, p95 {summary['latency_p95_sec']}초, "
+          f"최대 {summary['latency_max_sec']}초")
+    cache_stats = summary.get("llm_cache", {})
+    if cache_stats:
+        print(f"▶ LLM 캐시: 적중 {cache_stats['hits']} / 실패 {cache_stats['misses']} "
+              f"(적중률 {cache_stats['hit_rate']:.0%})")
+    structured_stats = summary.get("structured_output", {})
+    if structured_stats.get("calls"):
+        print(f"▶ 구조화 출력: 호출 {structured_stats['calls']} / 복구 {structured_stats['repairs']} "
+              f"(성공 {structured_stats['repaired']}, 실패 {structured_stats['failed']})")
+    search_stats = summary.get("search", {})
+    if search_stats:
+        print(f"▶ 검색: 요청 {search_stats['requests']} / API 호출 {search_stats['api_calls']} "
+              f"(캐시 {search_stats['cache_hits']}, 병합 {search_stats['coalesced']}, "
+              f"절약 {search_stats['saved_calls']})")
+    domain_stats = summary.get("domain_classifier", {})
+    if domain_stats.get("local") or domain_stats.get("llm_fallback"):
+        print(f"▶ 도메인 분류: 로컬 {domain_stats['local']} / LLM {domain_stats['llm_fallback']} "
+              f"(로컬 비율 {domain_stats['local_rate']:.0%})")
+    scoring_stats = summary.get("local_scoring", {})
+    if scoring_stats.get("total"):
+        print(f"▶ 투자 판단: 로컬 {scoring_stats['fast_path']} / LLM {scoring_stats['total'] - scoring_stats['fast_path']} "
+              f"(fast path 비율 {scoring_stats['fast_path_rate']:.0%}, 경계 사례 {scoring_stats['borderline']})")
+    for provider, stats in (summary.get("resilience") or {}).items():
+        if stats.get("retries") or stats.get("timeouts") or stats.get("circuit_open") or stats.get("hedged"):
+            print(f"▶ {provider} 재시도: {stats.get('retries', 0)} / 시간 초과 {stats.get('timeouts', 0)} "
+                  f"/ 헤징 {stats.get('hedged', 0)} (승 {stats.get('hedge_wins', 0)}) "
+                  f"/ 회로 차단 {stats.get('circuit_open', 0)} (현재 {stats.get('circuit', 'closed')})")
+    for key, stats in (summary.get("rate_limits") or {}).items():
+        if stats.get("queued") or stats.get("throttled"):
+            print(f"▶ {key} 호출 한도: 요청 {stats['requests']} / 대기 {stats['queued']}건 "
+                  f"(총 {stats['wait_sec']}초) / 429 {stats['throttled']}")
+    print(f"▶ 결과 파일: {summary['output_path']}")
+    print("="*50)
+
 def print_analysis_result(result: Dict[str, Any]):
     """분석 결과를 콘솔에 출력합니다."""
     print("\n" + "="*50)
     print(" 스타트업 투자 분석 결과")
     print("="*50 + "\n")
     
+    if result.get("run_id"):
+        print(f"▶ 실행 ID: {result['run_id']}")
+    
     # 스타트업 정보
     startup_info = result.get("startup_info", {})
     print(f"▶ 스타트업: {startup_info.get('name', '정보 없음')}")
     print(f"▶ 도메인: {startup_info.get('domain', '정보 없음')}")
     print(f"▶ 설명: {startup_info.get('summary', '정보 없음')}")
+    
+    # 후보 목록
+    candidates = result.get("candidates_documents") or []
+    if len(candidates) > 1:
+        print("\n▶ 후보 스타트업:")
+        for i, candidate in enumerate(candidates, 1):
+            score = candidate.get("score")
+            score_text = f" (점수 {score:.4f})" if isinstance(score, (int, float)) else ""
+            print(f"  {i}. {candidate.get('name', '')}{score_text}")
     print("-"*50)
     
     # 시장 분석
@@ -154,6 +682,9 @@ def print_analysis_result(result: Dict[str, Any]):
         print(f"\n▶ 투자 판단: {investment_recommendation.get('judgement', '정보 없음')}")
         print(f"▶ 점수: {investment_recommendation.get('score', '정보 없음')}/100")
         print(f"▶ 근거: {investment_recommendation.get('reasoning', '정보 없음')}")
+        if investment_recommendation.get("decision_source"):
+            source = "로컬 점수 모델" if investment_recommendation["decision_source"] == "local" else "LLM"
+            print(f"▶ 판단 방식: {source}")
     print("-"*50)
     
     # PDF 보고서
@@ -161,6 +692,30 @@ def print_analysis_result(result: Dict[str, Any]):
     if report_data:
         pdf_path = report_data.get("pdf_path", "생성 실패")
         print(f"\n▶ PDF 보고서: {pdf_path}")
+    
+    # LLM 입력 토큰
+    token_usage = result.get("token_usage") or {}
+    if token_usage:
+        total = sum(usage.get("input_tokens", 0) for usage in token_usage.values())
+        print(f"\n▶ LLM 입력 토큰: 총 {total}")
+        for node, usage in token_usage.items():
+            detail = ""
+            if "content_tokens_before" in usage:
+                detail = f" (검색 문서 {usage['content_tokens_before']} → {usage['content_tokens_after']})"
+            print(f"  • {node}: {usage.get('input_tokens', 0)}{detail}")
+    
+    # 외부 호출 재시도
+    retried = {name: calls for name, calls in (result.get("external_calls") or {}).items()
+               if calls.get("retries") or calls.get("errors") or calls.get("circuit_open")}
+    if retried:
+        print("\n▶ 외부 호출 재시도/오류:")
+        for name, calls in retried.items():
+            print(f"  • {name}: 호출 {calls['calls']}, 재시도 {calls['retries']}, 시간 초과 {calls['timeouts']}, "
+                  f"오류 {calls['errors']}, 회로 차단 {calls['circuit_open']}")
+    
+    # 실행 추적 파일
+    if is_tracing_enabled() and result.get("run_id"):
+        print(f"\n▶ 실행 추적: {trace_path(result['run_id'])}")
     print("\n" + "="*50)
 
 def main():
@@ -168,8 +723,212 @@ def main():
     # 명령행 인자 파싱
     parser = argparse.ArgumentParser(description="AI 스타트업 투자 평가 시스템")
     parser.add_argument("--query", type=str, help="투자 평가를 수행할 스타트업 관련 검색어")
+    parser.add_argument("--queries-file", type=str,
+                        help="배치 평가할 검색어 파일 (JSONL의 'query' 키, CSV의 'query' 열, 또는 한 줄에 하나)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="배치 평가/서버 모드의 동시 실행 수 (기본값: 4)")
+    parser.add_argument("--output", type=str, default="batch_results.jsonl",
+                        help="배치 평가 결과를 기록할 JSONL 파일 (기본값: batch_results.jsonl)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="AsyncOpenAI/비동기 검색 노드로 구성한 그래프를 하나의 이벤트 루프에서 실행합니다")
+    parser.add_argument("--serve", action="store_true",
+                        help="모델/검색 백엔드/그래프를 미리 로드한 평가 서버를 실행합니다 (HTTP API)")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="서버 바인드 주소 (기본값: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="서버 포트 (기본값: 8000)")
+    parser.add_argument("--max-queue", type=int, default=100, help="서버 작업 대기열 최대 길이 (기본값: 100)")
+    parser.add_argument("--retriever", type=str, choices=["pinecone", "local"], default=None,
+                        help="벡터 검색 백엔드 (기본값: RETRIEVER_BACKEND 환경 변수 또는 pinecone)")
+    parser.add_argument("--top-k", type=int, default=None, help="후보 검색 시 가져올 벡터 조각 수 (기본값: 20)")
+    parser.add_argument("--aggregation", type=str, choices=["max", "sum", "rrf"], default=None,
+                        help="스타트업별 검색 점수 집계 방식 (기본값: rrf)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="모듈별 임포트 시간과 초기화 단계별 시간을 출력합니다 "
+                             "(--query/--queries-file 없이 쓰면 초기화와 그래프 컴파일까지만 측정하고 종료)")
+    parser.add_argument("--no-structured-output", action="store_true",
+                        help="함수 호출/스키마 검증 대신 기존 정규식 JSON 추출로 LLM 응답을 파싱합니다")
+    parser.add_argument("--no-llm-cache", action="store_true", help="LLM 응답 캐시를 사용하지 않습니다")
+    parser.add_argument("--llm-cache-disable-nodes", type=str, default=None,
+                        help="LLM 응답 캐시를 끌 노드 목록 (쉼표 구분, 예: investment_judgment)")
+    parser.add_argument("--prompt-budget", type=int, default=None,
+                        help="시장/경쟁 분석 프롬프트에 넣을 검색 문서의 최대 토큰 수 (기본값: PROMPT_BUDGET 또는 1500)")
+    parser.add_argument("--no-local-scoring", action="store_true",
+                        help="로컬 점수 모델 없이 항상 LLM으로 투자 판단을 내립니다")
+    parser.add_argument("--judge-reasoning", action="store_true",
+                        help="판단 근거 문장을 위해 항상 LLM으로 투자 판단을 내립니다")
+    parser.add_argument("--uncertainty-band", type=float, default=None,
+                        help="LLM에 넘길 경계 구간 반폭 (기준점 ± 점수, 기본값: 10)")
+    parser.add_argument("--scorer-model", type=str, default=None,
+                        help="과거 실행 결과로 보정한 로컬 점수 모델 JSON (python -m agents.local_scorer로 생성)")
+    parser.add_argument("--domain-confidence", type=float, default=None,
+                        help="로컬 도메인 분류 결과를 그대로 쓸 최소 신뢰도 (미만이면 LLM 사용, 기본값: 0.5)")
+    parser.add_argument("--report-dir", type=str, default=None,
+                        help="PDF 보고서 저장 디렉터리 (기본값: REPORT_OUTPUT_DIR 또는 reports)")
+    parser.add_argument("--pdf-workers", type=int, default=None,
+                        help="PDF 렌더링 워커 프로세스 수 (0이면 프로세스 없이 스레드 하나, 기본값: CPU 수와 4 중 작은 값)")
+    parser.add_argument("--portfolio-report", type=str, default=None,
+                        help="배치 평가 결과를 순위 요약 표와 회사별 섹션으로 합친 PDF 경로 (--queries-file과 함께 사용)")
+    parser.add_argument("--no-individual-pdf", action="store_true",
+                        help="평가마다 개별 PDF를 만들지 않습니다 (포트폴리오 보고서만 필요할 때)")
+    parser.add_argument("--resume", type=str, default=None, metavar="RUN_ID",
+                        help="중단되거나 실패한 실행을 완료된 노드 결과를 재사용해 이어서 실행합니다")
+    parser.add_argument("--checkpoint-db", type=str, default=None,
+                        help="노드별 상태를 저장할 SQLite 체크포인트 파일 (기본값: .cache/checkpoints.sqlite)")
+    parser.add_argument("--no-checkpoint", action="store_true", help="체크포인트를 저장하지 않습니다")
+    parser.add_argument("--trace", nargs="?", const="", default=None, metavar="DIR",
+                        help="노드/외부 호출 스팬을 실행마다 JSONL(<DIR>/<run_id>.jsonl)로 기록합니다 (기본 디렉터리: traces)")
+    parser.add_argument("--max-retries", type=int, default=None,
+                        help="OpenAI/Tavily/Pinecone 호출의 최대 재시도 횟수 (기본값: OpenAI 3, Tavily/Pinecone 2)")
+    parser.add_argument("--hedge", type=str, default=None, metavar="PROVIDERS",
+                        help="최근 p95 지연을 넘긴 호출에 중복 요청을 보낼 제공자 목록 (쉼표 구분, 예: tavily,pinecone)")
+    parser.add_argument("--openai-rpm", type=int, default=None,
+                        help="OpenAI 분당 요청 수 한도 - 프로세스 전체 (기본값: OPENAI_RPM 또는 3500)")
+    parser.add_argument("--openai-tpm", type=int, default=None,
+                        help="OpenAI 분당 토큰 수 한도 - 프로세스 전체 (기본값: OPENAI_TPM 또는 200000)")
+    parser.add_argument("--tavily-rpm", type=int, default=None,
+                        help="Tavily 분당 요청 수 한도 (기본값: TAVILY_RPM 또는 100)")
+    parser.add_argument("--no-rate-limit", action="store_true", help="프로세스 전체 호출 한도를 적용하지 않습니다")
+    parser.add_argument("--http-pool-size", type=int, default=None,
+                        help="OpenAI/Tavily/Pinecone 공유 클라이언트의 제공자별 최대 연결 수 (기본값: HTTP_POOL_SIZE 또는 32)")
+    parser.add_argument("--no-http2", action="store_true", help="h2 패키지가 있어도 HTTP/2를 사용하지 않습니다")
     args = parser.parse_args()
     
+    # 구조화 출력 설정
+    if args.no_structured_output:
+        configure_structured_output(enabled=False)
+    
+    # 검색 문서 토큰 예산 설정
+    configure_prompt_budget(args.prompt_budget)
+    
+    # 투자 판단 로컬 점수 모델 설정
+    configure_local_scoring(
+        enabled=False if args.no_local_scoring else None,
+        require_reasoning=True if args.judge_reasoning else None,
+        band=args.uncertainty_band,
+        model_path=args.scorer_model,
+    )
+    
+    # 도메인 분류 설정
+    configure_domain_classifier(threshold=args.domain_confidence)
+    
+    # PDF 렌더링 설정
+    configure_pdf_rendering(output_dir=args.report_dir, workers=args.pdf_workers)
+    configure_reports(individual_pdf=False if args.no_individual_pdf else None)
+    
+    # 외부 호출 재시도/헤징 설정
+    configure_resilience(max_retries=args.max_retries)
+    if args.hedge:
+        for provider in args.hedge.split(","):
+            if provider.strip():
+                configure_resilience(provider=provider.strip(), hedge=True)
+    
+    # 공유 HTTP 클라이언트 설정 (클라이언트를 만들기 전에 적용)
+    configure_clients(pool_size=args.http_pool_size, http2=False if args.no_http2 else None)
+    
+    # 프로세스 전체 호출 한도 설정
+    configure_rate_limits(key="openai", rpm=args.openai_rpm, tpm=args.openai_tpm,
+                          enabled=False if args.no_rate_limit else None)
+    configure_rate_limits(key="tavily", rpm=args.tavily_rpm)
+    
+    # 후보 검색 설정
+    configure_retrieval(top_k=args.top_k, aggregation=args.aggregation)
+    
+    # 실행 추적 설정
+    if args.trace is not None:
+        configure_tracing(enabled=True, directory=args.trace or None)
+    
+    # 체크포인트 설정
+    if args.checkpoint_db is not None or args.no_checkpoint:
+        from agents.checkpointing import configure_checkpointing
+        configure_checkpointing(path=args.checkpoint_db, enabled=False if args.no_checkpoint else None)
+    
+    # LLM 응답 캐시 설정
+    configure_llm_cache(
+        enabled=False if args.no_llm_cache else None,
+        disabled_nodes=args.llm_cache_disable_nodes.split(",") if args.llm_cache_disable_nodes else None,
+    )
+    
+    # 서버 모드: 리소스와 그래프를 미리 준비해 두고 HTTP로 평가 작업을 받음
+    if args.serve:
+        from server import serve
+        
+        try:
+            initialize_environment(args.retriever)
+            warm_up()
+            if args.profile_startup:
+                print(profiler.format_report())
+        except Exception as e:
+            logger.error(f"서버 초기화 중 오류 발생: {str(e)}")
+            print(f"\n❌ 오류 발생: {str(e)}")
+            return 1
+        
+        serve(run_investment_analysis, host=args.host, port=args.port,
+              workers=args.concurrency, max_queue=args.max_queue)
+        return 0
+    
+    # 배치 모드: 리소스와 그래프를 한 번만 준비하고 여러 쿼리를 동시에 평가
+    if args.queries_file:
+        try:
+            queries = load_queries(args.queries_file)
+            if not queries:
+                print(f"\n❌ 평가할 쿼리가 없습니다: {args.queries_file}")
+                return 1
+            
+            initialize_environment(args.retriever)
+            workflow = get_workflow(async_mode=args.use_async)
+            with profiler.phase("prewarm_pdf_workers"):
+                prewarm_render_pool()
+            if args.profile_startup:
+                print(profiler.format_report())
+            if args.use_async:
+                summary = asyncio.run(
+                    run_batch_async(queries, workflow, concurrency=args.concurrency, output_path=args.output)
+                )
+            else:
+                summary = run_batch(queries, workflow, concurrency=args.concurrency, output_path=args.output)
+            print_batch_summary(summary)
+            
+            # 포트폴리오 보고서: 성공한 평가 전체를 한 번의 렌더링으로 하나의 PDF로 만듦
+            if args.portfolio_report:
+                states = load_result_states([args.output])
+                portfolio_path = render_portfolio_report(states, args.portfolio_report).result()
+                print(f"\n✅ 포트폴리오 보고서 ({len(states)}개 기업): {portfolio_path}")
+        except Exception as e:
+            logger.error(f"배치 실행 중 오류 발생: {str(e)}")
+            print(f"\n❌ 오류 발생: {str(e)}")
+            return 1
+        
+        return 0 if summary["failed"] == 0 else 2
+    
+    # 이어서 실행: 체크포인트에서 완료된 노드 결과를 불러와 남은(실패한) 노드만 실행
+    if args.resume:
+        try:
+            prewarm_render_pool(background=True)
+            # 원래 실행의 검색 백엔드/실행 방식으로 이어서 실행 (--retriever/--async로 지정하면 그 값 사용)
+            options = get_run_options(args.resume)
+            initialize_environment(args.retriever or options.get("retriever"))
+            if args.use_async or options.get("async_mode"):
+                result = asyncio.run(run_closing_clients(resume_investment_analysis_async(args.resume)))
+            else:
+                result = resume_investment_analysis(args.resume)
+            print_analysis_result(result)
+        except Exception as e:
+            logger.error(f"이어서 실행 중 오류 발생: {str(e)}")
+            print(f"\n❌ 오류 발생: {str(e)}")
+            return 1
+        return 0
+    
+    # 시작 시간 측정만: 초기화와 그래프 컴파일까지 측정하고 평가 없이 종료 (CI에서 회귀 확인용)
+    if args.profile_startup and not args.query:
+        try:
+            initialize_environment(args.retriever)
+            get_workflow(async_mode=args.use_async)
+        except Exception as e:
+            logger.error(f"초기화 중 오류 발생: {str(e)}")
+            print(f"\n❌ 오류 발생: {str(e)}")
+            return 1
+        print(profiler.format_report())
+        return 0
+    
     # 사용자 쿼리 가져오기
     if args.query:
         user_query = args.query
@@ -178,7 +937,16 @@ def main():
     
     # 투자 분석 실행
     try:
-        result = run_investment_analysis(user_query)
+        # PDF 워커는 그래프가 실행되는 동안 백그라운드에서 준비
+        prewarm_render_pool(background=True)
+        initialize_environment(args.retriever)
+        if args.profile_startup:
+            get_workflow(async_mode=args.use_async)
+            print(profiler.format_report())
+        if args.use_async:
+            result = asyncio.run(run_closing_clients(run_investment_analysis_async(user_query)))
+        else:
+            result = run_investment_analysis(user_query)
         print_analysis_result(result)
         
         # PDF 경로 확인
@@ -189,6 +957,9 @@ def main():
             print(f"\n✅ PDF 보고서가 성공적으로 생성되었습니다: {pdf_path}")
         else:
             print(f"\n❌ PDF 보고서 생성에 실패했습니다.")
+        analysis_failed = (result.get("market_analysis") or {}).get("analysis_failed")
+        if str(result.get("status", "")).endswith("_error") or analysis_failed or not os.path.exists(pdf_path):
+            print(f"   이어서 실행하려면: python main.py --resume {result.get('run_id')}")
             
     except Exception as e:
         logger.error(f"프로그램 실행 중 오류 발생: {str(e)}")
@@ -199,4 +970,6 @@ def main():
 
 if __name__ == "__main__":
     exit_code = main()
+    # 아직 끝나지 않은 PDF 렌더링을 기다린 뒤 종료
+    wait_for_all_reports()
     exit(exit_code)
\ No newline at end of file
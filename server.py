@@ -0,0 +1,378 @@
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from urllib.parse import urlparse
+
+from agents.tracing import render_metrics
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+class QueueFullError(Exception):
+    """작업 대기열이 가득 차 새 작업을 받을 수 없을 때 발생"""
+
+class Job:
+    """평가 작업 하나의 상태와 진행 이벤트"""
+
+    def __init__(self, query: str, key: str):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.key = key
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.coalesced = 0  # 이 작업에 합쳐진 동일 요청 수
+        self.events: List[Dict[str, Any]] = []
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, ERROR)
+
+    def add_event(self, event: str, **data):
+        with self._changed:
+            self.events.append({"event": event, "time": time.time(), **data})
+            self._changed.notify_all()
+
+    def complete(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """
+        작업을 끝내고 종료 이벤트(done/error)를 추가합니다.
+
+        상태 변경과 종료 이벤트 추가를 같은 잠금 안에서 하므로, 이벤트 스트림이 finished를 보면
+        종료 이벤트도 항상 함께 받습니다.
+        """
+        with self._changed:
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self.status = status
+            self.events.append({"event": status, "time": self.finished_at})
+            self._changed.notify_all()
+
+    def wait_events(self, offset: int, timeout: float) -> List[Dict[str, Any]]:
+        """offset 이후의 이벤트를 반환합니다. 새 이벤트가 없으면 timeout 동안 기다립니다."""
+        with self._changed:
+            if len(self.events) <= offset and not self.finished:
+                self._changed.wait(timeout)
+            return self.events[offset:]
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "query": self.query,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_wait_sec": round(self.started_at - self.created_at, 3) if self.started_at else None,
+            "elapsed_sec": round(self.finished_at - self.started_at, 3) if self.finished_at and self.started_at else None,
+            "coalesced": self.coalesced,
+            "progress": [e["node"] for e in self.events if e["event"] == "node_completed"],
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+def _query_key(query: str) -> str:
+    """같은 쿼리로 볼 키 (앞뒤/연속 공백 차이는 무시)"""
+    return " ".join(query.split())
+
+class JobManager:
+    """
+    평가 작업을 제한된 크기의 대기열에 받아 고정된 수의 워커 스레드로 처리합니다.
+
+    - 아직 끝나지 않은 동일 쿼리가 있으면 새 작업을 만들지 않고 기존 작업을 돌려줍니다.
+    - 대기열이 가득 차면 QueueFullError를 발생시켜 호출자가 나중에 다시 시도하도록 합니다.
+    - 완료된 작업은 최근 max_finished개까지만 보관합니다.
+    """
+
+    def __init__(self, run_analysis: Callable[..., Dict[str, Any]], workers: int = 4,
+                 max_queue: int = 100, max_finished: int = 1000):
+        """
+        Args:
+            run_analysis: (query, on_update=콜백)을 받아 최종 상태를 반환하는 평가 함수
+            workers: 동시에 실행할 평가 수
+            max_queue: 대기열 최대 길이
+            max_finished: 보관할 완료 작업 수
+        """
+        self.run_analysis = run_analysis
+        self.max_finished = max_finished
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=max_queue)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._inflight: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "coalesced": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"evaluation-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, query: str) -> Tuple[Job, bool]:
+        """
+        작업을 대기열에 넣습니다.
+
+        Returns:
+            (작업, 기존 작업에 합쳐졌는지 여부)
+        """
+        key = _query_key(query)
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                existing.coalesced += 1
+                self._stats["coalesced"] += 1
+                return existing, True
+
+            job = Job(query, key)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._stats["rejected"] += 1
+                raise QueueFullError(f"대기열이 가득 찼습니다 ({self._queue.maxsize}개)")
+
+            self._inflight[key] = job
+            self._jobs[job.id] = job
+            self._stats["submitted"] += 1
+            job.add_event("queued", position=self._queue.qsize())
+            return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.add_event("started")
+
+            try:
+                result = self.run_analysis(
+                    job.query,
+                    on_update=lambda node, update: job.add_event("node_completed", node=node,
+                                                                 status=update.get("status"))
+                )
+                job.complete(DONE, result=result)
+            except Exception as e:
+                logger.error(f"작업 {job.id} ('{job.query}') 실패: {str(e)}")
+                job.complete(ERROR, error=str(e))
+            self._finish(job)
+
+    def _finish(self, job: Job):
+        with self._lock:
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+            self._stats["completed" if job.status == DONE else "failed"] += 1
+
+            # 오래된 완료 작업 정리 (진행 중인 작업은 유지)
+            finished = [job_id for job_id, j in self._jobs.items() if j.finished]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = self._queue.qsize()
+            stats["max_queue"] = self._queue.maxsize
+            stats["running"] = sum(1 for j in self._inflight.values() if j.status == RUNNING)
+            stats["workers"] = len(self._workers)
+        return stats
+
+class EvaluationRequestHandler(BaseHTTPRequestHandler):
+    """
+    평가 서버 HTTP API
+
+    POST /jobs                {"query": "..."} → 202 작업 생성 (동일 쿼리가 진행 중이면 기존 작업)
+    GET  /jobs/<id>           작업 상태 (완료 시 결과 포함)
+    GET  /jobs/<id>/events    진행 이벤트 스트림 (text/event-stream)
+    GET  /jobs/<id>/report    PDF 보고서 (PDF가 없으면 마크다운)
+    GET  /healthz             서버/대기열 상태
+    GET  /metrics             Prometheus 지표 (노드별 지연 시간 히스토그램, 외부 호출, 토큰 수, 작업 수)
+    """
+
+    server_version = "StartupEvaluationServer/1.0"
+    manager: JobManager = None  # serve()에서 설정
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s" % (self.address_string(), format % args))
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> Tuple[List[str], Optional[Job]]:
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        job = self.manager.get(parts[1]) if len(parts) >= 2 and parts[0] == "jobs" else None
+        return parts, job
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if parts != ["jobs"]:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            query = str(payload.get("query", "")).strip()
+        except (ValueError, AttributeError):
+            self._send_json(400, {"error": "요청 본문은 {\"query\": \"...\"} 형식의 JSON이어야 합니다."})
+            return
+        if not query:
+            self._send_json(400, {"error": "query가 비어 있습니다."})
+            return
+
+        try:
+            job, coalesced = self.manager.submit(query)
+        except QueueFullError as e:
+            self._send_json(503, {"error": str(e)}, headers={"Retry-After": "5"})
+            return
+
+        response = job.to_dict(include_result=False)
+        response["coalesced_request"] = coalesced
+        self._send_json(202, response, headers={"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        parts, job = self._route()
+
+        if parts == ["healthz"]:
+            self._send_json(200, {"status": "ok", "jobs": self.manager.get_stats()})
+            return
+        if parts == ["metrics"]:
+            self._send_metrics()
+            return
+
+        if not parts or parts[0] != "jobs" or len(parts) > 3:
+            self._send_json(404, {"error": "not found"})
+            return
+        if job is None:
+            self._send_json(404, {"error": "작업을 찾을 수 없습니다."})
+            return
+
+        if len(parts) == 2:
+            self._send_json(200, job.to_dict())
+        elif parts[2] == "events":
+            self._stream_events(job)
+        elif parts[2] == "report":
+            self._send_report(job)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _send_metrics(self):
+        stats = self.manager.get_stats()
+        gauges = {
+            "startup_eval_jobs": ("현재 작업 수", {"queued": stats["queued"], "running": stats["running"]}),
+            "startup_eval_jobs_processed": ("누적 작업 수", {
+                name: stats[name] for name in ("submitted", "coalesced", "rejected", "completed", "failed")
+            }),
+        }
+        body = render_metrics(gauges).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self, job: Job):
+        """Server-Sent Events로 작업 진행 이벤트를 보내고, 작업이 끝나면 연결을 닫습니다."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        offset = 0
+        try:
+            while True:
+                events = job.wait_events(offset, timeout=15.0)
+                if not events:
+                    # 연결 유지용 주석 라인
+                    self.wfile.write(b": keep-alive\n\n")
+                for event in events:
+                    data = json.dumps(event, ensure_ascii=False, default=str)
+                    self.wfile.write(f"event: {event['event']}\ndata: {data}\n\n".encode("utf-8"))
+                offset += len(events)
+                self.wfile.flush()
+                if any(event["event"] in (DONE, ERROR) for event in events):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 먼저 연결을 끊음
+            pass
+
+    def _send_report(self, job: Job):
+        if not job.finished:
+            self._send_json(409, {"error": "작업이 아직 끝나지 않았습니다.", "status": job.status})
+            return
+        report_data = (job.result or {}).get("report_data") or {}
+
+        pdf_path = report_data.get("pdf_path", "")
+        if pdf_path and os.path.exists(pdf_path):
+            with open(pdf_path, "rb") as f:
+                body = f.read()
+            content_type = "application/pdf"
+        elif report_data.get("markdown_content"):
+            body = report_data["markdown_content"].encode("utf-8")
+            content_type = "text/markdown; charset=utf-8"
+        else:
+            self._send_json(404, {"error": "생성된 보고서가 없습니다.", "status": job.status})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def serve(run_analysis: Callable[..., Dict[str, Any]], host: str = "127.0.0.1", port: int = 8000,
+          workers: int = 4, max_queue: int = 100):
+    """
+    평가 서버를 실행합니다. (Ctrl+C로 종료)
+
+    모델/검색 백엔드/컴파일된 그래프는 호출자가 미리 준비해 두고, run_analysis가 이를 재사용해야
+    요청마다 초기화 비용을 치르지 않습니다.
+
+    Args:
+        run_analysis: (query, on_update=콜백)을 받아 최종 상태를 반환하는 평가 함수
+        host: 바인드할 주소
+        port: 바인드할 포트
+        workers: 동시에 실행할 평가 수
+        max_queue: 대기열 최대 길이 (초과 시 503)
+    """
+    manager = JobManager(run_analysis, workers=workers, max_queue=max_queue)
+    handler = type("BoundEvaluationRequestHandler", (EvaluationRequestHandler,), {"manager": manager})
+
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    logger.info(f"평가 서버 시작: http://{host}:{port} (워커 {workers}, 대기열 {max_queue})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("평가 서버 종료")
+    finally:
+        httpd.server_close()
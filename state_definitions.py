@@ -1,5 +1,5 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional, TypedDict, Annotated
+from pydantic import BaseModel, Field
 
 
 # 📌 후보 스타트업 문서
@@ -8,15 +8,31 @@ class CandidateDocument(BaseModel):
     name: str
     summary: str
     domain: str
+    score: Optional[float] = None          # 검색 집계 점수
+
+
+# 📌 점수와 평가 이유
+class ScoredItem(BaseModel):
+    score: int = Field(ge=0, le=10)        # 0~10점
+    reasoning: str                         # 평가 이유
 
 
 # 📌 시장성 점수
 class MarketScores(BaseModel):
-    market_size: int                       # 시장 크기
-    problem_fit: int                       # 문제-제품 적합성
-    willingness_to_pay: int               # 고객의 지불 의사
-    revenue_model_clarity: int            # 수익 모델 명확성
-    upside_potential: int                 # 성장 가능성
+    market_size: ScoredItem                # 시장 크기
+    problem_fit: ScoredItem                # 문제-제품 적합성
+    willingness_to_pay: ScoredItem         # 고객의 지불 의사
+    revenue_model_clarity: ScoredItem      # 수익 모델 명확성
+    upside_potential: ScoredItem           # 성장 가능성
+
+
+# 📌 시장 조사 노드의 LLM 응답 스키마
+class MarketResearchOutput(MarketScores):
+    """시장성 5개 항목의 점수(0~10)와 이유, 시장 규모/성장률 추정, 주요 트렌드와 규제 이슈"""
+    market_size_estimate: str              # 시장 규모 추정
+    growth_rate_estimate: str              # 성장률 추정
+    key_trends: List[str] = []             # 주요 트렌드
+    regulatory_concerns: List[str] = []    # 규제 이슈
 
 
 # 📌 경쟁사 문서 요약
@@ -26,17 +42,42 @@ class CompetitorDocument(BaseModel):
     content: str
 
 
+# 📌 경쟁사 프로필
+class CompetitorProfile(BaseModel):
+    name: str
+    strengths: List[str] = []
+    weaknesses: List[str] = []
+
+
 # 📌 경쟁사 분석 결과
 class MarketAnalysis(BaseModel):
     competitor_documents: Optional[List[CompetitorDocument]] = []
     competitive_score: Optional[float] = None
     competitive_reasoning: Optional[str] = None
+    competitors: Optional[List[CompetitorProfile]] = []
+
+
+# 📌 경쟁사 분석 노드의 LLM 응답 스키마
+class CompetitorAnalysisOutput(BaseModel):
+    """경쟁사 대비 차별성 점수(0~10)와 이유, 주요 경쟁사별 강점/약점"""
+    competitive_score: float = Field(ge=0, le=10)
+    competitive_reasoning: str
+    competitors: List[CompetitorProfile] = []
 
 
 # 📌 투자 판단 결과
 class InvestmentDecision(BaseModel):
     judgement: Optional[str] = None       # 예: "통과", "불통과"
     reasoning: Optional[str] = None       # 판단 근거
+    score: Optional[int] = Field(default=None, ge=0, le=100)  # 투자 적합성 점수
+
+
+# 📌 투자 판단 노드의 LLM 응답 스키마
+class InvestmentDecisionOutput(InvestmentDecision):
+    """투자 판단('통과' 또는 '불통과'), 판단 이유, 0~100점 투자 적합성 점수"""
+    judgement: Literal["통과", "불통과"]
+    reasoning: str
+    score: int = Field(ge=0, le=100)
 
 
 # 📌 전체 LangGraph 상태
@@ -48,4 +89,33 @@ class GraphState(BaseModel):
     market_analysis: Optional[MarketAnalysis] = None          # 경쟁사 분석 결과
     market_scores: Optional[MarketScores] = None              # ✅ 시장성 점수 추가됨
     investment_decision: Optional[InvestmentDecision] = None  # 투자 여부
-    final_report: Optional[str] = None                        # 최종 보고서
\ No newline at end of file
+    final_report: Optional[str] = None                        # 최종 보고서
+
+
+# 📌 병렬 노드의 상태 병합 규칙
+def _last_value(left: Any, right: Any) -> Any:
+    """나중에 기록된 값을 사용하되, None이면 기존 값을 유지합니다."""
+    return left if right is None else right
+
+
+def _merge_dict(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """딕셔너리 상태는 키 단위로 합칩니다. (경쟁사 분석과 시장 조사가 같은 단계에서 market_analysis를 채움)"""
+    merged = dict(left or {})
+    merged.update(right or {})
+    return merged
+
+
+# 📌 노드 함수가 주고받는 워크플로우 상태 (평면 그래프의 상태 스키마)
+class InvestmentState(TypedDict, total=False):
+    run_id: Annotated[str, _last_value]                                        # 실행 ID (체크포인트 스레드 ID)
+    user_query: Annotated[str, _last_value]                                    # 사용자 입력
+    timestamp: Annotated[str, _last_value]                                     # 보고서 생성 시각
+    status: Annotated[str, _last_value]                                        # 마지막으로 완료된 단계
+    startup_info: Annotated[Dict[str, Any], _last_value]                       # 평가 대상 스타트업
+    candidates_documents: Annotated[List[Dict[str, Any]], _last_value]         # 스타트업 후보 목록
+    competitors: Annotated[List[Dict[str, Any]], _last_value]                  # 경쟁사 분석 결과
+    market_analysis: Annotated[Dict[str, Any], _merge_dict]                    # 시장/경쟁 분석 결과
+    investment_recommendation: Annotated[Dict[str, Any], _last_value]          # 투자 판단
+    report_data: Annotated[Dict[str, Any], _merge_dict]                        # 보고서 경로/내용
+    token_usage: Annotated[Dict[str, Any], _merge_dict]                        # 노드별 LLM 입력 토큰 수
+    run_options: Annotated[Dict[str, Any], _merge_dict]                        # 실행 설정 (검색 백엔드, 비동기 여부)
@@ -0,0 +1,51 @@
+import asyncio
+
+from agents import clients
+from agents.clients import LoopLocalClient, aclose_loop_clients
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def _factory(created):
+    def create():
+        client = FakeAsyncClient()
+        created.append(client)
+        return client, client.close
+    return create
+
+
+def test_each_loop_gets_its_own_client_and_closes_it(monkeypatch):
+    created = []
+    shared = LoopLocalClient(_factory(created))
+    monkeypatch.setitem(clients._clients, "fake_async", shared)
+
+    async def run():
+        first = shared.get()
+        assert shared.get() is first  # 같은 루프에서는 재사용
+        await aclose_loop_clients()
+        return first
+
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+
+    assert first is not second
+    assert [c.closed for c in created] == [True, True]
+    assert len(shared._clients) == 0
+
+
+def test_async_openai_pool_is_closed(monkeypatch):
+    monkeypatch.setattr(clients, "_clients", {})
+    shared = clients.get_async_openai_client("test-key")
+
+    async def run():
+        client = shared.get()
+        await aclose_loop_clients()
+        return client
+
+    assert asyncio.run(run()).is_closed()
@@ -0,0 +1,112 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from agents import disk_cache
+from agents.disk_cache import DiskCache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(disk_cache, "time", SimpleNamespace(time=fake.time))
+    return fake
+
+
+def _cache(tmp_path, **kwargs):
+    return DiskCache(str(tmp_path / "cache" / "cache.sqlite"), **kwargs)
+
+
+def test_get_set_delete_and_persistence(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("a", b"alpha")
+    cache.set("a", b"alpha-2")  # 같은 키는 덮어씀
+
+    assert cache.get("a") == b"alpha-2"
+    assert cache.get("missing") is None
+    assert len(cache) == 1
+    cache.close()
+
+    reopened = _cache(tmp_path)
+    assert reopened.get("a") == b"alpha-2"
+    reopened.delete("a")
+    assert reopened.get("a") is None
+
+
+def test_default_and_per_entry_ttl(tmp_path, clock):
+    cache = _cache(tmp_path, ttl_seconds=60)
+    cache.set("default", b"1")
+    cache.set("short", b"2", ttl_seconds=10)
+
+    clock.advance(30)
+    assert cache.get("short") is None
+    assert cache.get("default") == b"1"
+
+    clock.advance(31)
+    assert cache.get("default") is None
+    assert len(cache) == 0
+
+
+def test_no_ttl_never_expires(tmp_path, clock):
+    cache = _cache(tmp_path)
+    cache.set("forever", b"x")
+
+    clock.advance(10 ** 9)
+    assert cache.get("forever") == b"x"
+
+
+def test_max_entries_evicts_least_recently_used(tmp_path, clock):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.set("a", b"1")
+    clock.advance(1)
+    cache.set("b", b"2")
+    clock.advance(1)
+    assert cache.get("a") == b"1"  # a를 최근 사용으로 갱신
+    clock.advance(1)
+    cache.set("c", b"3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+    assert len(cache) == 2
+
+
+def test_max_bytes_evicts_oldest_until_under_limit(tmp_path, clock):
+    cache = _cache(tmp_path, max_entries=None, max_bytes=10)
+    for key in ("a", "b", "c"):
+        cache.set(key, b"xxxx")
+        clock.advance(1)
+
+    # 12바이트 > 10바이트 → 가장 오래된 a만 제거
+    assert cache.get("a") is None
+    assert cache.get("b") == b"xxxx" and cache.get("c") == b"xxxx"
+
+
+def test_shared_across_threads(tmp_path):
+    cache = _cache(tmp_path, max_entries=None)
+
+    def writer(worker):
+        for i in range(50):
+            cache.set(f"{worker}-{i}", str(i).encode())
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache) == 200
+    assert cache.get("3-49") == b"49"
+    cache.clear()
+    assert len(cache) == 0
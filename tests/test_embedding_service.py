@@ -0,0 +1,119 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from agents.embedding_service import EmbeddingService, as_embedding_service
+
+
+class FakeModel:
+    """텍스트 길이로 벡터를 만들고, 호출마다 받은 텍스트 목록을 기록합니다."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        with self._lock:
+            self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model down")
+        return np.asarray([[len(t), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+
+def _service(model, tmp_path=None, **kwargs):
+    cache_path = str(tmp_path / "embeddings.sqlite") if tmp_path is not None else None
+    return EmbeddingService(model, "fake-model", cache_path=cache_path, **kwargs)
+
+
+def test_encode_many_encodes_unique_missing_texts_once():
+    model = FakeModel()
+    service = _service(model)
+
+    vectors = service.encode_many(["a", "bb", "a", "ccc"])
+
+    assert model.calls == [["a", "bb", "ccc"]]
+    assert vectors.shape == (4, 3) and vectors.dtype == np.float32
+    assert np.array_equal(vectors[0], vectors[2])
+
+    # 두 번째 호출은 모두 메모리 캐시에서 처리
+    again = service.encode_many(["ccc", "a"])
+    assert len(model.calls) == 1
+    assert np.array_equal(again, vectors[[3, 0]])
+    assert service.get_stats()["lru_hits"] == 2
+
+
+def test_disk_cache_is_shared_per_model_name(tmp_path):
+    _service(FakeModel(), tmp_path).encode_many(["hello", "world"])
+
+    model = FakeModel()
+    vectors = _service(model, tmp_path).encode_many(["hello", "world"])
+    assert model.calls == []
+    assert vectors[:, 0].tolist() == [5.0, 5.0]
+
+    # 모델 이름이 다르면 캐시를 공유하지 않음
+    other = FakeModel()
+    EmbeddingService(other, "other-model", cache_path=str(tmp_path / "embeddings.sqlite")).encode_many(["hello"])
+    assert other.calls == [["hello"]]
+
+
+def test_use_cache_false_always_calls_model():
+    model = FakeModel()
+    service = _service(model)
+
+    service.encode_many(["x"], use_cache=False)
+    service.encode_many(["x"], use_cache=False)
+
+    assert model.calls == [["x"], ["x"]]
+    assert service.get_stats()["lru_size"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    model = FakeModel()
+    service = _service(model, lru_size=2)
+
+    service.encode_many(["a", "b"])
+    service.encode_many(["a"])   # a를 최근 사용으로 갱신
+    service.encode_many(["c"])   # b가 밀려남
+    service.encode_many(["a", "b"])
+
+    assert model.calls == [["a", "b"], ["c"], ["b"]]
+
+
+def test_concurrent_single_requests_are_micro_batched():
+    model = FakeModel()
+    service = _service(model, flush_window_ms=200, max_batch_size=64)
+    texts = [f"text-{i}" for i in range(8)]
+    barrier = threading.Barrier(len(texts))
+    results = {}
+
+    def worker(text):
+        barrier.wait()
+        results[text] = service.encode(text)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(model.calls) < len(texts)
+    assert sorted(t for call in model.calls for t in call) == sorted(texts)
+    assert all(results[t][0] == len(t) for t in texts)
+
+
+def test_aencode_and_batch_errors_propagate():
+    service = _service(FakeModel())
+    assert asyncio.run(service.aencode("abcd"))[0] == 4.0
+
+    failing = _service(FakeModel(fail=True))
+    with pytest.raises(RuntimeError):
+        failing.encode("boom")
+
+
+def test_as_embedding_service_wraps_plain_models_only():
+    service = _service(FakeModel())
+    assert as_embedding_service(service) is service
+    assert isinstance(as_embedding_service(FakeModel(), cache_path=None), EmbeddingService)
@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+import agents.llm_client as llm_client
+import agents.resilience as resilience
+
+
+class Verdict(BaseModel):
+    judgement: str
+    score: int
+
+
+class FakeLimiter:
+    """호출 한도 예약/정산 호출만 기록하는 가짜 QuotaLimiter"""
+
+    def __init__(self):
+        self.acquired = []
+        self.reconciled = []
+
+    def acquire(self, key, tokens, priority=None):
+        self.acquired.append((key, tokens))
+        return 0.0
+
+    async def aacquire(self, key, tokens, priority=None):
+        self.acquired.append((key, tokens))
+        return 0.0
+
+    def reconcile(self, key, reserved, actual):
+        self.reconciled.append((key, reserved, actual))
+
+    def on_throttle(self, key, retry_after=None):
+        pass
+
+
+def _chunk(arguments=None, usage=None):
+    choices = []
+    if arguments is not None:
+        call = SimpleNamespace(function=SimpleNamespace(arguments=arguments))
+        choices = [SimpleNamespace(delta=SimpleNamespace(tool_calls=[call], content=None))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class FakeAsyncStream:
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._chunks:
+            raise StopAsyncIteration
+        return self._chunks.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncCompletions:
+    def __init__(self):
+        self.requests = []
+
+    async def create(self, **params):
+        self.requests.append(params)
+        usage = SimpleNamespace(prompt_tokens=40, completion_tokens=12)
+        if params.get("stream"):
+            return FakeAsyncStream([_chunk('{"judgement": "통과", '), _chunk('"score": 80}'), _chunk(usage=usage)])
+        message = SimpleNamespace(tool_calls=[SimpleNamespace(function=SimpleNamespace(
+            arguments='{"judgement": "통과", "score": 80}'))], content=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    fake = FakeLimiter()
+    for module in (llm_client, resilience):
+        monkeypatch.setattr(module, "quota_limiter", fake)
+        monkeypatch.setattr(module, "is_rate_limiting_enabled", lambda: True)
+    return fake
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_async_structured_completion_reserves_and_reconciles_quota(limiter, monkeypatch, stream):
+    monkeypatch.setitem(llm_client._structured_config, "stream", stream)
+    completions = FakeAsyncCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    messages = [{"role": "user", "content": "평가해 주세요"}]
+
+    result = asyncio.run(llm_client.astructured_completion(
+        client, "gpt-3.5-turbo-0125", messages, Verdict, node="investment_judgment", use_cache=False))
+
+    assert result == Verdict(judgement="통과", score=80)
+    key, reserved = llm_client._quota(completions.requests[0])
+    assert limiter.acquired == [(key, reserved)]
+    # 스트리밍도 마지막 usage 조각까지 읽어 실제 사용량으로 정산
+    assert limiter.reconciled == [(key, reserved, 52)]
+    if stream:
+        assert completions.requests[0]["stream_options"] == {"include_usage": True}
+
+
+def test_estimated_tokens_include_tool_schema(monkeypatch):
+    tools = [llm_client.function_tool(Verdict)]
+    messages = [{"role": "user", "content": "평가해 주세요"}]
+    recorded = []
+    monkeypatch.setattr(llm_client, "is_rate_limiting_enabled", lambda: True)
+    monkeypatch.setattr(llm_client.quota_limiter, "reconcile", lambda key, reserved, actual: recorded.append(actual))
+
+    llm_client._record_tokens(None, None, messages, "gpt-3.5-turbo-0125", "{}", ("openai:m", 100))
+    llm_client._record_tokens(None, None, messages, "gpt-3.5-turbo-0125", "{}", ("openai:m", 100), tools)
+
+    assert recorded[1] - recorded[0] == llm_client._tool_tokens(tools, "gpt-3.5-turbo-0125") > 0
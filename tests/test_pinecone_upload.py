@@ -0,0 +1,143 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from agents import pinecone_upload as pu
+
+ROWS = [
+    ("Alpha", "alpha builds AI diagnostics"),
+    ("Alpha", "alpha raised a seed round"),
+    ("Beta", "beta sells fintech software"),
+    ("Gamma", "gamma runs a logistics platform"),
+]
+
+
+class FakeEncoder:
+    """텍스트마다 결정적인 벡터를 돌려주고 인코딩한 텍스트 수를 셉니다."""
+
+    def __init__(self, dimension=16):
+        self.dimension = dimension
+        self.encoded = 0
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.encoded += len(texts)
+        vectors = []
+        for text in texts:
+            seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+            vectors.append(np.random.default_rng(seed).normal(size=self.dimension))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class FakeIndex:
+    def __init__(self):
+        self.vectors = {}
+        self.upserted = []
+        self.deleted = []
+
+    def upsert(self, vectors):
+        for vector in vectors:
+            self.vectors[vector["id"]] = vector
+            self.upserted.append(vector["id"])
+
+    def update(self, id, set_metadata):
+        self.vectors[id]["metadata"].update(set_metadata)
+
+    def delete(self, ids):
+        for vector_id in ids:
+            self.vectors.pop(vector_id, None)
+            self.deleted.append(vector_id)
+
+    def list(self):
+        yield list(self.vectors)
+
+
+def _write_csv(path, rows):
+    pd.DataFrame(rows, columns=["startup", "text"]).to_csv(path, index=False)
+    return pu.load_startup_csv(str(path))
+
+
+def _sync(index, df, manifest_path, model, **options):
+    return pu.sync_index(index, df, str(manifest_path), "startup-index", model=model, **options)
+
+
+def test_vector_ids_are_stable_content_hashes(tmp_path):
+    first = _write_csv(tmp_path / "a.csv", ROWS)
+    second = _write_csv(tmp_path / "b.csv", list(reversed(ROWS)) + [ROWS[0]])
+
+    assert sorted(first["id"]) == sorted(second["id"])
+    assert len(set(second["id"])) == len(ROWS)  # 완전히 같은 행은 하나만 남음
+    assert pu.make_vector_id("Alpha", "x") == pu.make_vector_id("Alpha", "x")
+    assert pu.make_vector_id("Alpha", "x") != pu.make_vector_id("Alpha", "y")
+
+
+def test_unchanged_csv_makes_no_embedding_or_upsert_calls(tmp_path):
+    df = _write_csv(tmp_path / "startups.csv", ROWS)
+    manifest_path = tmp_path / "manifest.json"
+    index, model = FakeIndex(), FakeEncoder()
+
+    _sync(index, df, manifest_path, model)
+    assert sorted(index.vectors) == sorted(df["id"])
+
+    rerun_index, rerun_model = FakeIndex(), FakeEncoder()
+    stats = _sync(rerun_index, df, manifest_path, rerun_model)
+
+    assert rerun_model.encoded == 0
+    assert rerun_index.upserted == [] and rerun_index.deleted == []
+    assert stats["upserted"] == 0 and stats["deleted"] == 0
+
+
+def test_changed_and_removed_rows_are_synced(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    index = FakeIndex()
+    _sync(index, _write_csv(tmp_path / "v1.csv", ROWS), manifest_path, FakeEncoder())
+
+    # Beta 행 내용 변경, Gamma 행 삭제
+    changed = [ROWS[0], ROWS[1], ("Beta", "beta pivoted to insurance")]
+    df = _write_csv(tmp_path / "v2.csv", changed)
+    index.upserted.clear()
+    stats = _sync(index, df, manifest_path, FakeEncoder())
+
+    removed = {pu.make_vector_id(*ROWS[2]), pu.make_vector_id(*ROWS[3])}
+    assert index.upserted == [pu.make_vector_id(*changed[2])]
+    assert set(index.deleted) == removed
+    assert stats["deleted"] == 2
+    assert sorted(index.vectors) == sorted(df["id"])
+    assert set(pu.load_manifest(str(manifest_path), "startup-index")["vectors"]) == set(df["id"])
+
+
+def test_dry_run_reports_plan_without_changes(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    index, model = FakeIndex(), FakeEncoder()
+    df = _write_csv(tmp_path / "startups.csv", ROWS)
+
+    stats = _sync(index, df, manifest_path, model, dry_run=True)
+
+    assert stats["planned_upserts"] == len(ROWS) and stats["planned_deletes"] == 0
+    assert index.vectors == {} and model.encoded == 0
+    assert not manifest_path.exists()
+
+
+def test_manifest_round_trip(tmp_path):
+    manifest_path = str(tmp_path / "nested" / "manifest.json")
+    manifest = {"index_name": "startup-index", "vectors": {"a": "Alpha", "b": "Beta"}}
+
+    pu.save_manifest(manifest_path, manifest)
+
+    loaded = pu.load_manifest(manifest_path, "startup-index")
+    assert loaded["vectors"] == manifest["vectors"]
+    assert "updated_at" in loaded
+    # 다른 인덱스의 기록은 무시
+    assert pu.load_manifest(manifest_path, "other-index")["vectors"] == {}
+    assert pu.load_manifest(str(tmp_path / "missing.json"), "startup-index")["vectors"] == {}
+
+
+def test_delete_unmanaged_vectors_removes_unknown_ids(tmp_path):
+    index = FakeIndex()
+    index.upsert([{"id": "legacy-uuid", "values": [0.0], "metadata": {}}])
+    df = _write_csv(tmp_path / "startups.csv", ROWS)
+
+    _sync(index, df, tmp_path / "manifest.json", FakeEncoder(), delete_unmanaged=True)
+
+    assert "legacy-uuid" not in index.vectors
+    assert sorted(index.vectors) == sorted(df["id"])
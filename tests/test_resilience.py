@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+import agents.resilience as resilience
+
+
+class ReadTimeout(Exception):
+    """SDK 읽기 시간 초과 예외 흉내 (requests.ReadTimeout과 같은 이름)"""
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setitem(resilience._policies, "fake", resilience._policy("fake", timeout=5.0, max_retries=1,
+                                                                          timeout_arg="timeout"))
+    monkeypatch.setitem(resilience._policies["fake"], "base_delay", 0.0)
+    return resilience._policies["fake"]
+
+
+def test_sync_attempt_runs_inline_with_sdk_timeout(policy):
+    calls = []
+
+    def search(query, timeout):
+        calls.append((threading.current_thread(), timeout))
+        if len(calls) == 1:
+            raise ReadTimeout("read timed out")
+        return {"query": query}
+
+    assert resilience.resilient_call("fake", search, query="q") == {"query": "q"}
+    # 새 스레드를 만들지 않고, 시도마다 남은 시간을 SDK 제한 시간으로 넘김
+    assert [thread for thread, _ in calls] == [threading.current_thread()] * 2
+    assert all(0 < timeout <= policy["timeout"] for _, timeout in calls)
+    assert resilience.get_resilience_stats()["fake"]["timeouts"] == 1
+
+
+def test_read_stream_enforces_deadline(policy, monkeypatch):
+    monkeypatch.setitem(policy, "timeout", -1.0)
+    with pytest.raises(resilience.CallTimeoutError):
+        list(resilience.read_stream("fake", iter([1, 2, 3])))
@@ -0,0 +1,82 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from agents.retriever import BaseRetriever, LocalNumpyRetriever, METADATA_FILE, save_local_index
+
+
+def _build_index(tmp_path, count=50, dimension=8, dtype="float32", seed=0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.normal(size=(count, dimension)).astype(np.float32)
+    ids = [f"id-{i}" for i in range(count)]
+    metadatas = [{"name": f"Startup{i}", "summary": f"summary {i}"} for i in range(count)]
+    save_local_index(str(tmp_path), ids, embeddings, metadatas, dtype=dtype)
+    return embeddings, ids
+
+
+def _brute_force(embeddings, ids, vector, top_k):
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = normalized.dot(vector / np.linalg.norm(vector))
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [ids[i] for i in order], scores[order]
+
+
+def test_incomplete_backend_fails_on_instantiation():
+    class NoQuery(BaseRetriever):
+        backend = "broken"
+
+    with pytest.raises(TypeError):
+        NoQuery()
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_local_query_matches_brute_force(tmp_path, mmap):
+    embeddings, ids = _build_index(tmp_path)
+    retriever = LocalNumpyRetriever(str(tmp_path), mmap=mmap)
+    vector = np.random.default_rng(1).normal(size=8)
+
+    results = retriever.query(vector, top_k=5)
+
+    expected_ids, expected_scores = _brute_force(embeddings, ids, vector, 5)
+    assert [r["id"] for r in results] == expected_ids
+    assert np.allclose([r["score"] for r in results], expected_scores, atol=1e-5)
+    assert results[0]["metadata"]["name"] == f"Startup{ids.index(expected_ids[0])}"
+
+
+def test_local_query_float16_keeps_ranking(tmp_path):
+    embeddings, ids = _build_index(tmp_path, dtype="float16")
+    retriever = LocalNumpyRetriever(str(tmp_path))
+    vector = embeddings[7]
+
+    results = retriever.query(vector, top_k=3)
+
+    assert retriever.matrix.dtype == np.float16
+    assert results[0]["id"] == "id-7"
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-2)
+
+
+def test_local_query_edge_cases(tmp_path):
+    _build_index(tmp_path, count=4)
+    retriever = LocalNumpyRetriever(str(tmp_path))
+    vector = np.ones(8)
+
+    # top_k가 인덱스 크기보다 크면 전체를 정렬해 반환
+    results = retriever.query(vector, top_k=10)
+    assert len(results) == len(retriever) == 4
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    assert retriever.query(vector, top_k=0) == []
+    assert asyncio.run(retriever.aquery(vector, top_k=2)) == retriever.query(vector, top_k=2)
+
+
+def test_local_index_rejects_mismatched_metadata(tmp_path):
+    _build_index(tmp_path, count=3)
+    (tmp_path / METADATA_FILE).write_text('[{"id": "only-one", "metadata": {}}]', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        LocalNumpyRetriever(str(tmp_path))
+
+
+def test_save_local_index_validates_lengths(tmp_path):
+    with pytest.raises(ValueError):
+        save_local_index(str(tmp_path), ["a", "b"], np.ones((1, 4)), [{}, {}])
@@ -0,0 +1,43 @@
+import pytest
+
+from agents.search_client import CachedSearchClient, normalize_query
+
+
+class FakeTavily:
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, **kwargs):
+        self.queries.append(query)
+        return {"results": [{"title": query, "url": "https://example.com", "content": query}]}
+
+
+@pytest.mark.parametrize("left, right", [
+    ("AI  스타트업", "ai 스타트업"),
+    (" 헬스케어\tAI ", "헬스케어 AI"),
+    ("ＡＩ 스타트업", "AI 스타트업"),  # 전각 문자 (NFKC)
+])
+def test_normalize_query_folds_case_whitespace_and_unicode(left, right):
+    assert normalize_query(left) == normalize_query(right)
+
+
+@pytest.mark.parametrize("left, right", [
+    ("C++ 스타트업", "C 스타트업"),
+    ("AI 헬스케어", "헬스케어 AI"),
+    ("AI AI 스타트업", "AI 스타트업"),
+    ("B2B/B2C 플랫폼", "B2B B2C 플랫폼"),
+])
+def test_normalize_query_keeps_meaningful_differences(left, right):
+    assert normalize_query(left) != normalize_query(right)
+
+
+def test_cache_shares_results_only_for_equivalent_queries(tmp_path):
+    tavily = FakeTavily()
+    client = CachedSearchClient(tavily, cache_path=str(tmp_path / "search.sqlite"))
+
+    first = client.search("C++ 스타트업", search_depth="advanced")
+    assert client.search("  c++   스타트업", search_depth="advanced") == first
+    assert client.search("C 스타트업", search_depth="advanced")["results"][0]["title"] == "C 스타트업"
+
+    assert tavily.queries == ["C++ 스타트업", "C 스타트업"]
+    assert client.get_stats()["cache_hits"] == 1
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from server import DONE, ERROR, JobManager
+
+
+def _read_stream(job, timeout=5.0):
+    """SSE 핸들러와 같은 방식으로 종료 이벤트까지 읽고, 빈 응답(keep-alive) 횟수를 함께 반환합니다."""
+    offset, empty_reads, received = 0, 0, []
+    while True:
+        events = job.wait_events(offset, timeout=timeout)
+        if not events:
+            empty_reads += 1
+            assert not job.finished, "작업이 끝났는데 종료 이벤트가 없습니다."
+        received.extend(events)
+        offset += len(events)
+        if any(event["event"] in (DONE, ERROR) for event in events):
+            return received, empty_reads
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_stream_receives_terminal_event_with_finished_status(fails):
+    release = threading.Event()
+
+    def run_analysis(query, on_update):
+        on_update("startup_exploration", {"status": "startup_exploration_completed"})
+        release.wait(5)
+        if fails:
+            raise RuntimeError("boom")
+        return {"status": "pdf_generation_completed"}
+
+    manager = JobManager(run_analysis, workers=1)
+    job, _ = manager.submit("AI 스타트업")
+    threading.Timer(0.05, release.set).start()
+
+    events, empty_reads = _read_stream(job)
+
+    expected = ERROR if fails else DONE
+    assert job.status == expected
+    assert [e["event"] for e in events][-1] == expected
+    assert empty_reads == 0
+    if fails:
+        assert job.error == "boom" and job.result is None
+    else:
+        assert job.result == {"status": "pdf_generation_completed"}
+    assert manager.get_stats()["failed" if fails else "completed"] == 1
+
+
+def test_finished_job_always_has_terminal_event():
+    manager = JobManager(lambda query, on_update: {}, workers=1)
+    job, _ = manager.submit("헬스케어")
+    _read_stream(job)
+
+    # 끝난 작업을 처음부터 읽어도 바로 종료 이벤트까지 받음
+    events = job.wait_events(0, timeout=0)
+    assert job.finished and events[-1]["event"] == DONE
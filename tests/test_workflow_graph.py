@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+from agents import competitor_analyzer, market_researcher
+
+COMPETITOR_OUTPUT = {
+    "competitive_score": 7,
+    "competitive_reasoning": "기술력은 앞서지만 영업망이 약합니다.",
+    "competitors": [{"name": "Rival", "strengths": ["브랜드"], "weaknesses": ["가격"]}],
+}
+MARKET_OUTPUT = {
+    name: {"score": 7, "reasoning": "양호"}
+    for name in ("market_size", "problem_fit", "willingness_to_pay", "revenue_model_clarity", "upside_potential")
+}
+
+
+class FakeSearchClient:
+    def search(self, query, **kwargs):
+        return {"results": [{"title": "Rival, Inc.", "url": "https://example.com", "content": query}]}
+
+    async def asearch(self, query, **kwargs):
+        return self.search(query, **kwargs)
+
+
+@pytest.fixture
+def fake_services(monkeypatch):
+    """외부 호출(LLM, 검색)과 앞뒤 노드를 가짜로 바꾸고, 두 분석 노드는 실제 함수를 사용합니다."""
+    for module, output in ((competitor_analyzer, COMPETITOR_OUTPUT), (market_researcher, MARKET_OUTPUT)):
+        async def ajson_completion(*args, output=output, **kwargs):
+            return json.loads(json.dumps(output))
+
+        monkeypatch.setattr(module, "json_completion",
+                            lambda *args, output=output, **kwargs: json.loads(json.dumps(output)))
+        monkeypatch.setattr(module, "ajson_completion", ajson_completion)
+        monkeypatch.setattr(module, "_get_client", lambda: None)
+        monkeypatch.setattr(module, "_get_async_client", lambda: None)
+        monkeypatch.setattr(module, "get_search_client", FakeSearchClient)
+
+    def explore(state):
+        return {"startup_info": {"name": "Bench", "domain": "AI", "summary": "benchmark"},
+                "status": "startup_exploration_completed"}
+
+    def finish(state):
+        return {"status": "pdf_generation_completed"}
+
+    for name, node in (("startup_exploration", explore), ("investment_judgment", finish),
+                       ("pdf_generation", finish)):
+        async def async_node(state, node=node):
+            return node(state)
+        monkeypatch.setitem(main.WORKFLOW_NODES, name, (node, async_node))
+
+
+@pytest.mark.parametrize("async_mode", [False, True])
+def test_parallel_branches_keep_competitors(fake_services, async_mode):
+    graph = main.create_workflow_graph(async_mode=async_mode)
+    initial = main._initial_state("AI 스타트업")
+
+    if async_mode:
+        result = asyncio.run(graph.ainvoke(initial))
+    else:
+        result = graph.invoke(initial)
+
+    # 시장 조사 쪽이 받은 빈 경쟁사 목록이 경쟁사 분석 결과를 덮어쓰지 않아야 함
+    assert [c["name"] for c in result["competitors"]] == ["Rival"]
+    # 두 노드의 market_analysis 키가 모두 남아 있어야 함
+    assert result["market_analysis"]["competitive_score"] == 7
+    assert result["market_analysis"]["average_market_score"] == 7